@@ -1,18 +1,31 @@
 from __future__ import annotations
 
+import json
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Literal, Dict
+from typing import List, Literal, Dict, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
 
+from core.profiling import profiled, profiling_enabled, profiling_middleware
+
 try:
     import joblib
 except ImportError:
     joblib = None
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 
 # =========================
 # 경로/모델 로드
@@ -23,23 +36,104 @@ MODELS_DIR = ROOT / "backend" / "models"
 DEFAULT_MODEL_PATH = MODELS_DIR / "lgbm_reco.pkl"
 
 _model = None
+_model_version = None   # pkl 파일의 mtime/size. 바뀌면 다시 로드하고 예측 캐시도 비운다.
+_model_lock = threading.Lock()
 
 
-def load_model(model_path: Path = DEFAULT_MODEL_PATH):
-    global _model
-    if _model is not None:
-        return _model
+def model_file_version(model_path: Path) -> str:
+    st = model_path.stat()
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
 
+def load_model(model_path: Path = DEFAULT_MODEL_PATH):
+    global _model, _model_version
     if joblib is None:
         raise RuntimeError("joblib이 없어. `pip install joblib` 설치해줘.")
 
     if not model_path.exists():
+        if _model is not None:
+            return _model  # 교체 중이면 기존 모델 유지
         raise FileNotFoundError(f"모델 pkl이 없어: {model_path}")
 
-    _model = joblib.load(model_path)
+    version = model_file_version(model_path)
+    if _model is not None and version == _model_version:
+        return _model
+
+    with _model_lock:
+        if _model is None or version != _model_version:
+            _model = joblib.load(model_path)
+            _model_version = version
     return _model
 
 
+# =========================
+# 예측 캐시 (/predict)
+# =========================
+# 프론트 슬라이더 값이 거칠게(step) 들어오고 existing_lx 값도 몇 개뿐이라 같은 입력이 많이 반복됨.
+# feature 벡터를 PREDICT_CACHE_DECIMALS 자리로 양자화한 값을 key로 모델 예측값을 캐시한다.
+PREDICT_CACHE_SIZE = int(os.environ.get("PREDICT_CACHE_SIZE", "4096"))        # 0이면 캐시 끔
+PREDICT_CACHE_DECIMALS = int(os.environ.get("PREDICT_CACHE_DECIMALS", "3"))
+
+
+class PredictionCache:
+    """양자화된 feature 벡터 -> 모델 예측값. LRU, 모델 버전이 바뀌면 전체 무효화."""
+
+    def __init__(self, maxsize: int, decimals: int):
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._items: "OrderedDict[Tuple[float, ...], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, values: List[float]) -> Tuple[float, ...]:
+        return tuple(round(float(v), self.decimals) + 0.0 for v in values)  # +0.0: -0.0 -> 0.0
+
+    def get(self, key: Tuple[float, ...], version: str) -> Optional[float]:
+        with self._lock:
+            if version != self.version:
+                if self._items:
+                    self.invalidations += 1
+                self._items.clear()
+                self.version = version
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple[float, ...], value: float, version: str):
+        with self._lock:
+            if version != self.version:
+                return
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": self.maxsize > 0,
+                "size": len(self._items),
+                "maxsize": self.maxsize,
+                "decimals": self.decimals,
+                "model_version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+_predict_cache = PredictionCache(PREDICT_CACHE_SIZE, PREDICT_CACHE_DECIMALS)
+
+
 # =========================
 # 유틸
 # =========================
@@ -75,6 +169,53 @@ def compute_reasons_top3(
     return [{"key": k, "direction": d, "label": label} for (k, _, d, label) in contribs_sorted]
 
 
+# compute_reasons_top3와 같은 순서/가중치 (벡터화 버전용)
+REASON_TABLE = [
+    ("low_traffic", "DOWN", "야간 이동이 적으므로 밝기를 낮춥니다."),
+    ("park_within", "DOWN", "공원이 포함되어 생태 보호를 위해 밝기를 낮춥니다."),
+    ("high_cctv", "DOWN", "CCTV가 밀집해 밝기를 낮추어도 안전을 보완할 수 있습니다."),
+    ("high_residential", "DOWN", "주거가 밀집해 빛침입/불편을 줄이기 위해 밝기를 낮춥니다."),
+    ("high_traffic", "UP", "야간 이동이 많아 안전을 위해 밝기를 유지합니다."),
+    ("no_park_within", "UP", "공원이 포함되지 않아 밝기를 유지합니다."),
+    ("low_cctv", "UP", "CCTV가 부족해 밝기를 크게 낮추지 않습니다."),
+    ("high_commercial", "UP", "상권이 밀집해 야간 활동을 고려해 밝기를 유지합니다."),
+]
+
+
+def compute_reason_codes_top3(cols: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    compute_reasons_top3의 벡터화 버전. (n, 3) REASON_TABLE 인덱스를 반환.
+    stable 정렬이라 동점일 때 순서도 단건 버전과 같음.
+    """
+    nt = clamp(cols["night_traffic"], 0.0, 1.0)
+    cd = clamp(cols["cctv_density"], 0.0, 1.0)
+    pw = (cols["park_within"] != 0).astype(float)
+    com = clamp(cols["commercial_density"], 0.0, 1.0)
+    res = clamp(cols["residential_density"], 0.0, 1.0)
+
+    contribs = np.column_stack([
+        -0.55 * (1 - nt),
+        -0.45 * pw,
+        -0.35 * cd,
+        -0.80 * res,
+        +0.70 * nt,
+        +0.30 * (1 - pw),
+        +0.25 * (1 - cd),
+        +0.55 * com,
+    ])
+    return np.argsort(-np.abs(contribs), axis=1, kind="stable")[:, :3]
+
+
+def clamp_recommended(pred: np.ndarray, existing: np.ndarray):
+    """/predict와 같은 후처리(기존 초과 금지, 하한 2lx)를 배열로. (recommended, delta_percent)"""
+    lo = np.minimum(2.0, existing)
+    recommended = clamp(np.minimum(pred, existing), lo, existing)
+    recommended = np.where(existing <= 0, 0.0, recommended)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = np.where(existing > 0, (recommended - existing) / np.where(existing > 0, existing, 1.0) * 100.0, 0.0)
+    return recommended, np.round(delta, 1)
+
+
 # =========================
 # API 스키마
 # =========================
@@ -87,6 +228,22 @@ class PredictRequest(BaseModel):
     existing_lx: float = Field(..., description="기존 조도(예: 10/15/25)")
 
 
+FEATURES = [
+    "night_traffic",
+    "cctv_density",
+    "park_within",
+    "commercial_density",
+    "residential_density",
+    "existing_lx",
+]
+UNIT_RANGE_FEATURES = ["night_traffic", "cctv_density", "commercial_density", "residential_density"]
+
+BULK_MAX_ROWS = 200_000
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+ARROW_FILE = "application/vnd.apache.arrow.file"
+RAW_FLOAT32 = "application/octet-stream"
+
+
 class ReasonItem(BaseModel):
     key: str
     direction: Literal["UP", "DOWN"]
@@ -106,6 +263,10 @@ class PredictResponse(BaseModel):
 # =========================
 app = FastAPI(title="Seoul Dimming Recommender API", version="1.0.0")
 
+# Opt-in profiling (X-Profile: 1 + X-Admin-Token), only when DIMMING_ADMIN_TOKEN is set
+if profiling_enabled():
+    app.middleware("http")(profiling_middleware)
+
 
 @app.on_event("startup")
 def _startup():
@@ -123,25 +284,41 @@ def root():
 
 @app.get("/health")
 def health():
-    return {"ok": True, "model_loaded": _model is not None}
+    return {"ok": True, "model_loaded": _model is not None, "model_version": _model_version}
+
+
+@app.get("/predict/cache")
+def predict_cache_stats():
+    """/predict 예측 캐시 상태 (hit/miss, 크기, 모델 버전)."""
+    return _predict_cache.stats()
 
 
 @app.post("/predict", response_model=PredictResponse)
+@profiled
 def predict(req: PredictRequest):
     pw = 1 if req.park_within else 0
 
-    X = pd.DataFrame([{
-        "night_traffic": req.night_traffic,
-        "cctv_density": req.cctv_density,
-        "park_within": pw,
-        "commercial_density": req.commercial_density,
-        "residential_density": req.residential_density,
-        "existing_lx": req.existing_lx,
-    }])
+    values = [
+        req.night_traffic,
+        req.cctv_density,
+        pw,
+        req.commercial_density,
+        req.residential_density,
+        req.existing_lx,
+    ]
 
     try:
         model = load_model()
-        pred = float(model.predict(X)[0])
+        pred = None
+        if PREDICT_CACHE_SIZE > 0:
+            # 캐시를 쓸 때는 양자화한 입력으로 예측해서, 요청 순서와 상관없이 같은 key면 같은 결과
+            values = list(_predict_cache.key(values))
+            pred = _predict_cache.get(tuple(values), _model_version)
+        if pred is None:
+            X = pd.DataFrame([values], columns=FEATURES)
+            pred = float(model.predict(X)[0])
+            if PREDICT_CACHE_SIZE > 0:
+                _predict_cache.put(tuple(values), pred, _model_version)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"model prediction failed: {repr(e)}")
 
@@ -182,3 +359,149 @@ def predict(req: PredictRequest):
         duration_hours=3,
         reasons=reasons,
     )
+
+
+# =========================
+# Bulk (columnar) 예측
+# =========================
+def _bulk_error(detail) -> HTTPException:
+    return HTTPException(status_code=422, detail=detail)
+
+
+def parse_bulk_body(content_type: str, body: bytes) -> Dict[str, np.ndarray]:
+    """
+    요청 body -> feature별 1차원 배열.
+      - application/json: {"night_traffic": [...], ..., "existing_lx": [...]}
+      - Arrow IPC (stream/file): feature 이름의 컬럼을 가진 테이블
+      - application/octet-stream: little-endian float32, FEATURES 순서로 컬럼 하나씩 이어붙인 것
+    """
+    if content_type in (ARROW_STREAM, ARROW_FILE):
+        if pa is None:
+            raise HTTPException(status_code=415, detail="Arrow body requires pyarrow on the server")
+        try:
+            reader = pa.ipc.open_stream(body) if content_type == ARROW_STREAM else pa.ipc.open_file(body)
+            table = reader.read_all()
+        except pa.ArrowException as e:
+            raise _bulk_error(f"Invalid Arrow IPC body: {e}")
+        missing = [f for f in FEATURES if f not in table.column_names]
+        if missing:
+            raise _bulk_error(f"Missing feature columns: {missing}")
+        return {f: table.column(f).to_numpy().astype(float) for f in FEATURES}
+
+    if content_type == RAW_FLOAT32:
+        width = 4 * len(FEATURES)
+        if len(body) % width:
+            raise _bulk_error(f"Raw float32 body length must be a multiple of {width} bytes ({len(FEATURES)} columns)")
+        n = len(body) // width
+        arr = np.frombuffer(body, dtype="<f4").reshape(len(FEATURES), n).astype(float)
+        return {f: arr[i] for i, f in enumerate(FEATURES)}
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise _bulk_error("Body is not valid JSON")
+    if not isinstance(payload, dict):
+        raise _bulk_error("JSON body must be an object of feature arrays")
+    missing = [f for f in FEATURES if f not in payload]
+    if missing:
+        raise _bulk_error(f"Missing feature columns: {missing}")
+    try:
+        return {f: np.asarray(payload[f], dtype=float).reshape(-1) for f in FEATURES}
+    except (TypeError, ValueError):
+        raise _bulk_error("Feature arrays must contain only numbers")
+
+
+def validate_bulk(cols: Dict[str, np.ndarray]) -> int:
+    """길이/범위 검사 (벡터화). 행 수를 반환, 문제 있으면 422."""
+    lengths = {f: len(cols[f]) for f in FEATURES}
+    n = lengths[FEATURES[0]]
+    if len(set(lengths.values())) != 1:
+        raise _bulk_error(f"Feature arrays must have the same length: {lengths}")
+    if n == 0:
+        raise _bulk_error("No rows")
+    if n > BULK_MAX_ROWS:
+        raise _bulk_error(f"Too many rows: {n} (max {BULK_MAX_ROWS})")
+
+    errors = []
+    for f in FEATURES:
+        x = cols[f]
+        if f in UNIT_RANGE_FEATURES:
+            bad = ~((x >= 0.0) & (x <= 1.0))   # NaN도 여기서 걸림
+            rule = "must be within [0, 1]"
+        elif f == "park_within":
+            bad = ~((x == 0) | (x == 1))
+            rule = "must be 0 or 1"
+        else:
+            bad = ~np.isfinite(x)
+            rule = "must be a finite number"
+        if bad.any():
+            idx = np.flatnonzero(bad)
+            errors.append({"feature": f, "rule": rule, "count": int(idx.size), "rows": idx[:10].tolist()})
+    if errors:
+        raise _bulk_error(errors)
+    return n
+
+
+@profiled
+def score_bulk(cols: Dict[str, np.ndarray], include_reasons: bool = True) -> Dict[str, np.ndarray]:
+    """검증된 columnar 입력 전체를 모델 1회 호출로 예측. 결과도 columnar(배열)."""
+    X = pd.DataFrame({f: cols[f] for f in FEATURES})
+    X["park_within"] = X["park_within"].astype(int)
+
+    try:
+        model = load_model()
+        pred = np.asarray(model.predict(X), dtype=float)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"model prediction failed: {repr(e)}")
+
+    existing = cols["existing_lx"]
+    recommended, delta_percent = clamp_recommended(pred, existing)
+
+    out = {
+        "existing_lx": existing,
+        "recommended_lx": recommended,
+        "delta_percent": delta_percent,
+    }
+    if include_reasons:
+        codes = compute_reason_codes_top3(cols).astype(np.uint8)
+        for slot in range(3):
+            out[f"reason_{slot + 1}"] = codes[:, slot]
+    return out
+
+
+def reason_dictionary() -> List[Dict[str, str]]:
+    return [{"key": k, "direction": d, "label": label} for (k, d, label) in REASON_TABLE]
+
+
+@app.post("/predict/bulk")
+async def predict_bulk(request: Request, include_reasons: bool = True):
+    """
+    여러 feature 벡터를 한 번에 예측 (columnar 입력/출력).
+
+    입력: Content-Type에 따라 JSON / Arrow IPC / raw float32 (parse_bulk_body 참고)
+    출력: 기본은 columnar JSON. reason_1..3은 "reasons" 사전의 인덱스.
+          Accept가 Arrow stream이면 같은 컬럼의 Arrow IPC 스트림(사전은 schema metadata)으로 반환.
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+    body = await request.body()
+
+    cols = parse_bulk_body(content_type, body)
+    n = validate_bulk(cols)
+
+    # 모델 호출은 CPU 작업이라 이벤트 루프 밖(threadpool)에서
+    out = await run_in_threadpool(score_bulk, cols, include_reasons)
+
+    if ARROW_STREAM in request.headers.get("accept", "") and pa is not None:
+        table = pa.table(out).replace_schema_metadata({
+            "duration_hours": "3",
+            "reasons": json.dumps(reason_dictionary(), ensure_ascii=False),
+        })
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_STREAM)
+
+    content = {"n": n, "duration_hours": 3, **{k: v.tolist() for k, v in out.items()}}
+    if include_reasons:
+        content["reasons"] = reason_dictionary()
+    return JSONResponse(content=content)
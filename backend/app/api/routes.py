@@ -1,17 +1,113 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, PlainTextResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
-from data.grid_loader import get_grid_loader
-from core.predictor import predict_recommendation
+from core.config import (
+    DEFAULT_LAMP_WATT,
+    DEFAULT_DIM_HOURS,
+    WARMUP_RETRY_AFTER,
+    FEATURE_ORDER,
+    PATCH_MAX_GRIDS,
+    RECO_SMOOTHING_RADIUS,
+    ENGINES,
+    RECO_ENGINE,
+    ENSEMBLE_REVIEW_SPREAD_LX,
+)
+from core.events import get_event_broker
+from core.rules import RULE_WEIGHTS, DEFAULT_POLICY_WEIGHT, weights_for_policy
+from core.metrics import get_metrics, stage_timer
+from core.profiling import get_profile_store, is_admin, profiling_enabled
+from core.warmup import get_warmup
 
-router = APIRouter()
+# Modules that pull in pandas/joblib/LightGBM (data.*, core.predictor) are imported
+# inside the handlers so that importing the app stays fast (see core/warmup.py).
 
 
-@router.get("/health")
+def require_ready():
+    """Reject data requests with 503 until the model and data are loaded."""
+    warmup = get_warmup()
+    if not warmup.ready:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Warming up (step: {warmup.current_step()})",
+            headers={"Retry-After": str(WARMUP_RETRY_AFTER)},
+        )
+
+
+# Health, readiness, metrics and admin profiles answer immediately, even while warming up
+ops_router = APIRouter()
+router = APIRouter(dependencies=[Depends(require_ready)])
+
+
+class ScenarioRequest(BaseModel):
+    policy_weight: float = Field(default=DEFAULT_POLICY_WEIGHT, ge=0.0, le=100.0,
+                                 description="0 = keep bright, 50 = default rule, 100 = maximize savings")
+    weights: Optional[Dict[str, float]] = Field(default=None,
+                                                description="Rule weight overrides (keys of compute_rule_recommended)")
+    watt: float = Field(default=DEFAULT_LAMP_WATT, gt=0, description="Lamp wattage (W) of grids without streetlight inventory")
+    hours: float = Field(default=DEFAULT_DIM_HOURS, gt=0, le=24)
+    include_grids: bool = Field(default=True, description="Include per-grid columnar results")
+
+
+class GridPatch(BaseModel):
+    grid_id: str
+    features: Dict[str, float] = Field(..., description="Model features to overwrite (keys of FEATURE_ORDER)")
+
+
+class GridPatchRequest(BaseModel):
+    patches: List[GridPatch] = Field(..., min_length=1, max_length=PATCH_MAX_GRIDS)
+
+
+# Allowed range per patchable model feature
+PATCH_RANGES = {
+    "night_traffic": (0.0, 1.0),
+    "cctv_density": (0.0, 1.0),
+    "park_within": (0.0, 1.0),
+    "commercial_density": (0.0, 1.0),
+    "residential_density": (0.0, 1.0),
+    "existing_lx": (2.0, 1000.0),
+}
+
+
+@ops_router.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {"ok": True, "status": "healthy"}
 
 
+@ops_router.get("/health/live")
+async def liveness():
+    """Liveness: the process is up and serving (fails only if warm-up crashed)."""
+    warmup = get_warmup()
+    if warmup.failed:
+        return JSONResponse(status_code=503, content={"alive": False, **warmup.progress()})
+    return {"alive": True}
+
+
+@ops_router.get("/health/ready")
+async def readiness():
+    """
+    Readiness: 200 once the model, grid data and recommendation table are loaded,
+    503 with per-step loading progress before that.
+    """
+    progress = get_warmup().progress()
+    if not progress["ready"]:
+        return JSONResponse(status_code=503, content=progress,
+                            headers={"Retry-After": str(WARMUP_RETRY_AFTER)})
+    return progress
+
+
+@ops_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: request counters/latency per route, stage and load durations."""
+    return PlainTextResponse(
+        get_metrics().render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @router.get("/api/grids")
 async def get_grids(area: str = Query(default="seongsu", description="Area name (e.g., seongsu)")):
     """
@@ -20,27 +116,40 @@ async def get_grids(area: str = Query(default="seongsu", description="Area name
     Returns:
         List of grid objects with grid_id, centroid [lat, lon], and ntl_mean
     """
+    from data.grid_loader import get_grid_loader
+    
     try:
         grid_loader = get_grid_loader()
-        grids = grid_loader.get_grids_for_api(area=area)
-        return grids
+        with stage_timer("grid_list"):
+            grids = grid_loader.get_grids_for_api(area=area)
+        with stage_timer("serialization"):
+            return JSONResponse(content=jsonable_encoder(grids))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading grids: {str(e)}")
 
 
 @router.get("/api/reco")
-async def get_recommendation(grid_id: str = Query(..., description="Grid cell ID")):
+async def get_recommendation(
+    grid_id: str = Query(..., description="Grid cell ID"),
+    engine: str = Query(default=RECO_ENGINE, pattern=f"^({'|'.join(ENGINES)})$",
+                        description="lgbm (single model) or ensemble (all models + uncertainty)"),
+):
     """
     Get dimming recommendation for a specific grid cell.
     
     Returns:
         Recommendation object with grid_id, existing_lx, recommended_lx, delta_percent, and reasons
+        (plus engine and uncertainty for the ensemble engine)
     """
+    from data.grid_loader import get_grid_loader
+    from core.predictor import predict_recommendation
+    
     try:
         grid_loader = get_grid_loader()
         
         # Get features for this grid
-        features = grid_loader.get_grid_features(grid_id)
+        with stage_timer("feature_lookup"):
+            features = grid_loader.get_grid_features(grid_id)
         
         if features is None:
             raise HTTPException(
@@ -49,7 +158,11 @@ async def get_recommendation(grid_id: str = Query(..., description="Grid cell ID
             )
         
         # Generate recommendation
-        recommendation = predict_recommendation(grid_id, features)
+        if engine == "ensemble":
+            # Members run in the ensemble's own thread pool
+            recommendation = await run_in_threadpool(predict_recommendation, grid_id, features, engine)
+        else:
+            recommendation = predict_recommendation(grid_id, features)
         
         if recommendation is None:
             raise HTTPException(
@@ -57,9 +170,318 @@ async def get_recommendation(grid_id: str = Query(..., description="Grid cell ID
                 detail="Failed to generate recommendation"
             )
         
-        return recommendation
+        if RECO_SMOOTHING_RADIUS > 0 and engine == RECO_ENGINE:
+            # Smoothing depends on the neighbours, so the table holds the served value
+            from data.reco_table import get_reco_table
+            smoothed = get_reco_table().table_values(grid_loader.normalize_grid_id(grid_id))
+            if smoothed is not None:
+                recommendation.update(smoothed)
+        
+        with stage_timer("serialization"):
+            return JSONResponse(content=jsonable_encoder(recommendation))
     
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating recommendation: {str(e)}")
+
+
+@router.get("/api/reco/explain")
+async def explain_recommendation(grid_id: str = Query(..., description="Grid cell ID")):
+    """
+    Get the model's per-feature contributions (TreeSHAP, lux) for a grid cell.
+    
+    Served from the memory-mapped contribution cache, so this is a row lookup.
+    
+    Returns:
+        grid_id, bias, prediction, contributions per feature and the top 3 reasons
+    """
+    from core.contrib_cache import get_contrib_cache
+    from data.grid_loader import get_grid_loader
+    
+    canonical = get_grid_loader().normalize_grid_id(grid_id)
+    explanation = get_contrib_cache().explain(canonical) if canonical is not None else None
+    if explanation is None:
+        raise HTTPException(status_code=404, detail=f"Grid cell with ID '{grid_id}' not found")
+    return explanation
+
+
+@router.get("/api/savings")
+async def get_savings(
+    watt: float = Query(default=DEFAULT_LAMP_WATT, gt=0, description="Lamp wattage (W) of grids without streetlight inventory"),
+    hours: float = Query(default=DEFAULT_DIM_HOURS, gt=0, le=24, description="Dimming hours per night"),
+    area: Optional[str] = Query(default=None, description="Legal dong name from the region assignment (e.g., 성수동1가)"),
+    district: Optional[str] = Query(default=None, description="Gu name from the region assignment (e.g., 성동구)"),
+):
+    """
+    Get energy savings of the current recommendations for a watt/hours scenario.
+    
+    Returns:
+        Savings summary with grids, maintain_rate, avg_saving_percent, kwh_saved and by_district
+    """
+    from data.reco_table import get_reco_table
+    
+    try:
+        savings = get_reco_table().savings(watt, hours, area=area, district=district)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing savings: {str(e)}")
+    
+    if savings is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No grid cells found for area='{area}', district='{district}'"
+        )
+    
+    return savings
+
+
+@router.get("/api/regions/{code}/summary")
+async def get_region_summary(
+    code: str,
+    watt: float = Query(default=DEFAULT_LAMP_WATT, gt=0, description="Lamp wattage (W) of grids without streetlight inventory"),
+    hours: float = Query(default=DEFAULT_DIM_HOURS, gt=0, le=24, description="Dimming hours per night"),
+):
+    """
+    Get the precomputed recommendation/savings rollup of a gu or legal dong.
+    
+    Args:
+        code: 5 digit gu code (e.g., 11200) or 10 digit legal dong code (e.g., 1120011400)
+    
+    Returns:
+        Region names, grids, maintain_rate, average lux/delta/saving and kwh_saved
+        (plus its dongs for a gu)
+    """
+    from data.reco_table import get_reco_table
+    from data.regions import get_region_index, normalize_region_code
+    
+    parsed = normalize_region_code(code)
+    if parsed is not None and parsed[0] == "dong" and not get_region_index().has_assignment:
+        # Without the cell assignment every grid rolls up to the gu only
+        raise HTTPException(
+            status_code=503,
+            detail="Legal dong summaries need grid_regions_250m.csv (pipeline/make_region_assignment.py)"
+        )
+    
+    try:
+        summary = get_reco_table().region_summary(code, watt, hours)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing region summary: {str(e)}")
+    
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Unknown region code: {code}")
+    
+    return summary
+
+
+@router.get("/api/review")
+async def get_review_queue(
+    min_spread: float = Query(default=ENSEMBLE_REVIEW_SPREAD_LX, ge=0,
+                              description="Minimum ensemble member spread (lux std)"),
+    limit: int = Query(default=100, ge=1, le=10000),
+):
+    """
+    Get grid cells whose ensemble members disagree, most uncertain first.
+    
+    Returns:
+        engine, min_spread, grids_total, flagged and the flagged grids with
+        recommended_lx (ensemble mean), spread_lx and per-model predictions
+    """
+    from data.reco_table import get_reco_table
+    
+    try:
+        return await run_in_threadpool(get_reco_table().review_queue, min_spread, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building review queue: {str(e)}")
+
+
+@router.post("/api/scenario")
+async def run_scenario(req: ScenarioRequest):
+    """
+    What-if simulation: recompute rule-based recommendations and savings for every
+    grid with a policy weight and/or rule weight overrides.
+    
+    Returns:
+        Totals (grids, maintain_rate, avg_saving_percent, kwh_saved) and, if requested,
+        columnar per-grid arrays (grid_id, recommended_lx, delta_percent)
+    """
+    if req.weights:
+        unknown = sorted(set(req.weights) - set(RULE_WEIGHTS))
+        if unknown:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown rule weights: {unknown}. Allowed: {sorted(RULE_WEIGHTS)}"
+            )
+    
+    from data.reco_table import get_reco_table
+    
+    weights = weights_for_policy(req.policy_weight, base={**RULE_WEIGHTS, **(req.weights or {})})
+    
+    try:
+        result = get_reco_table().scenario(weights, req.watt, req.hours, include_grids=req.include_grids)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running scenario: {str(e)}")
+    
+    # Large columnar payload: skip jsonable_encoder, values are already plain floats/strings
+    return JSONResponse(content={"policy_weight": req.policy_weight, **result})
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check: "*" or any listed entity tag equal to etag (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    if "*" in tags:
+        return True
+    return _opaque_tag(etag) in {_opaque_tag(t) for t in tags}
+
+
+def _opaque_tag(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """True if Accept-Encoding allows gzip with a non-zero q-value (directly or via "*")."""
+    q_by_coding: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        q_by_coding[coding] = q
+    q = q_by_coding.get("gzip", q_by_coding.get("x-gzip", q_by_coding.get("*", 0.0)))
+    return q > 0
+
+
+@router.get("/api/reco/artifact")
+async def get_reco_artifact_binary(request: Request):
+    """
+    Get the batch recommendations (with live patches applied) as a compact binary artifact (columnar arrays,
+    reason codes + shared label dictionary). Supports ETag revalidation and gzip.
+    """
+    from data.reco_artifact import get_reco_artifact
+    
+    try:
+        etag, raw, gzipped_body = await run_in_threadpool(get_reco_artifact().snapshot)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building artifact: {str(e)}")
+    
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    gzipped = _accepts_gzip(request.headers.get("accept-encoding"))
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+    
+    return Response(
+        content=gzipped_body if gzipped else raw,
+        media_type="application/octet-stream",
+        headers=headers,
+    )
+
+
+@router.post("/api/grids/patch")
+async def patch_grids(req: GridPatchRequest, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Patch model features of individual grid cells (admin only), recompute just those
+    cells and push the new recommendations to map clients (GET /api/grids/stream).
+    
+    Returns:
+        Table revision and the updated recommendations (same shape as /api/reco)
+    """
+    from data.grid_loader import get_grid_loader
+    from data.reco_table import get_reco_table
+    
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    
+    grid_loader = get_grid_loader()
+    patches: Dict[str, Dict[str, float]] = {}
+    errors = []
+    for patch in req.patches:
+        grid_id = grid_loader.normalize_grid_id(patch.grid_id)
+        if grid_id is None:
+            errors.append(f"Unknown grid_id '{patch.grid_id}'")
+            continue
+        for key, value in patch.features.items():
+            if key not in PATCH_RANGES:
+                errors.append(f"{patch.grid_id}: unknown feature '{key}' (allowed: {FEATURE_ORDER})")
+            elif not PATCH_RANGES[key][0] <= value <= PATCH_RANGES[key][1]:
+                errors.append(f"{patch.grid_id}: {key}={value} out of range {PATCH_RANGES[key]}")
+        values = dict(patch.features)
+        if "park_within" in values:
+            values["park_within"] = int(round(values["park_within"]))
+        patches[grid_id] = {**patches.get(grid_id, {}), **values}
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    
+    table = get_reco_table()
+    try:
+        updates = await run_in_threadpool(table.apply_patches, patches)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error applying patches: {str(e)}")
+    
+    event_id = get_event_broker().publish("grid_update", {"revision": table.revision, "grids": updates})
+    return {"revision": table.revision, "event_id": event_id, "updated": len(updates), "grids": updates}
+
+
+@router.get("/api/grids/stream")
+async def stream_grid_updates(
+    last_event_id: Optional[str] = Header(default=None),
+):
+    """
+    Server-Sent Events stream of recommendation changes.
+    
+    Events:
+        grid_update  {"revision", "grids": [recommendation, ...]} for patched grid cells
+        resync       the client missed events and should reload the full grid set
+    """
+    try:
+        since = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        since = None
+    if since is not None and since < 0:
+        raise HTTPException(status_code=400, detail="Last-Event-ID must be a non-negative event id")
+    return StreamingResponse(
+        get_event_broker().stream(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _require_admin(token: Optional[str]):
+    if not profiling_enabled():
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not is_admin(token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@ops_router.get("/api/profiles")
+async def list_profiles(x_admin_token: Optional[str] = Header(default=None)):
+    """List recent request profiles (admin only)."""
+    _require_admin(x_admin_token)
+    return get_profile_store().list()
+
+
+@ops_router.get("/api/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Get the timing breakdown of a profiled request (admin only).
+    
+    Returns:
+        Profile with total_seconds and, per profiled function, a call tree with cumulative times
+    """
+    _require_admin(x_admin_token)
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return profile
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Project root and directories
@@ -9,20 +10,80 @@ APP_DIR = ROOT / "backend" / "app"
 # Model file
 MODEL_FILE = MODELS_DIR / "lgbm_reco.pkl"
 
+# Ensemble engine: the three models saved by pipeline/train_models.py, evaluated concurrently
+ENSEMBLE_MODEL_FILES = {
+    "lgbm": MODEL_FILE,
+    "elastic": MODELS_DIR / "elastic_reco.pkl",
+    "mlp": MODELS_DIR / "mlp_reco.pkl",
+}
+ENGINES = ("lgbm", "ensemble")
+RECO_ENGINE = os.environ.get("DIMMING_ENGINE", "lgbm")  # Engine of the recommendation table
+ENSEMBLE_REVIEW_SPREAD_LX = 5.0  # Member std (lux) above which a grid is flagged for manual review
+
 # Data files
 GRID_FEATURES_FILE = PROCESSED_DIR / "grid_features_final_seoungsu.csv"
 NTL_GRID_FILE = PROCESSED_DIR / "seoul_ntl_2025_grid_points_250m.csv"
+RECO_OUTPUT_FILE = MODELS_DIR / "recommend_model" / "recommend_output.csv"  # predict.py batch output
+REGION_CODES_FILE = PROCESSED_DIR / "seoul_eupmyeondong_codes.csv"
+GRID_REGIONS_FILE = PROCESSED_DIR / "grid_regions_250m.csv"  # pipeline/make_region_assignment.py output
+STREETLIGHT_GRID_FILE = PROCESSED_DIR / "streetlight_grid_250m.csv"  # pipeline/make_streetlight_inventory.py output
+
+# Per-grid TreeSHAP contribution cache (memory-mapped float32, keyed by model version + feature hash)
+CONTRIB_CACHE_DIR = MODELS_DIR / "contrib_cache"
+CONTRIB_BLOCK_ROWS = 20_000   # Rows per pred_contrib call while building
+CONTRIB_CACHE_KEEP = 2        # Cache files kept on disk (older keys are removed)
 
 # Default values for missing features
 DEFAULT_COMMERCIAL_DENSITY = 0.5
 DEFAULT_RESIDENTIAL_DENSITY = 0.5
-DEFAULT_EXISTING_LUX = 100  # Default baseline illuminance
+DEFAULT_EXISTING_LUX = 100  # Baseline illuminance of grids in neither the streetlight inventory nor the batch output
+
+# Gu of the loaded grid cells when no region assignment file is loaded
+GRID_DISTRICT = "성동구"
+REGION_MATCH_MAX_M = 250  # Max distance from a grid centroid to its assigned 250m cell
+
+# Savings assumptions (same defaults as pipeline/report_savings.py);
+# the wattage only applies to grids without streetlight inventory
+DEFAULT_LAMP_WATT = 100
+DEFAULT_DIM_HOURS = 3
+SAVINGS_CACHE_SIZE = 256
+SCENARIO_CACHE_SIZE = 128
+
+# Optional spatial smoothing of the recommendation table (core/grid_topology.py):
+# each grid's dimming ratio is blended with the mean of its (2r+1)^2 neighbourhood
+RECO_SMOOTHING_RADIUS = int(os.environ.get("DIMMING_SMOOTHING_RADIUS", "0"))  # cells, 0 = off
+RECO_SMOOTHING_STRENGTH = float(os.environ.get("DIMMING_SMOOTHING_STRENGTH", "0.5"))  # 0..1
+
+# Opt-in request profiling (disabled unless an admin token is set)
+PROFILE_ADMIN_TOKEN = os.environ.get("DIMMING_ADMIN_TOKEN", "")
+PROFILE_KEEP = 50            # Number of recent profiles kept in memory
+PROFILE_TREE_DEPTH = 8       # Max call tree depth in a profile
+PROFILE_MIN_FRACTION = 0.01  # Hide subtrees under 1% of the root's cumulative time
+
+# Fast start: accept traffic (liveness/readiness) right away and load model/data in the background
+FAST_START = os.environ.get("DIMMING_FAST_START", "") == "1"
+WARMUP_RETRY_AFTER = 1  # Retry-After (seconds) for data requests while warming up
+
+# Live grid updates (per-grid feature patches pushed over Server-Sent Events)
+EVENT_HISTORY = 1000          # Recent events kept for Last-Event-ID replay
+EVENT_QUEUE_SIZE = 256        # Per-client backlog before the client is told to resync
+SSE_HEARTBEAT_SECONDS = 15
+PATCH_MAX_GRIDS = 1000        # Grid patches accepted per request
 
 # Seongsu-dong center (for grid generation)
 SEONGSU_CENTER_LAT = 37.544
 SEONGSU_CENTER_LON = 127.056
 
 # Feature configuration
+FEATURE_ORDER = [
+    "night_traffic",
+    "cctv_density",
+    "park_within",
+    "commercial_density",
+    "residential_density",
+    "existing_lx",
+]
+
 REASON_LABELS = {
     "night_traffic": "야간 교통량",
     "cctv_density": "CCTV 밀집도",
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List, Optional
+from core.config import (
+    CONTRIB_BLOCK_ROWS,
+    CONTRIB_CACHE_DIR,
+    CONTRIB_CACHE_KEEP,
+    FEATURE_ORDER,
+    REASON_LABELS,
+)
+from core.metrics import load_timer, stage_timer
+from core.model_loader import get_model, model_version
+
+# Keys left out of the top reasons (same rule as predict.py EXCLUDE_REASON_KEYS)
+EXCLUDE_REASON_KEYS = {"existing_lx"}
+
+
+def features_hash(features: pd.DataFrame) -> str:
+    """Hash of the grid ids and FEATURE_ORDER values (row order matters)."""
+    h = hashlib.sha1()
+    h.update("\n".join(map(str, features.index)).encode("utf-8"))
+    h.update(np.ascontiguousarray(features[FEATURE_ORDER].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+def _booster(model):
+    if hasattr(model, "booster_") and model.booster_ is not None:
+        return model.booster_
+    return model
+
+
+class ContribCache:
+    """
+    Per-grid TreeSHAP contributions, persisted as a memory-mapped float32 matrix.
+
+    The matrix is (grids, features + 1), the last column is the bias. Files are
+    named after sha1(model version, feature hash), so a new model or changed
+    grid features build a new file and an unchanged restart just maps the old
+    one. Explanations are then a row slice instead of a TreeSHAP pass.
+    Patched grids are recomputed into the copy-on-write mapping (memory only).
+    """
+
+    def __init__(self, cache_dir: Path = CONTRIB_CACHE_DIR):
+        self._dir = Path(cache_dir)
+        self._matrix: Optional[np.ndarray] = None
+        self._row_of: Dict[str, int] = {}
+        self._key: Optional[str] = None
+        self._lock = threading.Lock()
+        self.built = False  # True if the last load had to run TreeSHAP
+
+    @property
+    def key(self) -> Optional[str]:
+        return self._key
+
+    def load(self, features: pd.DataFrame) -> np.ndarray:
+        """Map the cache for these features and the current model (build it on a miss)."""
+        version = model_version()
+        key = hashlib.sha1(f"{version}:{features_hash(features)}".encode("utf-8")).hexdigest()[:20]
+        with self._lock:
+            if self._key == key:
+                return self._matrix
+            data_path, meta_path = self._paths(key)
+            shape = (len(features), len(FEATURE_ORDER) + 1)
+            with load_timer("contrib_cache"):
+                self.built = not (data_path.exists() and meta_path.exists())
+                if self.built:
+                    self._build(features, data_path, meta_path, version, shape)
+                # Copy-on-write: patch updates stay in memory, the file is never modified
+                self._matrix = np.memmap(data_path, dtype=np.float32, mode="c", shape=shape)
+            self._row_of = {str(g): i for i, g in enumerate(features.index)}
+            self._key = key
+            print(f"Contribution cache {'built' if self.built else 'mapped'}: {data_path.name} {shape}")
+            return self._matrix
+
+    def _paths(self, key: str):
+        return self._dir / f"contrib_{key}.f32", self._dir / f"contrib_{key}.json"
+
+    def _build(self, features: pd.DataFrame, data_path: Path, meta_path: Path, version: str, shape):
+        self._dir.mkdir(parents=True, exist_ok=True)
+        booster = _booster(get_model())
+        X = features[FEATURE_ORDER]
+        start = time.perf_counter()
+
+        # Write to a temp file and rename, so a crash never leaves a half-built cache
+        tmp_path = data_path.with_suffix(".tmp")
+        out = np.memmap(tmp_path, dtype=np.float32, mode="w+", shape=shape)
+        for lo in range(0, len(X), CONTRIB_BLOCK_ROWS):
+            block = X.iloc[lo:lo + CONTRIB_BLOCK_ROWS]
+            out[lo:lo + len(block)] = np.asarray(booster.predict(block, pred_contrib=True), dtype=np.float32)
+        out.flush()
+        del out
+        os.replace(tmp_path, data_path)
+
+        meta = {
+            "model_version": version,
+            "features_hash": features_hash(features),
+            "rows": shape[0],
+            "columns": FEATURE_ORDER + ["bias"],
+            "dtype": "float32",
+            "build_seconds": round(time.perf_counter() - start, 4),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        self._prune(keep=data_path)
+
+    def _prune(self, keep: Path):
+        """Remove all but the newest CONTRIB_CACHE_KEEP cache files."""
+        files = sorted(self._dir.glob("contrib_*.f32"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in [p for p in files if p != keep][max(CONTRIB_CACHE_KEEP - 1, 0):]:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+
+    def update_rows(self, features: pd.DataFrame):
+        """Recompute the contributions of patched grids (rows of `features`) in memory."""
+        if self._matrix is None:
+            return
+        rows = [self._row_of[g] for g in features.index if g in self._row_of]
+        if not rows:
+            return
+        contrib = _booster(get_model()).predict(features[FEATURE_ORDER], pred_contrib=True)
+        with self._lock:
+            self._matrix[rows] = np.asarray(contrib, dtype=np.float32)
+
+    def contributions(self, grid_id: str) -> Optional[np.ndarray]:
+        """Contribution row of a grid (features + bias), or None if unknown/not loaded."""
+        row = self._row_of.get(grid_id)
+        if self._matrix is None or row is None:
+            return None
+        return self._matrix[row]
+
+    def explain(self, grid_id: str, top: int = 3) -> Optional[Dict]:
+        """Per-feature contributions (lux) and the top reasons of one grid."""
+        with stage_timer("contrib_lookup"):
+            row = self.contributions(grid_id)
+        if row is None:
+            return None
+        contrib = {name: round(float(v), 4) for name, v in zip(FEATURE_ORDER, row[:-1])}
+        order = np.argsort(-np.abs(row[:-1]), kind="stable")
+        reasons: List[Dict] = []
+        for j in order:
+            key = FEATURE_ORDER[j]
+            if key in EXCLUDE_REASON_KEYS:
+                continue
+            reasons.append({
+                "key": key,
+                "label": REASON_LABELS.get(key, key),
+                "direction": "UP" if row[j] > 0 else "DOWN",
+            })
+            if len(reasons) == top:
+                break
+        return {
+            "grid_id": grid_id,
+            "bias": round(float(row[-1]), 4),
+            "prediction": round(float(row.sum()), 4),
+            "contributions": contrib,
+            "reasons": reasons,
+            "cache_key": self._key,
+        }
+
+
+# Global instance
+_contrib_cache = ContribCache()
+
+def get_contrib_cache() -> ContribCache:
+    """Get the global contribution cache."""
+    return _contrib_cache
@@ -0,0 +1,102 @@
+import threading
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from core.config import ENSEMBLE_MODEL_FILES, ENSEMBLE_REVIEW_SPREAD_LX, FEATURE_ORDER
+from core.metrics import get_metrics, load_timer, stage_timer
+from core.model_loader import get_model
+
+
+class EnsembleEngine:
+    """
+    Runs the LightGBM, ElasticNet and MLP models saved by train_models.py side by side.
+
+    Each member predicts the whole batch in its own worker thread (LightGBM and
+    the numpy/BLAS work of the sklearn pipelines release the GIL), so a batch
+    costs roughly the slowest member rather than the sum. The ensemble value is
+    the mean of the clamped member predictions; their standard deviation is
+    returned as a disagreement (uncertainty) signal.
+    """
+
+    def __init__(self, model_files: Dict[str, object] = ENSEMBLE_MODEL_FILES):
+        self._model_files = model_files
+        self._models: Optional[Dict[str, object]] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, object]:
+        """Load every member once (LightGBM is shared with the single-model engine)."""
+        if self._models is None:
+            with self._lock:
+                if self._models is None:
+                    models = {}
+                    with load_timer("ensemble"):
+                        for name, path in self._model_files.items():
+                            if name == "lgbm":
+                                models[name] = get_model()
+                                continue
+                            print(f"Loading ensemble member {name} from {path}...")
+                            models[name] = joblib.load(path)
+                    self._pool = ThreadPoolExecutor(max_workers=len(models), thread_name_prefix="ensemble")
+                    self._models = models
+                    print(f"Ensemble loaded: {', '.join(models)}")
+        return self._models
+
+    @property
+    def members(self):
+        return list(self.load())
+
+    def _predict_member(self, name: str, model, X: pd.DataFrame) -> np.ndarray:
+        start = time.perf_counter()
+        pred = np.asarray(model.predict(X), dtype=float)
+        get_metrics().model_seconds.observe(time.perf_counter() - start, engine="ensemble", model=name)
+        return pred
+
+    def predict(self, features: pd.DataFrame) -> pd.DataFrame:
+        """
+        Predict a batch with every member concurrently.
+
+        Args:
+            features: DataFrame with FEATURE_ORDER columns (one row per grid)
+
+        Returns:
+            DataFrame (same index) with existing_lx, recommended_lx (ensemble mean),
+            delta_percent, spread_lx, needs_review and one <member>_lx column per model
+        """
+        models = self.load()
+        X = features[FEATURE_ORDER]
+        existing_lx = X["existing_lx"].to_numpy(dtype=float)
+
+        start = time.perf_counter()
+        with stage_timer("model_predict_ensemble"):
+            futures = {name: self._pool.submit(self._predict_member, name, model, X)
+                       for name, model in models.items()}
+            # Same clamping as predict_batch, per member: <= existing, >= 2 lux
+            preds = {name: np.maximum(np.minimum(f.result(), existing_lx), 2.0) for name, f in futures.items()}
+        get_metrics().model_seconds.observe(time.perf_counter() - start, engine="ensemble", model="all")
+
+        stacked = np.vstack(list(preds.values()))
+        recommended_lx = stacked.mean(axis=0)
+        spread_lx = stacked.std(axis=0)
+
+        out = pd.DataFrame({
+            "existing_lx": existing_lx,
+            "recommended_lx": recommended_lx,
+            "delta_percent": (recommended_lx - existing_lx) / existing_lx * 100.0,
+            "spread_lx": spread_lx,
+            "needs_review": spread_lx > ENSEMBLE_REVIEW_SPREAD_LX,
+        }, index=features.index)
+        for name, pred in preds.items():
+            out[f"{name}_lx"] = pred
+        return out
+
+
+# Global instance
+_ensemble = EnsembleEngine()
+
+def get_ensemble() -> EnsembleEngine:
+    """Get the global ensemble engine."""
+    return _ensemble
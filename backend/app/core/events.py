@@ -0,0 +1,95 @@
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import AsyncIterator, Dict, Optional, Set
+from core.config import EVENT_HISTORY, EVENT_QUEUE_SIZE, SSE_HEARTBEAT_SECONDS
+
+
+class EventBroker:
+    """
+    In-process pub/sub for Server-Sent Events.
+
+    Every event gets an increasing id and is kept in a short history, so a client
+    that reconnects with Last-Event-ID receives what it missed. A client that is
+    too far behind (or too slow to drain its queue) gets a "resync" event and
+    should reload the full grid set.
+    """
+
+    def __init__(self, history: int = EVENT_HISTORY, queue_size: int = EVENT_QUEUE_SIZE):
+        self._history = deque(maxlen=history)
+        self._queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: Dict) -> int:
+        """Publish an event to every subscriber (call from the event loop thread)."""
+        with self._lock:
+            self._last_id += 1
+            event = (self._last_id, event_type, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+            self._history.append(event)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog and ask it to reload everything
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait((event[0], "resync", "{}"))
+        return event[0]
+
+    def _missed(self, last_event_id: int):
+        with self._lock:
+            if last_event_id > self._last_id:
+                return None  # Ids from before a server restart
+            if last_event_id == self._last_id:
+                return []
+            if not self._history or last_event_id < self._history[0][0] - 1:
+                return None  # Fell out of the history (or nothing published yet)
+            return [e for e in self._history if e[0] > last_event_id]
+
+    async def stream(self, last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+        """SSE-formatted stream for one client (with periodic heartbeat comments)."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.add(queue)
+        sent = 0  # Highest event id already sent (replayed events may also be queued)
+        try:
+            yield "retry: 3000\n\n"
+            if last_event_id is not None:
+                missed = self._missed(last_event_id)
+                if missed is None:
+                    yield _format((self._last_id, "resync", "{}"))
+                else:
+                    for event in missed:
+                        yield _format(event)
+                        sent = event[0]
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if event[1] != "resync" and event[0] <= sent:
+                    continue
+                sent = event[0]
+                yield _format(event)
+        finally:
+            self._subscribers.discard(queue)
+
+
+def _format(event) -> str:
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+
+
+# Global instance
+_event_broker = EventBroker()
+
+def get_event_broker() -> EventBroker:
+    """Get the global event broker."""
+    return _event_broker
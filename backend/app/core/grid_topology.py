@@ -0,0 +1,159 @@
+import numpy as np
+from typing import List, Optional, Tuple
+
+# NTL 250m grid ids (seoul_ntl_2025_grid_points_250m.csv) are col * 10^7 + row, where
+# (col, row) index 250m cells of the Web Mercator (EPSG:3857) plane from the origin.
+# The point file's lat/lon are exactly the cell centers, e.g.
+# 565100017994 -> col 56510, row 17994 -> (37.42580, 126.91061).
+CELL_M = 250.0
+ROW_BASE = 10 ** 7
+EARTH_RADIUS_M = 6378137.0  # EPSG:3857 sphere
+
+NEIGHBOURS_4 = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+NEIGHBOURS_8 = NEIGHBOURS_4 + [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+def is_lattice_id(grid_id) -> np.ndarray:
+    """True for ids in the NTL encoding (12 digits, row below 10^7)."""
+    ids = np.asarray(grid_id, dtype=np.int64)
+    return (ids >= ROW_BASE * 10 ** 4) & (ids < ROW_BASE * 10 ** 5)
+
+
+def decode_grid_id(grid_id) -> Tuple[np.ndarray, np.ndarray]:
+    """Grid id(s) -> (row, col). Works on scalars and arrays, no lookup table."""
+    ids = np.asarray(grid_id, dtype=np.int64)
+    return ids % ROW_BASE, ids // ROW_BASE
+
+
+def encode_grid_id(row, col) -> np.ndarray:
+    """(row, col) -> grid id(s)."""
+    return np.asarray(col, dtype=np.int64) * ROW_BASE + np.asarray(row, dtype=np.int64)
+
+
+def cell_center(row, col) -> Tuple[np.ndarray, np.ndarray]:
+    """(row, col) -> center (lat, lon) in degrees."""
+    x = (np.asarray(col, dtype=float) + 0.5) * CELL_M / EARTH_RADIUS_M
+    y = (np.asarray(row, dtype=float) + 0.5) * CELL_M / EARTH_RADIUS_M
+    return np.degrees(np.arctan(np.sinh(y))), np.degrees(x)
+
+
+def cell_of(lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+    """(lat, lon) in degrees -> (row, col) of the cell containing the point."""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    x = np.radians(np.asarray(lon, dtype=float)) * EARTH_RADIUS_M
+    y = np.log(np.tan(np.pi / 4 + lat / 2)) * EARTH_RADIUS_M
+    return np.floor(y / CELL_M).astype(np.int64), np.floor(x / CELL_M).astype(np.int64)
+
+
+def neighbour_ids(grid_id: int, diagonal: bool = True) -> List[int]:
+    """Ids of the 4 or 8 surrounding cells (whether or not they exist in a dataset)."""
+    row, col = decode_grid_id(grid_id)
+    offsets = NEIGHBOURS_8 if diagonal else NEIGHBOURS_4
+    return [int(encode_grid_id(row + dr, col + dc)) for dr, dc in offsets]
+
+
+class GridRaster:
+    """
+    Dense 2-D layout of a set of lattice cells.
+
+    Cell i of the input sits at raster[rows[i] - row0, cols[i] - col0]; cells
+    absent from the input are holes. Positions are resolved arithmetically, so
+    neighbour lookups are O(1) and values map to/from the raster with one
+    fancy-indexing step.
+    """
+
+    def __init__(self, rows: np.ndarray, cols: np.ndarray):
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        self.row0 = int(rows.min()) if len(rows) else 0
+        self.col0 = int(cols.min()) if len(cols) else 0
+        self.shape = (
+            int(rows.max()) - self.row0 + 1 if len(rows) else 0,
+            int(cols.max()) - self.col0 + 1 if len(cols) else 0,
+        )
+        self.r = rows - self.row0
+        self.c = cols - self.col0
+        # Raster cell -> input position (-1 = hole)
+        self.position = np.full(self.shape, -1, dtype=np.int64)
+        self.position[self.r, self.c] = np.arange(len(rows))
+
+    @classmethod
+    def from_ids(cls, grid_ids) -> "GridRaster":
+        rows, cols = decode_grid_id(grid_ids)
+        return cls(rows, cols)
+
+    def __len__(self):
+        return len(self.r)
+
+    @property
+    def mask(self) -> np.ndarray:
+        """True where the raster has a cell."""
+        return self.position >= 0
+
+    def to_raster(self, values, fill: float = np.nan) -> np.ndarray:
+        """Per-cell values (input order) -> 2-D array with `fill` in the holes."""
+        raster = np.full(self.shape, fill, dtype=float)
+        raster[self.r, self.c] = values
+        return raster
+
+    def from_raster(self, raster: np.ndarray) -> np.ndarray:
+        """2-D array -> per-cell values in input order."""
+        return raster[self.r, self.c]
+
+    def neighbours(self, i: int, diagonal: bool = True) -> List[int]:
+        """Input positions of the existing neighbours of cell i."""
+        h, w = self.shape
+        out = []
+        for dr, dc in NEIGHBOURS_8 if diagonal else NEIGHBOURS_4:
+            r, c = self.r[i] + dr, self.c[i] + dc
+            if 0 <= r < h and 0 <= c < w and self.position[r, c] >= 0:
+                out.append(int(self.position[r, c]))
+        return out
+
+
+def _box_sum(raster: np.ndarray, radius: int) -> np.ndarray:
+    """Sum over the (2r+1)^2 window around every cell (summed-area table, any radius in O(cells))."""
+    h, w = raster.shape
+    sat = np.zeros((h + 1, w + 1))
+    sat[1:, 1:] = raster.cumsum(axis=0).cumsum(axis=1)
+    r0 = np.clip(np.arange(h) - radius, 0, h)
+    r1 = np.clip(np.arange(h) + radius + 1, 0, h)
+    c0 = np.clip(np.arange(w) - radius, 0, w)
+    c1 = np.clip(np.arange(w) + radius + 1, 0, w)
+    return sat[r1][:, c1] - sat[r0][:, c1] - sat[r1][:, c0] + sat[r0][:, c0]
+
+
+def smooth_values(
+    raster: GridRaster,
+    values,
+    radius: int = 1,
+    strength: float = 0.5,
+    weights: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Blend every cell with the (weighted) mean of its (2*radius+1)^2 neighbourhood.
+
+    Holes and NaN values are left out of the mean (normalized convolution), so
+    cells on the edge of the data are not pulled towards zero.
+
+    Args:
+        raster: Layout of the cells
+        values: Per-cell values in raster input order
+        radius: Neighbourhood radius in cells (0 disables smoothing)
+        strength: 0 = unchanged, 1 = neighbourhood mean only
+        weights: Optional per-cell weights of the mean (e.g. lamp counts)
+
+    Returns:
+        Smoothed per-cell values (input order)
+    """
+    values = np.asarray(values, dtype=float)
+    if radius <= 0 or strength <= 0 or not len(values):
+        return values.copy()
+
+    w = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+    w = np.where(np.isnan(values), 0.0, w)
+    num = _box_sum(raster.to_raster(np.nan_to_num(values) * w, fill=0.0), radius)
+    den = _box_sum(raster.to_raster(w, fill=0.0), radius)
+    mean = raster.from_raster(num) / np.maximum(raster.from_raster(den), 1e-12)
+    mean = np.where(raster.from_raster(den) > 0, mean, values)
+    return (1.0 - strength) * values + strength * mean
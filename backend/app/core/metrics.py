@@ -0,0 +1,157 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Latency buckets in seconds (Prometheus histogram "le" bounds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = key + extra
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in items)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_fmt(value)}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = float(value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_fmt(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[i] += 1
+            self._sums[key] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key in sorted(self._counts):
+                counts = self._counts[key]
+                cumulative = 0
+                for bound, c in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += c
+                    le = (("le", _fmt(bound)),)
+                    lines.append(f"{self.name}_bucket{_format_labels(key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_fmt(self._sums[key])}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Minimal in-process metrics registry rendered in Prometheus text format."""
+
+    def __init__(self):
+        self.requests_total = Counter(
+            "http_requests_total", "HTTP requests by route, method and status code.")
+        self.request_seconds = Histogram(
+            "http_request_duration_seconds", "HTTP request latency by route and method.")
+        self.stage_seconds = Histogram(
+            "stage_duration_seconds", "Latency of internal request stages.")
+        self.model_seconds = Histogram(
+            "model_predict_duration_seconds", "Model prediction latency by engine and model.")
+        self.load_seconds = Gauge(
+            "load_duration_seconds", "Duration of the last model/data load.")
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (self.requests_total, self.request_seconds, self.stage_seconds, self.model_seconds,
+                       self.load_seconds):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global instance
+_metrics = MetricsRegistry()
+
+def get_metrics() -> MetricsRegistry:
+    """Get the global metrics registry."""
+    return _metrics
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time an internal stage (feature_lookup, model_predict, reasons, serialization, ...)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _metrics.stage_seconds.observe(time.perf_counter() - start, stage=stage)
+
+
+@contextmanager
+def load_timer(target: str):
+    """Record how long a model/data load took."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _metrics.load_seconds.set(time.perf_counter() - start, target=target)
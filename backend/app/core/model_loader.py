@@ -2,6 +2,7 @@ import joblib
 from pathlib import Path
 from typing import Optional
 from core.config import MODEL_FILE
+from core.metrics import load_timer
 
 
 class ModelLoader:
@@ -20,7 +21,8 @@ class ModelLoader:
         if self._model is None:
             print(f"Loading model from {MODEL_FILE}...")
             try:
-                self._model = joblib.load(MODEL_FILE)
+                with load_timer("model"):
+                    self._model = joblib.load(MODEL_FILE)
                 print(f"Model loaded successfully: {type(self._model)}")
             except Exception as e:
                 print(f"Error loading model: {e}")
@@ -39,3 +41,9 @@ _model_loader = ModelLoader()
 def get_model():
     """Get the global model instance."""
     return _model_loader.model
+
+
+def model_version() -> str:
+    """Version of the model file (mtime/size, same format as app/api.py)."""
+    st = MODEL_FILE.stat()
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
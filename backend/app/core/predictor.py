@@ -1,11 +1,15 @@
+import time
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional
 from core.model_loader import get_model
-from core.config import REASON_LABELS
+from core.config import REASON_LABELS, FEATURE_ORDER
+from core.metrics import get_metrics, stage_timer
+from core.profiling import profiled
 
 
-def predict_recommendation(grid_id: str, features: Dict[str, float]) -> Optional[Dict]:
+@profiled
+def predict_recommendation(grid_id: str, features: Dict[str, float], engine: str = "lgbm") -> Optional[Dict]:
     """
     Generate recommendation for a grid cell using the ML model.
     
@@ -13,6 +17,7 @@ def predict_recommendation(grid_id: str, features: Dict[str, float]) -> Optional
         grid_id: Grid cell identifier
         features: Dictionary with keys: night_traffic, cctv_density, park_within,
                   commercial_density, residential_density, existing_lx
+        engine: "lgbm" (single model) or "ensemble" (mean of all models, adds "uncertainty")
     
     Returns:
         Dictionary matching frontend API contract with keys:
@@ -21,41 +26,47 @@ def predict_recommendation(grid_id: str, features: Dict[str, float]) -> Optional
         - recommended_lx
         - delta_percent
         - reasons (Top 3)
+        - uncertainty (ensemble engine only): spread_lx, needs_review, members
     """
     if not features:
         return None
     
-    # Get model
-    model = get_model()
-    
     # Prepare features in correct order for model
-    feature_order = [
-        "night_traffic",
-        "cctv_density",
-        "park_within",
-        "commercial_density",
-        "residential_density",
-        "existing_lx"
-    ]
-    
-    X = pd.DataFrame([[features[key] for key in feature_order]], columns=feature_order)
+    X = pd.DataFrame([[features[key] for key in FEATURE_ORDER]], columns=FEATURE_ORDER)
     
     # Predict
     try:
-        recommended_lx_pred = model.predict(X)[0]
-        
-        # Clamp to reasonable range (don't exceed existing)
         existing_lx = features["existing_lx"]
-        recommended_lx = min(float(recommended_lx_pred), existing_lx)
-        recommended_lx = max(recommended_lx, 2.0)  # Minimum 2 lux
+        uncertainty = None
+        
+        if engine == "ensemble":
+            from core.ensemble import get_ensemble
+            row = get_ensemble().predict(X).iloc[0]
+            recommended_lx = float(row["recommended_lx"])
+            uncertainty = {
+                "spread_lx": round(float(row["spread_lx"]), 2),
+                "needs_review": bool(row["needs_review"]),
+                "members": {name: round(float(row[f"{name}_lx"]), 1) for name in get_ensemble().members},
+            }
+        else:
+            model = get_model()
+            start = time.perf_counter()
+            with stage_timer("model_predict"):
+                recommended_lx_pred = model.predict(X)[0]
+            get_metrics().model_seconds.observe(time.perf_counter() - start, engine="lgbm", model="lgbm")
+            
+            # Clamp to reasonable range (don't exceed existing)
+            recommended_lx = min(float(recommended_lx_pred), existing_lx)
+            recommended_lx = max(recommended_lx, 2.0)  # Minimum 2 lux
         
         # Calculate delta
         delta_percent = ((recommended_lx - existing_lx) / existing_lx) * 100.0
         
         # Generate reasons based on feature values
-        reasons = generate_reasons(features)
+        with stage_timer("reasons"):
+            reasons = generate_reasons(features)
         
-        return {
+        result = {
             "grid_id": grid_id,
             "existing_lx": round(existing_lx, 1),
             "recommended_lx": round(recommended_lx, 1),
@@ -63,12 +74,52 @@ def predict_recommendation(grid_id: str, features: Dict[str, float]) -> Optional
             "duration_hours": 3,
             "reasons": reasons[:3]  # Top 3 only
         }
+        if uncertainty is not None:
+            result["engine"] = engine
+            result["uncertainty"] = uncertainty
+        return result
     
     except Exception as e:
         print(f"Error predicting for grid {grid_id}: {e}")
         return None
 
 
+def predict_batch(features_df: pd.DataFrame, engine: str = "lgbm") -> pd.DataFrame:
+    """
+    Vectorized counterpart of predict_recommendation for many grid cells.
+    
+    Args:
+        features_df: DataFrame with FEATURE_ORDER columns (one row per grid)
+        engine: "lgbm" or "ensemble"
+    
+    Returns:
+        DataFrame (same index) with existing_lx, recommended_lx, delta_percent
+        (the ensemble engine adds spread_lx, needs_review and per-model columns)
+    """
+    if engine == "ensemble":
+        from core.ensemble import get_ensemble
+        return get_ensemble().predict(features_df)
+    
+    model = get_model()
+    
+    X = features_df[FEATURE_ORDER]
+    start = time.perf_counter()
+    with stage_timer("model_predict_batch"):
+        pred = np.asarray(model.predict(X), dtype=float)
+    get_metrics().model_seconds.observe(time.perf_counter() - start, engine="lgbm", model="lgbm")
+    
+    # Same clamping as predict_recommendation: <= existing, >= 2 lux
+    existing_lx = X["existing_lx"].to_numpy(dtype=float)
+    recommended_lx = np.maximum(np.minimum(pred, existing_lx), 2.0)
+    delta_percent = (recommended_lx - existing_lx) / existing_lx * 100.0
+    
+    return pd.DataFrame({
+        "existing_lx": existing_lx,
+        "recommended_lx": recommended_lx,
+        "delta_percent": delta_percent,
+    }, index=features_df.index)
+
+
 def generate_reasons(features: Dict[str, float]) -> List[Dict]:
     """
     Generate top reasons for dimming recommendation based on feature values.
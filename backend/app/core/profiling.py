@@ -0,0 +1,176 @@
+import cProfile
+import functools
+import hmac
+import pstats
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from core.config import PROFILE_ADMIN_TOKEN, PROFILE_KEEP, PROFILE_TREE_DEPTH, PROFILE_MIN_FRACTION
+
+# Set only for requests that asked for profiling (and passed the admin check)
+_session: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+
+class ProfileSession:
+    """Collects cProfile call trees for the profiled functions of one request."""
+
+    def __init__(self, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.path = path
+        self.started = time.time()
+        self.total_seconds = None
+        self.calls: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, profile: cProfile.Profile):
+        tree = call_tree(profile, name)
+        with self._lock:
+            self.calls.append({"function": name, "seconds": seconds, "tree": tree})
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "path": self.path,
+            "started": self.started,
+            "total_seconds": self.total_seconds,
+            "calls": self.calls,
+        }
+
+
+def _func_label(func) -> str:
+    filename, line, name = func
+    return f"{name} ({filename.rsplit('/', 1)[-1]}:{line})" if line else name
+
+
+def call_tree(profile: cProfile.Profile, root_name: str,
+              max_depth: int = PROFILE_TREE_DEPTH, min_fraction: float = PROFILE_MIN_FRACTION) -> Dict:
+    """
+    Build a call tree (cumulative seconds per node) rooted at root_name.
+    cProfile keeps a caller/callee graph, not full stacks, so a function shared by
+    several callers shows its aggregated time under each of them.
+    """
+    stats = pstats.Stats(profile)
+    stats.calc_callees()
+    raw = stats.stats           # func -> (cc, nc, tt, ct, callers)
+    callees = stats.all_callees  # func -> {callee: (cc, nc, tt, ct)}
+
+    roots = [f for f in raw if f[2] == root_name]
+    if not roots:
+        return {"function": root_name, "cumulative": 0.0, "calls": 0, "children": []}
+    root = max(roots, key=lambda f: raw[f][3])
+    total = raw[root][3] or 1e-12
+
+    def build(func, cum, ncalls, depth, seen):
+        node = {"function": _func_label(func), "cumulative": round(cum, 6), "calls": ncalls, "children": []}
+        if depth >= max_depth or func in seen:
+            return node
+        children = sorted(callees.get(func, {}).items(), key=lambda kv: kv[1][3], reverse=True)
+        for child, (_, nc, _, ct) in children:
+            if ct / total < min_fraction:
+                break
+            node["children"].append(build(child, ct, nc, depth + 1, seen | {func}))
+        return node
+
+    return build(root, raw[root][3], raw[root][1], 0, frozenset())
+
+
+def profiled(func):
+    """
+    Run func under cProfile only when the current request enabled profiling.
+    When it didn't, the only cost is a ContextVar lookup.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        session = _session.get()
+        if session is None:
+            return func(*args, **kwargs)
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            session.add(name, time.perf_counter() - start, profile)
+
+    return wrapper
+
+
+class ProfileStore:
+    """Keeps the most recent request profiles in memory."""
+
+    def __init__(self, keep: int = PROFILE_KEEP):
+        self.keep = keep
+        self._items: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, session: ProfileSession):
+        with self._lock:
+            self._items[session.id] = session.to_dict()
+            while len(self._items) > self.keep:
+                self._items.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._items.get(profile_id)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {"id": p["id"], "path": p["path"], "started": p["started"], "total_seconds": p["total_seconds"]}
+                for p in reversed(self._items.values())
+            ]
+
+
+# Global instance
+_profile_store = ProfileStore()
+
+def get_profile_store() -> ProfileStore:
+    """Get the global profile store."""
+    return _profile_store
+
+
+def profiling_enabled() -> bool:
+    """Profiling is only available when an admin token is configured."""
+    return bool(PROFILE_ADMIN_TOKEN)
+
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(PROFILE_ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_ADMIN_TOKEN)
+
+
+def wants_profile(request) -> bool:
+    """X-Profile: 1 header or ?profile=1, plus a valid X-Admin-Token."""
+    flag = request.headers.get("x-profile") or request.query_params.get("profile")
+    if flag not in ("1", "true"):
+        return False
+    return is_admin(request.headers.get("x-admin-token"))
+
+
+async def profiling_middleware(request, call_next):
+    """
+    HTTP middleware: enable profiling for this request if asked by an admin.
+    The profile id is returned in X-Profile-Id (fetch it from /api/profiles/{id}).
+    """
+    if not wants_profile(request):
+        return await call_next(request)
+
+    session = ProfileSession(request.url.path)
+    token = _session.set(session)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _session.reset(token)
+        session.total_seconds = time.perf_counter() - start
+        get_profile_store().put(session)
+
+    response.headers["X-Profile-Id"] = session.id
+    response.headers["Server-Timing"] = ", ".join(
+        [f'{c["function"]};dur={c["seconds"] * 1000:.2f}' for c in session.calls]
+        + [f"total;dur={session.total_seconds * 1000:.2f}"]
+    )
+    return response
@@ -0,0 +1,85 @@
+import numpy as np
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Rule weights used to generate training labels (pipeline/train_models.py
+# compute_rule_recommended). Keys follow the reason keys in app/api.py.
+DIM_WEIGHTS = {
+    "low_traffic": 0.55,
+    "park_within": 0.45,
+    "high_cctv": 0.35,
+    "high_residential": 0.80,
+}
+SHIELD_WEIGHTS = {
+    "high_traffic": 0.70,
+    "no_park_within": 0.30,
+    "low_cctv": 0.25,
+    "high_commercial": 0.55,
+}
+RULE_WEIGHTS = {**DIM_WEIGHTS, **SHIELD_WEIGHTS}
+
+DEFAULT_POLICY_WEIGHT = 50.0
+
+
+def weights_for_policy(policy_weight: float, base: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Map the frontend policyWeight (0-100) to rule weights.
+
+    50 keeps the trained rule as is. Towards 100 the dimming terms are scaled up
+    and the shielding (keep-bright) terms down; towards 0 the opposite.
+    """
+    base = base or RULE_WEIGHTS
+    s = min(max(float(policy_weight), 0.0), 100.0) / DEFAULT_POLICY_WEIGHT  # 0..2
+    weights = {}
+    for key, w in base.items():
+        weights[key] = w * s if key in DIM_WEIGHTS else w * (2.0 - s)
+    return weights
+
+
+def compute_rule_recommended(
+    features: "pd.DataFrame",
+    weights: Optional[Dict[str, float]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized rule-based recommendation (same formula as the training labels).
+
+    Args:
+        features: DataFrame with FEATURE_ORDER columns (one row per grid)
+        weights: Rule weights (keys of RULE_WEIGHTS); missing keys use defaults
+
+    Returns:
+        (recommended_lx, delta_percent) arrays
+    """
+    w = {**RULE_WEIGHTS, **(weights or {})}
+
+    night_traffic = features["night_traffic"].to_numpy(dtype=float)
+    cctv_density = np.clip(features["cctv_density"].to_numpy(dtype=float), 0, 1)
+    park_within = features["park_within"].to_numpy(dtype=float)
+    commercial = np.clip(features["commercial_density"].to_numpy(dtype=float), 0, 1)
+    residential = np.clip(features["residential_density"].to_numpy(dtype=float), 0, 1)
+    existing_lx = features["existing_lx"].to_numpy(dtype=float)
+
+    dim_raw = (
+        w["low_traffic"] * (1 - night_traffic)
+        + w["park_within"] * park_within
+        + w["high_cctv"] * cctv_density
+        + w["high_residential"] * residential
+    )
+
+    shield = (
+        w["high_traffic"] * night_traffic
+        + w["no_park_within"] * (1 - park_within)
+        + w["low_cctv"] * (1 - cctv_density)
+        + w["high_commercial"] * commercial
+    )
+
+    dim = np.clip(dim_raw - shield, 0, 1)
+
+    max_drop = np.where(existing_lx == 25, 0.50, np.where(existing_lx == 15, 0.42, 0.35))
+    drop_ratio = max_drop * np.tanh(2.6 * dim)
+
+    recommended_lx = np.minimum(np.maximum(existing_lx * (1 - drop_ratio), 2.0), existing_lx)
+    delta_percent = (recommended_lx - existing_lx) / existing_lx * 100.0
+    return recommended_lx, delta_percent
@@ -0,0 +1,125 @@
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional, Tuple
+from core.metrics import load_timer
+
+# Process start reference (main.py sets it before its own imports)
+_process_start = time.perf_counter()
+
+
+def mark_process_start(t: float):
+    global _process_start
+    _process_start = t
+
+
+# Heavy imports (pandas, joblib, LightGBM) happen inside the steps, not at app import time
+def _load_model():
+    from core.model_loader import get_model
+    get_model()
+
+
+def _load_grid_data():
+    from data.grid_loader import get_grid_loader
+    get_grid_loader().load_data()
+
+
+def _build_reco_table():
+    from data.reco_table import get_reco_table
+    get_reco_table().load()
+
+
+def _load_contrib_cache():
+    from core.contrib_cache import get_contrib_cache
+    from data.grid_loader import get_grid_loader
+    get_contrib_cache().load(get_grid_loader().get_all_features())
+
+
+WARMUP_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("model", _load_model),
+    ("grid_data", _load_grid_data),
+    ("reco_table", _build_reco_table),
+    ("contrib_cache", _load_contrib_cache),
+]
+
+
+class Warmup:
+    """Runs the model/data loading steps and reports their progress for readiness checks."""
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], None]]] = WARMUP_STEPS):
+        self._steps = steps
+        self._status: Dict[str, Dict] = {name: {"status": "pending"} for name, _ in steps}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.ready = False
+        self.failed = False
+        self.mode = None
+        self.ready_seconds = None
+
+    def run(self):
+        """Run every step in order (raises on the first failure)."""
+        self.mode = self.mode or "blocking"
+        with load_timer("warmup"):
+            for name, step in self._steps:
+                self._set(name, status="loading")
+                start = time.perf_counter()
+                try:
+                    step()
+                except Exception as e:
+                    self.failed = True
+                    self._set(name, status="failed", error=repr(e),
+                              seconds=round(time.perf_counter() - start, 4))
+                    raise
+                self._set(name, status="ready", seconds=round(time.perf_counter() - start, 4))
+        self.ready_seconds = round(time.perf_counter() - _process_start, 4)
+        self.ready = True
+
+    def start_background(self):
+        """Run the steps in a daemon thread so the server accepts requests right away."""
+        if self._thread is not None:
+            return
+        self.mode = "background"
+
+        def target():
+            try:
+                self.run()
+                print(f"✓ Warm-up finished, ready {self.ready_seconds:.2f}s after start")
+            except Exception:
+                print("✗ Warm-up failed")
+                traceback.print_exc()
+
+        self._thread = threading.Thread(target=target, name="warmup", daemon=True)
+        self._thread.start()
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self._status[name] = fields
+
+    def current_step(self) -> Optional[str]:
+        with self._lock:
+            for name, _ in self._steps:
+                if self._status[name]["status"] != "ready":
+                    return name
+        return None
+
+    def progress(self) -> Dict:
+        with self._lock:
+            steps = {name: dict(self._status[name]) for name, _ in self._steps}
+        done = sum(1 for s in steps.values() if s["status"] == "ready")
+        return {
+            "ready": self.ready,
+            "failed": self.failed,
+            "mode": self.mode,
+            "progress": round(done / len(steps), 3) if steps else 1.0,
+            "uptime_seconds": round(time.perf_counter() - _process_start, 4),
+            "ready_seconds": self.ready_seconds,
+            "steps": steps,
+        }
+
+
+# Global instance
+_warmup = Warmup()
+
+def get_warmup() -> Warmup:
+    """Get the global warm-up state."""
+    return _warmup
@@ -8,8 +8,16 @@ from core.config import (
     SEONGSU_CENTER_LON,
     DEFAULT_COMMERCIAL_DENSITY,
     DEFAULT_RESIDENTIAL_DENSITY,
-    DEFAULT_EXISTING_LUX
+    DEFAULT_EXISTING_LUX,
+    RECO_OUTPUT_FILE,
 )
+from core.grid_topology import GridRaster, cell_of, decode_grid_id, encode_grid_id, is_lattice_id
+from core.metrics import load_timer
+from core.profiling import profiled
+from data.inventory import get_inventory
+
+# Columns of the generated Seongsu layout (see get_grid_with_coordinates)
+LOCAL_GRID_COLS = 11
 
 
 class GridDataLoader:
@@ -18,17 +26,26 @@ class GridDataLoader:
     def __init__(self):
         self._grids_df = None
         self._ntl_df = None
+        self._overrides: Dict[str, Dict[str, float]] = {}  # grid_id -> patched model features
+        self._positions = None  # grid_id -> row position in _grids_df
+        self._positions_src = None
+        self._inventory = None  # (lamp_count, watt_sum, existing_lx) per row of _grids_df
+        self._inventory_src = None
+        self._baseline_lx = None  # existing_lx per row of _grids_df (see _existing_lx)
+        self._baseline_src = None
         
     def load_data(self):
         """Load grid features and NTL data."""
         if self._grids_df is None:
             print(f"Loading grid features from {GRID_FEATURES_FILE}...")
-            self._grids_df = pd.read_csv(GRID_FEATURES_FILE)
+            with load_timer("grid_features"):
+                self._grids_df = pd.read_csv(GRID_FEATURES_FILE)
             print(f"Loaded {len(self._grids_df)} grid cells")
             
         if self._ntl_df is None:
             print(f"Loading NTL data from {NTL_GRID_FILE}...")
-            self._ntl_df = pd.read_csv(NTL_GRID_FILE)
+            with load_timer("ntl"):
+                self._ntl_df = pd.read_csv(NTL_GRID_FILE)
             print(f"Loaded {len(self._ntl_df)} NTL grid points")
     
     def get_grid_with_coordinates(self) -> pd.DataFrame:
@@ -50,8 +67,8 @@ class GridDataLoader:
         start_lon = SEONGSU_CENTER_LON - (5.5 * lon_offset)  # Start 5.5 cells west
         
         for i in range(len(grids)):
-            row = i // 11  # 11 columns
-            col = i % 11
+            row = i // LOCAL_GRID_COLS
+            col = i % LOCAL_GRID_COLS
             lat = start_lat + (row * lat_offset)
             lon = start_lon + (col * lon_offset)
             coords.append([lat, lon])
@@ -61,6 +78,7 @@ class GridDataLoader:
         
         return grids
     
+    @profiled
     def get_grids_for_api(self, area: str = "seongsu") -> List[Dict]:
         """Get grids in frontend API format."""
         grids_df = self.get_grid_with_coordinates()
@@ -85,12 +103,11 @@ class GridDataLoader:
         except ValueError:
             return None
         
-        grid_row = self._grids_df[self._grids_df['grid_id'] == grid_id_int]
-        
-        if grid_row.empty:
+        pos = self._position_of(grid_id_int)
+        if pos is None:
             return None
         
-        row = grid_row.iloc[0]
+        row = self._grids_df.iloc[pos]
         
         # Map CSV columns to model features
         # Model expects: night_traffic, cctv_density, park_within, commercial_density, residential_density, existing_lx
@@ -110,7 +127,7 @@ class GridDataLoader:
         # Use defaults for missing features
         commercial_density = DEFAULT_COMMERCIAL_DENSITY
         residential_density = DEFAULT_RESIDENTIAL_DENSITY
-        existing_lx = DEFAULT_EXISTING_LUX
+        existing_lx = float(self._existing_lx()[pos])
         
         features = {
             "night_traffic": min(max(night_traffic, 0.0), 1.0),  # Clamp to 0-1
@@ -121,7 +138,149 @@ class GridDataLoader:
             "existing_lx": existing_lx
         }
         
+        # Live patches (see set_overrides) win over the CSV-derived values
+        features.update(self._overrides.get(str(grid_id_int), {}))
+        
         return features
+    
+    def get_all_features(self) -> pd.DataFrame:
+        """
+        Get model features for every grid cell at once (vectorized version of
+        get_grid_features). Index is the grid_id as string.
+        """
+        self.load_data()
+        df = self._grids_df
+        
+        def col(name, default=0.0):
+            if name in df.columns:
+                return df[name].fillna(default).astype(float)
+            return pd.Series(default, index=df.index, dtype=float)
+        
+        night_traffic = (
+            col('traffic_01_02') + col('traffic_02_03') + col('traffic_03_04')
+        ) / 3.0 / 3000.0
+        
+        if 'park_within_50m' in df.columns:
+            park_within = col('park_within_50m')
+        else:
+            park_within = col('park_in_grid')
+        
+        features = pd.DataFrame({
+            "night_traffic": night_traffic.clip(0.0, 1.0),
+            "cctv_density": col('cctv_density').clip(0.0, 1.0),
+            "park_within": park_within.astype(int),
+            "commercial_density": float(DEFAULT_COMMERCIAL_DENSITY),
+            "residential_density": float(DEFAULT_RESIDENTIAL_DENSITY),
+            "existing_lx": self._existing_lx(),
+        })
+        features.index = df['grid_id'].astype(int).astype(str)
+        features.index.name = "grid_id"
+        
+        for grid_id, values in self._overrides.items():
+            if grid_id in features.index:
+                features.loc[grid_id, list(values)] = list(values.values())
+        
+        return features
+    
+    def normalize_grid_id(self, grid_id: str) -> Optional[str]:
+        """Return the canonical grid_id string ("49" for "49.0") if the grid exists."""
+        self.load_data()
+        try:
+            grid_id_int = int(float(grid_id))
+        except ValueError:
+            return None
+        if self._position_of(grid_id_int) is None:
+            return None
+        return str(grid_id_int)
+    
+    def _position_of(self, grid_id_int: int) -> Optional[int]:
+        """Row position of a grid id (hash lookup; rebuilt if the grid table was replaced)."""
+        if self._positions_src is not self._grids_df:
+            ids = self._grids_df['grid_id'].astype(np.int64).to_numpy()
+            self._positions = dict(zip(ids.tolist(), range(len(ids))))
+            self._positions_src = self._grids_df
+        return self._positions.get(grid_id_int)
+    
+    def _cell_keys(self) -> np.ndarray:
+        """
+        NTL lattice cell key of every row, -1 where the cell is unknown.
+        
+        Lattice ids are the key itself; other rows only get one from real lat/lon
+        columns. The generated Seongsu layout does not follow the 250m lattice, so
+        those rows never join the inventory (they keep the default lux/wattage).
+        """
+        df = self._grids_df
+        ids = df['grid_id'].astype(np.int64).to_numpy()
+        keys = np.where(is_lattice_id(ids), ids, -1)
+        if {'lat', 'lon'} <= set(df.columns):
+            lat, lon = df['lat'].to_numpy(dtype=float), df['lon'].to_numpy(dtype=float)
+            located = (keys < 0) & np.isfinite(lat) & np.isfinite(lon)
+            if located.any():
+                rows, cols = cell_of(lat[located], lon[located])
+                keys[located] = encode_grid_id(rows, cols)
+        return keys
+    
+    def get_inventory(self):
+        """
+        Streetlight inventory per row of the grid table, joined on the cell key.
+        
+        Returns:
+            (lamp_count int32, watt_sum float32, existing_lx float32); NaN watt/lux
+            for cells without inventory
+        """
+        self.load_data()
+        if self._inventory_src is not self._grids_df:
+            self._inventory = get_inventory().lookup(self._cell_keys())
+            self._inventory_src = self._grids_df
+        return self._inventory
+    
+    def _existing_lx(self) -> np.ndarray:
+        """
+        Installed-base lux per row: streetlight inventory, else the existing_lx of the
+        predict.py batch output (what the map shows), else DEFAULT_EXISTING_LUX.
+        """
+        self.load_data()
+        if self._baseline_src is not self._grids_df:
+            existing_lx = self.get_inventory()[2].astype(float)
+            missing = np.isnan(existing_lx)
+            if missing.any() and RECO_OUTPUT_FILE.exists():
+                batch = pd.read_csv(RECO_OUTPUT_FILE, usecols=["grid_id", "existing_lx"], encoding="utf-8-sig")
+                batch_lx = batch.drop_duplicates("grid_id", keep="last").set_index("grid_id")["existing_lx"]
+                ids = self._grids_df['grid_id'].astype(np.int64)
+                existing_lx[missing] = ids[missing].map(batch_lx).to_numpy(dtype=float)
+            self._baseline_lx = np.where(np.isnan(existing_lx), float(DEFAULT_EXISTING_LUX), existing_lx)
+            self._baseline_src = self._grids_df
+        return self._baseline_lx
+    
+    def get_installed(self, grid_ids: List[str]):
+        """(lamp_count, installed watt) of the given grid ids; NaN watt if unknown."""
+        self.load_data()
+        lamp_count, watt_sum, _ = self.get_inventory()
+        positions = np.asarray([self._position_of(int(float(g))) for g in grid_ids], dtype=np.int64)
+        return lamp_count[positions], watt_sum[positions].astype(float)
+    
+    def get_raster(self, grid_ids: List[str]) -> GridRaster:
+        """
+        Dense 2-D layout of the given grid cells.
+        
+        NTL lattice ids are decoded arithmetically; other ids (the Seongsu pilot
+        0..108) use the generated layout of get_grid_with_coordinates.
+        """
+        ids = np.asarray([int(float(g)) for g in grid_ids], dtype=np.int64)
+        if len(ids) and is_lattice_id(ids).all():
+            rows, cols = decode_grid_id(ids)
+            return GridRaster(rows, cols)
+        self.load_data()
+        positions = np.asarray([self._position_of(int(g)) for g in ids], dtype=np.int64)
+        return GridRaster(positions // LOCAL_GRID_COLS, positions % LOCAL_GRID_COLS)
+    
+    def set_overrides(self, patches: Dict[str, Dict[str, float]]):
+        """
+        Patch model features of individual grid cells (e.g. a new CCTV, an updated
+        park boundary). Keys are canonical grid ids, values model feature -> value.
+        """
+        for grid_id, values in patches.items():
+            self._overrides[grid_id] = {**self._overrides.get(grid_id, {}), **values}
 
 
 # Global instance
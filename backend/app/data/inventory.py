@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+from typing import Tuple
+from core.config import STREETLIGHT_GRID_FILE
+from core.metrics import load_timer
+
+
+class StreetlightInventory:
+    """
+    Installed streetlights per 250m cell (pipeline/make_streetlight_inventory.py output).
+
+    Kept as typed arrays sorted by cell key (NTL lattice grid id), so a batch of
+    cells is joined with one searchsorted. Without the file every lookup misses
+    and callers fall back to the batch output lux (else DEFAULT_EXISTING_LUX) /
+    the requested lamp wattage.
+    """
+
+    def __init__(self):
+        self._keys = None
+        self._lamp_count = None
+        self._watt_sum = None
+        self._existing_lx = None
+
+    def load(self):
+        """Load the per-cell inventory once (empty if the file does not exist)."""
+        if self._keys is not None:
+            return
+        if not STREETLIGHT_GRID_FILE.exists():
+            print(f"Streetlight inventory not found ({STREETLIGHT_GRID_FILE.name}); using default lux/wattage")
+            self._set(np.empty(0, np.int64), np.empty(0, np.int32), np.empty(0, np.float32), np.empty(0, np.float32))
+            return
+        with load_timer("streetlights"):
+            df = pd.read_csv(
+                STREETLIGHT_GRID_FILE,
+                usecols=["grid_id", "lamp_count", "watt_sum", "existing_lx"],
+                dtype={"grid_id": np.int64, "lamp_count": np.int32, "watt_sum": np.float32, "existing_lx": np.float32},
+                encoding="utf-8-sig",
+            )
+            order = np.argsort(df["grid_id"].to_numpy(), kind="stable")
+            self._set(
+                df["grid_id"].to_numpy()[order],
+                df["lamp_count"].to_numpy()[order],
+                df["watt_sum"].to_numpy()[order],
+                df["existing_lx"].to_numpy()[order],
+            )
+        print(f"Loaded streetlight inventory: {int(self._lamp_count.sum())} lamps in {len(self._keys)} cells")
+
+    def _set(self, keys, lamp_count, watt_sum, existing_lx):
+        self._lamp_count, self._watt_sum, self._existing_lx = lamp_count, watt_sum, existing_lx
+        self._keys = keys
+
+    @property
+    def available(self) -> bool:
+        self.load()
+        return len(self._keys) > 0
+
+    def lookup(self, cell_keys) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Inventory of the given cells.
+
+        Returns:
+            (lamp_count int32, watt_sum float32, existing_lx float32); cells
+            without streetlights get 0 lamps and NaN watt/lux
+        """
+        self.load()
+        keys = np.asarray(cell_keys, dtype=np.int64)
+        lamp_count = np.zeros(len(keys), dtype=np.int32)
+        watt_sum = np.full(len(keys), np.nan, dtype=np.float32)
+        existing_lx = np.full(len(keys), np.nan, dtype=np.float32)
+        if not len(self._keys) or not len(keys):
+            return lamp_count, watt_sum, existing_lx
+
+        pos = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        found = self._keys[pos] == keys
+        lamp_count[found] = self._lamp_count[pos[found]]
+        watt_sum[found] = self._watt_sum[pos[found]]
+        existing_lx[found] = self._existing_lx[pos[found]]
+        return lamp_count, watt_sum, existing_lx
+
+
+# Global instance
+_inventory = StreetlightInventory()
+
+def get_inventory() -> StreetlightInventory:
+    """Get the global streetlight inventory."""
+    return _inventory
@@ -0,0 +1,226 @@
+import gzip
+import hashlib
+import json
+import struct
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+from core.config import RECO_OUTPUT_FILE
+from core.metrics import load_timer
+
+# Binary layout (little endian):
+#   b"RECO" | uint32 version | uint32 header_len | header JSON (utf-8, space padded)
+#   | column blob (each column 8-byte aligned, offsets relative to blob start)
+# The header holds n, the shared reason label dictionary and the column specs.
+# reasons is an (n, 3) reason-code matrix flattened row-major; NO_REASON marks an empty slot.
+MAGIC = b"RECO"
+VERSION = 1
+NO_REASON = 255
+ALIGN = 8
+REASON_SLOTS = 3
+
+
+def _pad(n: int) -> int:
+    return (-n) % ALIGN
+
+
+def _parse_reason(value) -> Optional[Tuple[str, str, str]]:
+    """'key|label|direction' -> tuple (None if empty)."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    parts = value.split("|")
+    if len(parts) < 3:
+        return None
+    return parts[0], parts[1], parts[2]
+
+
+def encode_artifact(df: pd.DataFrame) -> bytes:
+    """
+    Encode a batch output table (predict.py columns) into the compact columnar artifact.
+    Reasons are read from reason_1..3 and stored once in a label dictionary.
+    """
+    n = len(df)
+
+    # Shared reason dictionary + codes
+    labels: List[Tuple[str, str, str]] = []
+    label_index: Dict[Tuple[str, str, str], int] = {}
+    codes = np.full((n, REASON_SLOTS), NO_REASON, dtype=np.uint8)
+    for slot in range(REASON_SLOTS):
+        col = f"reason_{slot + 1}"
+        if col not in df.columns:
+            continue
+        # Encode each distinct string once, then map back to rows
+        str_codes, uniques = pd.factorize(df[col])
+        slot_codes = np.full(len(uniques) + 1, NO_REASON, dtype=np.uint8)
+        for i, value in enumerate(uniques):
+            reason = _parse_reason(value)
+            if reason is None:
+                continue
+            if reason not in label_index:
+                if len(labels) >= NO_REASON:
+                    raise ValueError(f"Too many distinct reasons for uint8 codes: {len(labels) + 1}")
+                label_index[reason] = len(labels)
+                labels.append(reason)
+            slot_codes[i] = label_index[reason]
+        codes[:, slot] = slot_codes[str_codes]
+
+    columns = [
+        ("existing_lx", df["existing_lx"].to_numpy(dtype=np.float32)),
+        ("recommended_lx", df["recommended_lx"].to_numpy(dtype=np.float32)),
+        ("delta_percent", df["delta_percent"].to_numpy(dtype=np.float32)),
+        ("keep_hours", df.get("keep_hours", pd.Series(3, index=df.index)).to_numpy(dtype=np.uint8)),
+        ("reasons", codes.ravel()),
+    ]
+
+    header = {"n": n, "labels": [list(l) for l in labels], "columns": []}
+
+    # Integer-like grid ids up to 2^53 are exact in float64 (NTL ids are ~5.6e11)
+    grid_num = pd.to_numeric(df["grid_id"], errors="coerce")
+    if grid_num.notna().all() and (grid_num % 1 == 0).all() and grid_num.abs().max() < 2 ** 53:
+        columns.insert(0, ("grid_id", grid_num.to_numpy(dtype=np.float64)))
+    else:
+        header["grid_id"] = df["grid_id"].astype(str).tolist()
+
+    offset = 0
+    blobs = []
+    for name, arr in columns:
+        arr = np.ascontiguousarray(arr)
+        header["columns"].append({
+            "name": name,
+            "dtype": arr.dtype.name,
+            "offset": offset,
+            "length": int(arr.size),
+        })
+        raw = arr.astype(arr.dtype.newbyteorder("<"), copy=False).tobytes()
+        blobs.append(raw + b"\0" * _pad(len(raw)))
+        offset += len(raw) + _pad(len(raw))
+
+    header_raw = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    header_raw += b" " * _pad(len(MAGIC) + 8 + len(header_raw))
+
+    return MAGIC + struct.pack("<II", VERSION, len(header_raw)) + header_raw + b"".join(blobs)
+
+
+def decode_artifact(data: bytes) -> pd.DataFrame:
+    """Decode an artifact back into a DataFrame (reason_1..3 as 'key|label|direction')."""
+    if data[:4] != MAGIC:
+        raise ValueError("Not a reco artifact (bad magic)")
+    version, header_len = struct.unpack_from("<II", data, 4)
+    if version != VERSION:
+        raise ValueError(f"Unsupported artifact version: {version}")
+    header = json.loads(data[12:12 + header_len].decode("utf-8"))
+    blob_start = 12 + header_len
+
+    n = header["n"]
+    out = {}
+    for col in header["columns"]:
+        arr = np.frombuffer(data, dtype=np.dtype(col["dtype"]).newbyteorder("<"),
+                            count=col["length"], offset=blob_start + col["offset"])
+        out[col["name"]] = arr
+
+    df = pd.DataFrame({
+        "grid_id": (out["grid_id"].astype(np.int64).astype(str) if "grid_id" in out else header["grid_id"]),
+        "existing_lx": out["existing_lx"],
+        "recommended_lx": out["recommended_lx"],
+        "delta_percent": out["delta_percent"],
+        "keep_hours": out["keep_hours"],
+    })
+
+    labels = ["|".join(l) for l in header["labels"]] + [""] * (NO_REASON + 1 - len(header["labels"]))
+    codes = out["reasons"].reshape(n, REASON_SLOTS)
+    label_arr = np.array(labels, dtype=object)
+    for slot in range(REASON_SLOTS):
+        df[f"reason_{slot + 1}"] = label_arr[codes[:, slot]]
+    return df
+
+
+def table_frame(df: pd.DataFrame, features: pd.DataFrame) -> pd.DataFrame:
+    """
+    Recommendation table rows -> encode_artifact input (reason_1..3 as 'key|label|direction').
+    Same values and reasons as the grid_update stream events of /api/grids/patch.
+    """
+    from core.predictor import generate_reasons
+
+    reasons = [
+        ["|".join((r["key"], r["label"], r["direction"])) for r in generate_reasons(row)[:REASON_SLOTS]]
+        for row in features.loc[df.index].to_dict("records")
+    ]
+    out = pd.DataFrame({
+        "grid_id": df.index,
+        "existing_lx": df["existing_lx"].to_numpy(),
+        "recommended_lx": df["recommended_lx"].to_numpy(),
+        "delta_percent": df["delta_percent"].to_numpy(),
+        "keep_hours": 3,
+    })
+    for slot in range(REASON_SLOTS):
+        out[f"reason_{slot + 1}"] = [r[slot] if slot < len(r) else "" for r in reasons]
+    return out
+
+
+class RecoArtifact:
+    """
+    Serve the batch recommendations (predict.py output, the same file the frontend's
+    reco.csv fallback is synced from) as a compact, gzipped artifact.
+
+    Grids recomputed by live patches (data/reco_table.py) are overlaid with the
+    values pushed on the update stream, and the artifact is re-encoded whenever
+    the table revision moves, so a client that resyncs gets the patched values too.
+    """
+
+    def __init__(self):
+        self._base: Optional[pd.DataFrame] = None
+        self._revision = None
+        self._state: Optional[Tuple[str, bytes, bytes]] = None  # (etag, raw, gzipped), swapped as one
+        self._lock = threading.Lock()
+
+    def _load_base(self) -> pd.DataFrame:
+        if self._base is None:
+            print(f"Loading batch recommendations from {RECO_OUTPUT_FILE}...")
+            base = pd.read_csv(RECO_OUTPUT_FILE, encoding="utf-8-sig")
+            base["grid_id"] = base["grid_id"].astype(str)
+            self._base = base
+        return self._base
+
+    def load(self):
+        from data.reco_table import get_reco_table
+
+        revision, df, features, patched = get_reco_table().snapshot()
+        if revision != self._revision:
+            with self._lock:
+                if revision != self._revision:
+                    with load_timer("reco_artifact"):
+                        self.set_table(self._overlay(df, features, patched), revision)
+        return self
+
+    def _overlay(self, df: pd.DataFrame, features: pd.DataFrame, patched) -> pd.DataFrame:
+        """Batch output with the patched grids replaced by their live table rows."""
+        base = self._load_base()
+        ids = [g for g in df.index if g in patched]
+        if not ids:
+            return base
+        live = table_frame(df.loc[ids], features)
+        return pd.concat([base[~base["grid_id"].isin(ids)], live], ignore_index=True)
+
+    def set_table(self, df: pd.DataFrame, revision: int):
+        """(Re)encode from a recommendation table (predict.py output columns)."""
+        raw = encode_artifact(df)
+        gzipped = gzip.compress(raw, compresslevel=6, mtime=0)
+        # The revision restarts with the process, the content hash keeps old ETags from matching
+        etag = f'"{revision}-{hashlib.sha1(raw).hexdigest()[:16]}"'
+        self._state = (etag, raw, gzipped)
+        self._revision = revision
+        print(f"Reco artifact ready (revision {revision}): {len(df)} rows, "
+              f"{len(raw)} bytes ({len(gzipped)} gzipped)")
+
+    def snapshot(self) -> Tuple[str, bytes, bytes]:
+        """(etag, raw, gzipped) of one encoded revision, so headers and body always match."""
+        return self.load()._state
+
+
+# Global instance
+_reco_artifact = RecoArtifact()
+
+def get_reco_artifact() -> RecoArtifact:
+    """Get the global reco artifact instance."""
+    return _reco_artifact
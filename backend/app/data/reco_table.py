@@ -0,0 +1,456 @@
+import threading
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from core.config import (
+    RECO_ENGINE,
+    RECO_SMOOTHING_RADIUS,
+    RECO_SMOOTHING_STRENGTH,
+    SAVINGS_CACHE_SIZE,
+    SCENARIO_CACHE_SIZE,
+)
+from core.contrib_cache import get_contrib_cache
+from core.grid_topology import GridRaster, smooth_values
+from core.predictor import predict_batch, generate_reasons
+from core.rules import compute_rule_recommended
+from core.metrics import load_timer
+from data.grid_loader import get_grid_loader
+from data.regions import get_region_index, normalize_region_code
+
+# Per-grid saving sums kept per area/district and region (and updated by patches)
+SAVING_SUM_COLS = ["saving_ratio_sum", "installed_kwh_ratio_sum", "default_ratio_sum", "maintained"]
+
+
+class RecoTable:
+    """In-memory recommendation table for every grid cell, plus savings aggregates."""
+
+    def __init__(self):
+        self._df = None
+        self._features = None
+        self._groups = None
+        self._raster: Optional[GridRaster] = None
+        self._region_rollups: Dict[str, Dict] = {}  # region code -> precomputed sums
+        self.revision = 0  # Bumped on every rebuild/patch; part of the cache keys
+        self._patch_lock = threading.Lock()
+        self._patched_ids = frozenset()  # Grids recomputed by patches (incl. smoothed neighbours)
+        self._savings_cached = lru_cache(maxsize=SAVINGS_CACHE_SIZE)(self._compute_savings)
+        self._scenario_cached = lru_cache(maxsize=SCENARIO_CACHE_SIZE)(self._compute_scenario)
+        self._ensemble_cached = lru_cache(maxsize=1)(self._compute_ensemble)
+
+    def load(self):
+        """Predict all grid cells once and precompute per-group saving sums."""
+        if self._df is None:
+            self.rebuild()
+        return self._df
+
+    def rebuild(self):
+        """(Re)build the table from the grid loader and the current model."""
+        with load_timer("reco_table"):
+            return self._rebuild()
+
+    def _rebuild(self):
+        features = get_grid_loader().get_all_features()
+        self._raster = get_grid_loader().get_raster(features.index.tolist())
+        df = self._predict_rows(features)
+        self._smooth(df)
+        coords = get_grid_loader().get_grid_with_coordinates()
+        coords.index = coords["grid_id"].astype(int).astype(str)
+        coords = coords.loc[df.index]
+        regions = get_region_index()
+        df["sigungu_cd"], df["bjdong_cd"] = regions.assign(
+            coords["lat"].to_numpy(), coords["lon"].to_numpy(), coords["grid_id"].to_numpy()
+        )
+        # Savings groups: district = gu name, area = legal dong name ("" without an assignment)
+        df["district"] = df["sigungu_cd"].map(regions.sigungu_name)
+        df["area"] = df["bjdong_cd"].map(regions.dong_name)
+
+        self._df = df
+        self._features = features
+        self._region_rollups = self._build_region_rollups(df)
+        self._groups = (
+            df.groupby(["area", "district"])
+            .agg(
+                grids=("saving_ratio", "size"),
+                saving_ratio_sum=("saving_ratio", "sum"),
+                installed_kwh_ratio_sum=("installed_kwh_ratio", "sum"),
+                default_ratio_sum=("default_ratio", "sum"),
+                maintained=("maintained", "sum"),
+                installed_grids=("installed_kw", "count"),
+                lamps=("lamp_count", "sum"),
+            )
+        )
+        self._bump_revision()
+        print(f"Recommendation table built: {len(df)} grid cells")
+        return df
+
+    @staticmethod
+    def _predict_rows(features: pd.DataFrame) -> pd.DataFrame:
+        df = predict_batch(features, engine=RECO_ENGINE)
+        df["model_lx"] = df["recommended_lx"]  # Before smoothing
+        lamp_count, watt_sum = get_grid_loader().get_installed(df.index.tolist())
+        df["lamp_count"] = lamp_count
+        df["installed_kw"] = watt_sum / 1000.0
+        RecoTable._add_saving_columns(df)
+        return df
+
+    @staticmethod
+    def _add_saving_columns(df: pd.DataFrame):
+        # kWh saved = kW * hours * saving_ratio. Grids with streetlight inventory use their
+        # installed kW, the others the requested lamp watt, so both sums are kept per grid
+        df["saving_ratio"] = (1.0 - df["recommended_lx"] / df["existing_lx"]).clip(0.0, 1.0)
+        df["maintained"] = np.isclose(df["recommended_lx"], df["existing_lx"])
+        installed = df["installed_kw"].notna()
+        df["installed_kwh_ratio"] = (df["saving_ratio"] * df["installed_kw"]).where(installed, 0.0)
+        df["default_ratio"] = df["saving_ratio"].where(~installed, 0.0)
+
+    @staticmethod
+    def _kwh(sums, watt: float, hours: float) -> float:
+        """kWh saved of summed rows for a watt/hours scenario."""
+        return float(sums["installed_kwh_ratio_sum"] + sums["default_ratio_sum"] * watt / 1000.0) * hours
+
+    def _smooth(self, df: pd.DataFrame):
+        """
+        Optional spatial smoothing (RECO_SMOOTHING_RADIUS > 0), in place.
+
+        The dimming ratio recommended/existing is smoothed rather than the lux,
+        so a grid is never brightened and keeps its own baseline.
+        """
+        if RECO_SMOOTHING_RADIUS <= 0:
+            return
+        existing_lx = df["existing_lx"].to_numpy(dtype=float)
+        ratio = df["model_lx"].to_numpy(dtype=float) / existing_lx
+        ratio = smooth_values(self._raster, ratio, RECO_SMOOTHING_RADIUS, RECO_SMOOTHING_STRENGTH)
+        recommended_lx = np.maximum(np.minimum(ratio * existing_lx, existing_lx), 2.0)
+        df["recommended_lx"] = recommended_lx
+        df["delta_percent"] = (recommended_lx - existing_lx) / existing_lx * 100.0
+        self._add_saving_columns(df)
+
+    def _bump_revision(self):
+        self.revision += 1
+        self._savings_cached.cache_clear()
+        self._scenario_cached.cache_clear()
+        self._ensemble_cached.cache_clear()
+
+    @staticmethod
+    def _rollup_values(df: pd.DataFrame) -> pd.DataFrame:
+        """Per-row contributions to the region rollup sums."""
+        return pd.DataFrame({
+            "saving_ratio_sum": df["saving_ratio"].astype(float),
+            "installed_kwh_ratio_sum": df["installed_kwh_ratio"].astype(float),
+            "default_ratio_sum": df["default_ratio"].astype(float),
+            "maintained": df["maintained"].astype(float),
+            "installed_grids": df["installed_kw"].notna().astype(float),
+            "existing_lx_sum": df["existing_lx"].astype(float),
+            "recommended_lx_sum": df["recommended_lx"].astype(float),
+            "delta_percent_sum": df["delta_percent"].astype(float),
+        }, index=df.index)
+
+    @classmethod
+    def _build_region_rollups(cls, df: pd.DataFrame) -> Dict[str, Dict]:
+        """
+        Per gu and per legal dong sums of the recommendation table (code -> sums).
+
+        Built once per table rebuild so region summaries stay a dict lookup per
+        request; patches apply their row diffs (_patch_region_rollups).
+        """
+        values = cls._rollup_values(df)
+        rollups: Dict[str, Dict] = {}
+        for key in ["sigungu_cd", "bjdong_cd"]:
+            assigned = df[key] != ""
+            codes = df.loc[assigned, key]
+            sums = values[assigned].groupby(codes).sum()
+            sums.insert(0, "grids", codes.value_counts().reindex(sums.index).astype(float))
+            for code, row in sums.iterrows():
+                rollups[code] = {col: float(row[col]) for col in sums.columns}
+
+        # Dongs with grid cells under each gu
+        dongs = df.loc[df["bjdong_cd"] != "", ["sigungu_cd", "bjdong_cd"]].drop_duplicates()
+        for sigungu_cd, codes in dongs.groupby("sigungu_cd")["bjdong_cd"]:
+            rollups[sigungu_cd]["dongs"] = sorted(codes)
+        return rollups
+
+    def _patch_region_rollups(self, old_rows: pd.DataFrame, new_rows: pd.DataFrame) -> Dict[str, Dict]:
+        """Region rollups with the (new - old) diff of the changed rows applied (copy on write)."""
+        diff = self._rollup_values(new_rows) - self._rollup_values(old_rows)
+        rollups = dict(self._region_rollups)
+        for key in ["sigungu_cd", "bjdong_cd"]:
+            assigned = old_rows[key] != ""
+            for code, sums in diff[assigned].groupby(old_rows.loc[assigned, key]).sum().iterrows():
+                rollup = dict(rollups[code])
+                for col, value in sums.items():
+                    rollup[col] += float(value)
+                rollups[code] = rollup
+        return rollups
+
+    def apply_patches(self, patches: Dict[str, Dict[str, float]]) -> List[Dict]:
+        """
+        Apply per-grid feature patches and recompute only the patched grid cells
+        (plus the neighbours whose smoothed value moved, if smoothing is on).
+
+        Args:
+            patches: canonical grid_id -> {model feature: value}
+
+        Returns:
+            The updated recommendations, same shape as /api/reco
+        """
+        self.load()
+        with self._patch_lock:
+            ids = list(patches)
+            features = self._features.copy()
+            for grid_id, values in patches.items():
+                features.loc[grid_id, list(values)] = list(values.values())
+
+            old_df = self._df
+            df = old_df.copy()
+            patched_rows = self._predict_rows(features.loc[ids])
+            for col in patched_rows.columns:
+                df.loc[ids, col] = patched_rows[col]
+            if RECO_SMOOTHING_RADIUS > 0:
+                # Neighbours of a patched grid move too; re-smoothing everything is a few ms
+                self._smooth(df)
+                moved = df.index[~np.isclose(df["recommended_lx"], old_df["recommended_lx"])]
+                ids = ids + [g for g in moved if g not in patches]
+            new_rows, old_rows = df.loc[ids], old_df.loc[ids]
+
+            # Group sums change by (new - old) of the changed rows only
+            diff = pd.DataFrame({
+                "area": old_rows["area"],
+                "district": old_rows["district"],
+                "saving_ratio_sum": new_rows["saving_ratio"] - old_rows["saving_ratio"],
+                "installed_kwh_ratio_sum": new_rows["installed_kwh_ratio"] - old_rows["installed_kwh_ratio"],
+                "default_ratio_sum": new_rows["default_ratio"] - old_rows["default_ratio"],
+                "maintained": new_rows["maintained"].astype(int) - old_rows["maintained"].astype(int),
+            }).groupby(["area", "district"])[SAVING_SUM_COLS].sum()
+            groups = self._groups.copy()
+            groups.loc[diff.index, SAVING_SUM_COLS] += diff
+            rollups = self._patch_region_rollups(old_rows, new_rows)
+
+            # Swap in the new state, then invalidate cached savings/scenarios. The loader
+            # overrides go last so a failed prediction leaves no half-applied patch behind
+            self._features, self._df, self._groups = features, df, groups
+            self._region_rollups = rollups
+            self._patched_ids = self._patched_ids | set(ids)
+            get_grid_loader().set_overrides(patches)
+            self._bump_revision()
+            get_contrib_cache().update_rows(features.loc[list(patches)])
+
+        updates = []
+        for grid_id in ids:
+            row = new_rows.loc[grid_id]
+            updates.append({
+                "grid_id": grid_id,
+                "existing_lx": round(float(row["existing_lx"]), 1),
+                "recommended_lx": round(float(row["recommended_lx"]), 1),
+                "delta_percent": round(float(row["delta_percent"]), 1),
+                "duration_hours": 3,
+                "reasons": generate_reasons(features.loc[grid_id].to_dict())[:3],
+            })
+        return updates
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self.load()
+
+    def snapshot(self) -> Tuple[int, pd.DataFrame, pd.DataFrame, frozenset]:
+        """(revision, table, features, patched grid ids) of one consistent table state."""
+        self.load()
+        with self._patch_lock:
+            return self.revision, self._df, self._features, self._patched_ids
+
+    def table_values(self, grid_id: str) -> Optional[Dict]:
+        """Table (smoothed) lux values of one grid, or None if it is not in the table."""
+        df = self.load()
+        if grid_id not in df.index:
+            return None
+        row = df.loc[grid_id]
+        return {
+            "recommended_lx": round(float(row["recommended_lx"]), 1),
+            "delta_percent": round(float(row["delta_percent"]), 1),
+        }
+
+    def savings(
+        self,
+        watt: float,
+        hours: float,
+        area: Optional[str] = None,
+        district: Optional[str] = None,
+    ) -> Optional[Dict]:
+        """Savings for a watt/hours scenario (cached per parameter set)."""
+        self.load()
+        return self._savings_cached(self.revision, float(watt), float(hours), area, district)
+
+    def _compute_savings(
+        self,
+        revision: int,
+        watt: float,
+        hours: float,
+        area: Optional[str],
+        district: Optional[str],
+    ) -> Optional[Dict]:
+        groups = self._groups
+        if area is not None:
+            groups = groups[groups.index.get_level_values("area") == area]
+        if district is not None:
+            groups = groups[groups.index.get_level_values("district") == district]
+
+        grids = int(groups["grids"].sum())
+        if grids == 0:
+            return None
+
+        by_district = []
+        for (g_area, g_district), row in groups.iterrows():
+            by_district.append({
+                "area": g_area,
+                "district": g_district,
+                "grids": int(row["grids"]),
+                "installed_grids": int(row["installed_grids"]),
+                "lamps": int(row["lamps"]),
+                "avg_saving_percent": round(float(row["saving_ratio_sum"] / row["grids"] * 100.0), 2),
+                "kwh_saved": round(self._kwh(row, watt, hours), 3),
+            })
+
+        ratio_sum = float(groups["saving_ratio_sum"].sum())
+        return {
+            "watt": watt,
+            "hours": hours,
+            "area": area,
+            "district": district,
+            "grids": grids,
+            "installed_grids": int(groups["installed_grids"].sum()),
+            "lamps": int(groups["lamps"].sum()),
+            "maintain_rate": round(float(groups["maintained"].sum()) / grids * 100.0, 2),
+            "avg_saving_percent": round(ratio_sum / grids * 100.0, 2),
+            "kwh_saved": round(self._kwh(groups[SAVING_SUM_COLS].sum(), watt, hours), 3),
+            "by_district": by_district,
+        }
+
+    def region_summary(self, code: str, watt: float, hours: float) -> Optional[Dict]:
+        """
+        Recommendation and savings summary for a gu (5 digit) or legal dong (10 digit) code.
+
+        Returns:
+            None if the code is not a Seoul region, otherwise the summary
+            (metrics are None when no loaded grid cell falls in the region)
+        """
+        parsed = normalize_region_code(code)
+        if parsed is None:
+            return None
+        level, code = parsed
+        regions = get_region_index()
+        summary = regions.describe(level, code)
+        if summary is None:
+            return None
+
+        self.load()
+        sums = self._region_rollups.get(code)
+        grids = int(sums["grids"]) if sums else 0
+        summary.update({"watt": watt, "hours": hours, "grids": grids})
+        if not grids:
+            summary.update({"installed_grids": 0, "maintain_rate": None, "avg_existing_lx": None,
+                            "avg_recommended_lx": None, "avg_delta_percent": None,
+                            "avg_saving_percent": None, "kwh_saved": None})
+        else:
+            summary.update({
+                "installed_grids": int(sums["installed_grids"]),
+                "maintain_rate": round(sums["maintained"] / grids * 100.0, 2),
+                "avg_existing_lx": round(sums["existing_lx_sum"] / grids, 1),
+                "avg_recommended_lx": round(sums["recommended_lx_sum"] / grids, 1),
+                "avg_delta_percent": round(sums["delta_percent_sum"] / grids, 1),
+                "avg_saving_percent": round(sums["saving_ratio_sum"] / grids * 100.0, 2),
+                "kwh_saved": round(self._kwh(sums, watt, hours), 3),
+            })
+        if level == "sigungu":
+            summary["dongs"] = [
+                {"code": d, "name": regions.dong_name(d), "grids": int(self._region_rollups[d]["grids"])}
+                for d in (sums or {}).get("dongs", [])
+            ]
+        return summary
+
+    def review_queue(self, min_spread: float, limit: int) -> Dict:
+        """
+        Grids where the ensemble members disagree the most (candidates for manual review).
+
+        The ensemble runs once per table revision over every grid; the table's own
+        columns are reused when it was built with the ensemble engine.
+        """
+        self.load()
+        ens = self._ensemble_cached(self.revision)
+        flagged = ens[ens["spread_lx"] >= min_spread].sort_values("spread_lx", ascending=False)
+        member_cols = [c for c in ens.columns if c.endswith("_lx") and c not in
+                       ("existing_lx", "recommended_lx", "model_lx", "spread_lx")]
+        grids = []
+        for grid_id, row in flagged.head(limit).iterrows():
+            grids.append({
+                "grid_id": grid_id,
+                "existing_lx": round(float(row["existing_lx"]), 1),
+                "recommended_lx": round(float(row["recommended_lx"]), 1),
+                "spread_lx": round(float(row["spread_lx"]), 2),
+                "members": {c[:-3]: round(float(row[c]), 1) for c in member_cols},
+            })
+        return {
+            "engine": "ensemble",
+            "min_spread": min_spread,
+            "grids_total": len(ens),
+            "flagged": len(flagged),
+            "grids": grids,
+        }
+
+    def _compute_ensemble(self, revision: int) -> pd.DataFrame:
+        if RECO_ENGINE == "ensemble":
+            return self._df
+        return predict_batch(self._features, engine="ensemble")
+
+    def scenario(
+        self,
+        weights: Dict[str, float],
+        watt: float,
+        hours: float,
+        include_grids: bool = True,
+    ) -> Dict:
+        """
+        Re-run the rule for every grid with the given weights (cached per scenario, LRU).
+        """
+        self.load()
+        key = tuple(sorted((k, round(float(v), 4)) for k, v in weights.items()))
+        return self._scenario_cached(self.revision, key, float(watt), float(hours), include_grids)
+
+    def _compute_scenario(
+        self,
+        revision: int,
+        weights_key: Tuple,
+        watt: float,
+        hours: float,
+        include_grids: bool,
+    ) -> Dict:
+        features = self._features
+        recommended_lx, delta_percent = compute_rule_recommended(features, dict(weights_key))
+        existing_lx = features["existing_lx"].to_numpy(dtype=float)
+
+        saving_ratio = np.clip(1.0 - recommended_lx / existing_lx, 0.0, 1.0)
+        grids = len(saving_ratio)
+        installed_kw = self._df["installed_kw"].reindex(features.index).to_numpy(dtype=float)
+        kw = np.where(np.isnan(installed_kw), watt / 1000.0, installed_kw)
+
+        result = {
+            "weights": dict(weights_key),
+            "watt": watt,
+            "hours": hours,
+            "grids": grids,
+            "maintain_rate": round(float(np.isclose(recommended_lx, existing_lx).mean()) * 100.0, 2),
+            "avg_saving_percent": round(float(saving_ratio.mean()) * 100.0, 2),
+            "kwh_saved": round(float((saving_ratio * kw).sum()) * hours, 3),
+        }
+        if include_grids:
+            result["grid_id"] = features.index.tolist()
+            result["recommended_lx"] = np.round(recommended_lx, 1).tolist()
+            result["delta_percent"] = np.round(delta_percent, 1).tolist()
+        return result
+
+
+# Global instance
+_reco_table = RecoTable()
+
+def get_reco_table() -> RecoTable:
+    """Get the global recommendation table instance."""
+    return _reco_table
@@ -0,0 +1,148 @@
+import re
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from typing import Dict, Optional, Tuple
+from core.config import GRID_DISTRICT, GRID_REGIONS_FILE, REGION_CODES_FILE, REGION_MATCH_MAX_M
+from core.grid_topology import is_lattice_id
+from core.metrics import load_timer
+
+# Equirectangular approximation, same as pipeline/geo_utils.py
+M_PER_DEG_LAT = 110_540.0
+M_PER_DEG_LON_EQ = 111_320.0
+
+
+def normalize_region_code(code: str) -> Optional[Tuple[str, str]]:
+    """
+    Parse a region code into (level, code).
+
+    5 digits -> ("sigungu", code), 10 digit legal dong code -> ("dong", code).
+    8 digit EMD_CD codes are padded to 10 digits. Returns None if unparseable.
+    """
+    digits = re.sub(r"\D", "", str(code))
+    if len(digits) == 5:
+        return "sigungu", digits
+    if len(digits) == 8:
+        digits += "00"
+    if len(digits) == 10:
+        return "dong", digits
+    return None
+
+
+class RegionIndex:
+    """
+    Gu / legal dong names and the grid cell -> region assignment.
+
+    Codes come from seoul_eupmyeondong_codes.csv. Cell assignments come from
+    pipeline/make_region_assignment.py (grid_regions_250m.csv); without that file
+    every grid falls back to GRID_DISTRICT at gu level only and dong level
+    lookups are unavailable (see has_assignment).
+    """
+
+    def __init__(self):
+        self._sigungu: Optional[Dict[str, str]] = None  # sigungu_cd -> name
+        self._dong: Dict[str, Tuple[str, str]] = {}     # bjdong_cd -> (sigungu_nm, dong_nm)
+        self._cell_tree: Optional[cKDTree] = None
+        self._cell_codes = None
+        self._cell_ids = None  # Sorted lattice grid ids of the assignment file
+        self._cell_id_codes = None
+
+    def load(self):
+        """Load the code table and (if present) the cell assignment file."""
+        if self._sigungu is not None:
+            return
+        with load_timer("regions"):
+            codes = pd.read_csv(REGION_CODES_FILE, dtype=str, encoding="utf-8-sig")
+            sigungu = {}
+            for sigungu_nm, dong_nm, bjdong_cd in codes[["시군구명", "읍면동명", "법정동코드"]].itertuples(index=False):
+                bjdong_cd = str(bjdong_cd).strip()
+                self._dong[bjdong_cd] = (sigungu_nm, dong_nm)
+                sigungu[bjdong_cd[:5]] = sigungu_nm
+
+            if GRID_REGIONS_FILE.exists():
+                cells = pd.read_csv(GRID_REGIONS_FILE, usecols=["grid_id", "lat", "lon", "bjdong_cd"],
+                                    dtype={"grid_id": np.int64, "bjdong_cd": str}, encoding="utf-8-sig")
+                cells = cells[cells["bjdong_cd"].fillna("").str.len() == 10]
+                self._cell_tree = cKDTree(self._to_xy(cells["lat"].to_numpy(), cells["lon"].to_numpy()))
+                self._cell_codes = cells["bjdong_cd"].to_numpy(dtype=object)
+                order = np.argsort(cells["grid_id"].to_numpy(), kind="stable")
+                self._cell_ids = cells["grid_id"].to_numpy()[order]
+                self._cell_id_codes = self._cell_codes[order]
+                print(f"Loaded region assignment for {len(cells)} cells")
+            else:
+                print(f"Region assignment not found ({GRID_REGIONS_FILE.name}); using {GRID_DISTRICT} for all grids")
+        self._sigungu = sigungu
+
+    @property
+    def has_assignment(self) -> bool:
+        """Whether a cell -> legal dong assignment is loaded."""
+        self.load()
+        return self._cell_codes is not None and len(self._cell_codes) > 0
+
+    @staticmethod
+    def _to_xy(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        # The reference latitude only scales x, Seoul spans ~0.3 degrees
+        return np.column_stack([lon * M_PER_DEG_LON_EQ * np.cos(np.radians(37.55)), lat * M_PER_DEG_LAT])
+
+    def assign(self, lat: np.ndarray, lon: np.ndarray, grid_ids=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gu and legal dong code per point ("" if unknown).
+
+        Points with an NTL lattice grid id take that cell's region directly (same
+        keys as grid_regions_250m.csv); the others the region of the nearest
+        assigned 250m cell within REGION_MATCH_MAX_M. Note that the Seongsu pilot
+        grids (ids 0..108) have no real location, so their dong comes from the
+        generated layout in GridDataLoader.get_grid_with_coordinates.
+        """
+        n = len(lat)
+        if not self.has_assignment:
+            sigungu_cd = next((cd for cd, nm in self._sigungu.items() if nm == GRID_DISTRICT), "")
+            return np.full(n, sigungu_cd, dtype=object), np.full(n, "", dtype=object)
+
+        dong = np.full(n, "", dtype=object)
+        nearest = np.ones(n, dtype=bool)
+        if grid_ids is not None:
+            ids = np.asarray(grid_ids, dtype=np.int64)
+            lattice = is_lattice_id(ids)
+            pos = np.minimum(np.searchsorted(self._cell_ids, ids), len(self._cell_ids) - 1)
+            found = lattice & (self._cell_ids[pos] == ids)
+            dong[found] = self._cell_id_codes[pos[found]]
+            nearest = ~lattice
+
+        if nearest.any():
+            xy = self._to_xy(np.asarray(lat, dtype=float)[nearest], np.asarray(lon, dtype=float)[nearest])
+            d, j = self._cell_tree.query(xy, distance_upper_bound=REGION_MATCH_MAX_M)
+            ok = np.isfinite(d)
+            dong[np.flatnonzero(nearest)[ok]] = self._cell_codes[j[ok]]
+        sigungu = np.array([c[:5] for c in dong], dtype=object)
+        return sigungu, dong
+
+    def describe(self, level: str, code: str) -> Optional[Dict]:
+        """Names for a region code, or None if the code is not a Seoul gu/legal dong."""
+        self.load()
+        if level == "sigungu":
+            if code not in self._sigungu:
+                return None
+            return {"code": code, "level": level, "name": self._sigungu[code],
+                    "sigungu_cd": code, "sigungu_nm": self._sigungu[code]}
+        if code not in self._dong:
+            return None
+        sigungu_nm, dong_nm = self._dong[code]
+        return {"code": code, "level": level, "name": f"{sigungu_nm} {dong_nm}",
+                "sigungu_cd": code[:5], "sigungu_nm": sigungu_nm, "dong_nm": dong_nm}
+
+    def sigungu_name(self, code: str) -> str:
+        self.load()
+        return self._sigungu.get(code, "")
+
+    def dong_name(self, code: str) -> str:
+        self.load()
+        return self._dong.get(code, ("", ""))[1]
+
+
+# Global instance
+_region_index = RegionIndex()
+
+def get_region_index() -> RegionIndex:
+    """Get the global region index."""
+    return _region_index
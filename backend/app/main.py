@@ -1,8 +1,16 @@
-from fastapi import FastAPI
+import time
+_import_start = time.perf_counter()
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from api.routes import router
-from core.model_loader import get_model
-from data.grid_loader import get_grid_loader
+from api.routes import ops_router, router
+from core.config import FAST_START
+from core.metrics import get_metrics
+from core.profiling import profiling_enabled, profiling_middleware
+from core.warmup import get_warmup, mark_process_start
+
+# Model/data modules (pandas, joblib, LightGBM) are imported by the warm-up steps
+mark_process_start(_import_start)
 
 # Create FastAPI app
 app = FastAPI(
@@ -26,35 +34,61 @@ app.add_middleware(
 )
 
 # Include routes
+app.include_router(ops_router)
 app.include_router(router)
 
+get_metrics().load_seconds.set(time.perf_counter() - _import_start, target="app_import")
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and record latency per route template."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        metrics = get_metrics()
+        metrics.requests_total.inc(route=path, method=request.method, status=str(status))
+        metrics.request_seconds.observe(time.perf_counter() - start, route=path, method=request.method)
+
+
+# Opt-in profiling: the middleware is only installed when DIMMING_ADMIN_TOKEN is set
+if profiling_enabled():
+    app.middleware("http")(profiling_middleware)
+
 
 @app.on_event("startup")
 async def startup_event():
-    """Load model and data on startup."""
+    """Load model and data on startup (in the background when DIMMING_FAST_START=1)."""
     print("=" * 50)
     print("Starting Seoul Dimming Recommendation API...")
     print("=" * 50)
     
-    # Pre-load model
-    try:
-        model = get_model()
-        print(f"✓ Model loaded successfully")
-    except Exception as e:
-        print(f"✗ Error loading model: {e}")
-        raise
+    warmup = get_warmup()
+    
+    if FAST_START:
+        # Accept traffic right away; /health/ready turns 200 once loading is done
+        warmup.start_background()
+        print(f"Fast start: serving after {time.perf_counter() - _import_start:.3f}s, "
+              f"loading model/data in the background (see /health/ready)")
+        print("=" * 50)
+        return
     
-    # Pre-load grid data
+    # Pre-load model, grid data and the recommendation table (savings aggregates)
     try:
-        grid_loader = get_grid_loader()
-        grid_loader.load_data()
-        print(f"✓ Grid data loaded successfully")
+        warmup.run()
+        print(f"✓ Model, grid data and recommendation table loaded successfully")
     except Exception as e:
-        print(f"✗ Error loading grid data: {e}")
+        print(f"✗ Error during startup: {e}")
         raise
     
     print("=" * 50)
-    print("API is ready!")
+    print(f"API is ready! ({warmup.ready_seconds:.2f}s after start)")
     print("API Docs: http://localhost:8000/docs")
     print("=" * 50)
 
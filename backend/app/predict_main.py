@@ -0,0 +1,23 @@
+"""
+Entry module for the api.py /predict app.
+
+app/api.py is shadowed by the app/api/ package (api.routes), so `uvicorn api:app`
+resolves to the package. Run this module instead:
+
+    cd backend/app && uvicorn predict_main:app --port 8001
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+_spec = importlib.util.spec_from_file_location("api_app", Path(__file__).resolve().parent / "api.py")
+_module = importlib.util.module_from_spec(_spec)
+sys.modules["api_app"] = _module
+_spec.loader.exec_module(_module)
+
+app = _module.app
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,279 @@
+"""
+Benchmarks for the backend hot paths.
+
+    # Run every case at every size and write a JSON result file
+    python backend/benchmarks/bench.py run --out backend/benchmarks/results/latest.json
+
+    # Keep a run as the baseline
+    python backend/benchmarks/bench.py run --out backend/benchmarks/results/baseline.json
+
+    # Fail (exit 1) when a case got slower than the baseline by more than 20%, or when a
+    # baseline case is missing in the current run (--allow_missing to only report those)
+    python backend/benchmarks/bench.py compare backend/benchmarks/results/baseline.json \
+        backend/benchmarks/results/latest.json --threshold 0.2
+
+Sizes:
+    seongsu  110 pilot grid cells (grid_features_final_seoungsu.csv)
+    seoul    ~15k Seoul 250m cells (grid ids of the NTL point file, features resampled from Seongsu)
+    1m       1M synthetic rows (features resampled from Seongsu)
+
+build_reasons_from_contrib runs on at most REASON_ROWS rows of each size, and the
+row-by-row grid list is skipped above MAX_ROWS (--no_caps runs both in full).
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+HERE = Path(__file__).resolve().parent
+BACKEND = HERE.parent
+sys.path.insert(0, str(BACKEND / "app"))
+sys.path.insert(0, str(BACKEND / "models" / "recommend_model"))
+
+from core.config import FEATURE_ORDER, NTL_GRID_FILE  # noqa: E402
+from core.grid_topology import smooth_values  # noqa: E402
+from core.model_loader import get_model  # noqa: E402
+from core.predictor import predict_recommendation, predict_batch  # noqa: E402
+from core.rules import compute_rule_recommended  # noqa: E402
+from data.grid_loader import GridDataLoader  # noqa: E402
+from predict import build_reasons_from_contrib  # noqa: E402
+
+RESULTS_DIR = HERE / "results"
+SIZES = ["seongsu", "seoul", "1m"]
+SYNTHETIC_ROWS = 1_000_000
+LOOKUPS = 200  # Single-call cases are timed over this many calls per repeat
+
+# Per-case row caps: sizes above the cap are skipped
+MAX_ROWS = {
+    "get_grids_for_api": 15_000,  # Row-by-row iterrows
+}
+# LightGBM TreeSHAP costs several ms per row, so reasons are timed on the first N rows
+REASON_ROWS = 2_000
+
+
+# =========================
+# Data
+# =========================
+def make_loader(size: str, seed: int = 42) -> GridDataLoader:
+    """GridDataLoader whose grid table has the rows of the given size."""
+    loader = GridDataLoader()
+    loader.load_data()
+    if size == "seongsu":
+        return loader
+
+    base = loader._grids_df
+    if size == "seoul":
+        grid_ids = pd.read_csv(NTL_GRID_FILE, usecols=["grid_id"])["grid_id"].to_numpy()
+    elif size == "1m":
+        grid_ids = np.arange(SYNTHETIC_ROWS, dtype=np.int64)
+    else:
+        raise ValueError(f"Unknown size: {size}")
+
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), size=len(grid_ids))].reset_index(drop=True)
+    df["grid_id"] = grid_ids
+    for col in ["traffic_01_02", "traffic_02_03", "traffic_03_04"]:
+        df[col] = (df[col] * rng.uniform(0.5, 1.5, size=len(df))).round()
+    df["cctv_density"] = np.clip(df["cctv_density"] + rng.uniform(0.0, 0.3, size=len(df)), 0.0, 1.0)
+    loader._grids_df = df
+    return loader
+
+
+# =========================
+# Timing
+# =========================
+def time_case(fn: Callable[[], None], repeat: int, max_seconds: float) -> List[float]:
+    """
+    Run fn up to `repeat` times (at least once, stops early past max_seconds).
+    No separate warm-up run: the model and data are already loaded by make_loader/build_cases.
+    """
+    times = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        if time.perf_counter() - started > max_seconds:
+            break
+    return times
+
+
+def build_cases(loader: GridDataLoader, features: pd.DataFrame, rows: int,
+                no_caps: bool = False, seed: int = 0) -> Dict[str, Dict]:
+    """Benchmark cases for one data size: name -> {fn, rows, calls}."""
+    model = get_model()
+    rng = np.random.default_rng(seed)
+    sample_ids = features.index[rng.integers(0, len(features), size=LOOKUPS)].tolist()
+    sample_features = [features.loc[gid].to_dict() for gid in sample_ids]
+
+    def single_predict():
+        for gid, feats in zip(sample_ids, sample_features):
+            predict_recommendation(gid, feats)
+
+    def grid_lookup():
+        for gid in sample_ids:
+            loader.get_grid_features(gid)
+
+    X = features[FEATURE_ORDER] if no_caps else features[FEATURE_ORDER].iloc[:REASON_ROWS]
+    raster = loader.get_raster(features.index.tolist())
+    ratio = rng.uniform(0.2, 1.0, size=len(features))
+
+    return {
+        "predict_recommendation": {"fn": single_predict, "rows": rows, "calls": LOOKUPS},
+        "predict_batch": {"fn": lambda: predict_batch(features), "rows": rows, "calls": 1},
+        "predict_batch_ensemble": {
+            "fn": lambda: predict_batch(features, engine="ensemble"),
+            "rows": rows,
+            "calls": 1,
+        },
+        "get_grid_features": {"fn": grid_lookup, "rows": rows, "calls": LOOKUPS},
+        "get_grids_for_api": {"fn": loader.get_grids_for_api, "rows": rows, "calls": 1},
+        "build_reasons_from_contrib": {
+            "fn": lambda: build_reasons_from_contrib(model, X, FEATURE_ORDER),
+            "rows": len(X),
+            "calls": 1,
+        },
+        "compute_rule_recommended": {"fn": lambda: compute_rule_recommended(features), "rows": rows, "calls": 1},
+        "smooth_values": {"fn": lambda: smooth_values(raster, ratio, radius=1), "rows": rows, "calls": 1},
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# =========================
+# Commands
+# =========================
+def run(args) -> int:
+    sizes = args.sizes.split(",")
+    only = set(args.cases.split(",")) if args.cases else None
+
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "cases": {},
+    }
+
+    for size in sizes:
+        t0 = time.perf_counter()
+        loader = make_loader(size)
+        features = loader.get_all_features()
+        rows = len(features)
+        print(f"\n[{size}] {rows:,} rows (setup {time.perf_counter() - t0:.1f}s)")
+
+        for name, case in build_cases(loader, features, rows, args.no_caps).items():
+            if only and name not in only:
+                continue
+            cap = MAX_ROWS.get(name)
+            if cap is not None and rows > cap and not args.no_caps:
+                print(f"  {name:<28} skipped ({rows:,} rows > cap {cap:,})")
+                continue
+
+            times = time_case(case["fn"], args.repeat, args.max_seconds)
+            median = statistics.median(times)
+            entry = {
+                "case": name,
+                "size": size,
+                "rows": case["rows"],
+                "calls": case["calls"],
+                "repeats": len(times),
+                "min_s": min(times),
+                "median_s": median,
+                "per_call_us": median / case["calls"] * 1e6,
+            }
+            results["cases"][f"{name}@{size}"] = entry
+            print(f"  {name:<28} median {median * 1000:10.2f} ms  "
+                  f"({entry['per_call_us']:,.1f} us/call, {len(times)} runs)")
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"\nSaved: {out}")
+    return 0
+
+
+def compare(args) -> int:
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["cases"]
+    current = json.loads(Path(args.current).read_text(encoding="utf-8"))["cases"]
+    metric = args.metric
+
+    regressions = []
+    missing = []
+    print(f"{'case':<42} {'baseline':>12} {'current':>12} {'change':>8}")
+    for key in sorted(set(baseline) | set(current)):
+        if key not in baseline or key not in current:
+            where = "baseline" if key not in baseline else "current"
+            print(f"{key:<42} {'(missing in ' + where + ')':>34}")
+            if key not in current:
+                missing.append(key)
+            continue
+        b = baseline[key][metric]
+        c = current[key][metric]
+        change = (c - b) / b if b > 0 else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:<42} {b * 1000:10.2f}ms {c * 1000:10.2f}ms {change * 100:+7.1f}%{flag}")
+
+    failed = False
+    if missing:
+        # A case that stopped running (renamed, crashed, --cases/--sizes subset) hides regressions
+        print(f"\n{len(missing)} baseline case(s) missing in the current run: " + ", ".join(missing))
+        failed = not args.allow_missing
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than baseline by more than {args.threshold * 100:.0f}%: "
+              + ", ".join(regressions))
+        return 1
+    if failed:
+        return 1
+    print(f"\nNo regressions over {args.threshold * 100:.0f}%")
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Backend hot path benchmarks")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Run the benchmarks and save results as JSON")
+    p_run.add_argument("--sizes", default=",".join(SIZES), help=f"Comma separated ({', '.join(SIZES)})")
+    p_run.add_argument("--cases", default=None, help="Comma separated case names (default: all)")
+    p_run.add_argument("--repeat", type=int, default=5)
+    p_run.add_argument("--max_seconds", type=float, default=30.0, help="Stop repeating a case after this long")
+    p_run.add_argument("--no_caps", action="store_true", help="Ignore MAX_ROWS / REASON_ROWS")
+    p_run.add_argument("--out", default=str(RESULTS_DIR / "latest.json"))
+    p_run.set_defaults(func=run)
+
+    p_cmp = sub.add_parser("compare", help="Compare two result files, exit 1 on regressions or missing cases")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown ratio (0.2 = +20%%)")
+    p_cmp.add_argument("--metric", choices=["median_s", "min_s"], default="median_s")
+    p_cmp.add_argument("--allow_missing", action="store_true",
+                       help="Do not fail when baseline cases are missing in the current run")
+    p_cmp.set_defaults(func=compare)
+
+    args = ap.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""
+Async load generator for the FastAPI service.
+
+    # In-process (main.py routes and the api.py /predict app run inside this process)
+    python backend/benchmarks/loadtest.py --concurrency 16 --duration 30 --out loadtest.json
+
+    # Against running servers (one uvicorn worker each)
+    #   cd backend/app && uvicorn main:app --port 8000
+    #   cd backend/app && uvicorn predict_main:app --port 8001
+    python backend/benchmarks/loadtest.py --url http://127.0.0.1:8000 --predict_url http://127.0.0.1:8001
+
+Traffic (picked per iteration by --mix weights):
+    reco     GET /api/reco?grid_id=<random grid of the loaded table>
+    pan      map pan: --burst concurrent GET /api/grids requests
+    predict  POST /predict with the features of a random grid
+
+Reports throughput, latency percentiles and error rate per endpoint (and overall)
+as JSON. In-process runs share the CPU with the client, so compare in-process runs
+with in-process runs only. Requires httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+HERE = Path(__file__).resolve().parent
+APP_DIR = HERE.parent / "app"
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(HERE))
+
+from bench import git_commit  # noqa: E402
+
+DEFAULT_MIX = "reco=6,pan=1,predict=3"
+PERCENTILES = (50, 90, 99)
+
+
+# =========================
+# Stats
+# =========================
+class LoadStats:
+    """Latencies and errors per endpoint, recorded only while measuring."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.status: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.recording = False
+
+    def record(self, endpoint: str, seconds: float, status: Optional[int]):
+        if not self.recording:
+            return
+        self.latencies[endpoint].append(seconds)
+        self.status[endpoint][str(status) if status is not None else "exception"] += 1
+        if status is None or status >= 400:
+            self.errors[endpoint] += 1
+
+    @staticmethod
+    def _summary(latencies: List[float], errors: int, elapsed: float) -> Dict:
+        n = len(latencies)
+        arr = np.asarray(latencies) * 1000.0
+        out = {
+            "requests": n,
+            "errors": errors,
+            "error_rate": errors / n if n else 0.0,
+            "rps": n / elapsed if elapsed > 0 else 0.0,
+        }
+        if n:
+            out["latency_ms"] = {
+                "mean": float(arr.mean()),
+                **{f"p{p}": float(np.percentile(arr, p)) for p in PERCENTILES},
+                "max": float(arr.max()),
+            }
+        return out
+
+    def summary(self, elapsed: float) -> Dict:
+        endpoints = {
+            ep: {**self._summary(lat, self.errors[ep], elapsed), "status": dict(self.status[ep])}
+            for ep, lat in sorted(self.latencies.items())
+        }
+        all_lat = [x for lat in self.latencies.values() for x in lat]
+        return {
+            "elapsed_s": elapsed,
+            "overall": self._summary(all_lat, sum(self.errors.values()), elapsed),
+            "endpoints": endpoints,
+        }
+
+
+# =========================
+# Traffic
+# =========================
+async def timed(stats: LoadStats, endpoint: str, client, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    status = None
+    try:
+        response = await client.request(method, url, **kwargs)
+        status = response.status_code
+    except Exception:
+        # Transport errors, timeouts and anything the app raised: counted as "exception"
+        pass
+    finally:
+        stats.record(endpoint, time.perf_counter() - start, status)
+
+
+async def worker(args, clients: Dict, grid_ids: List[str], payloads: List[Dict],
+                 stats: LoadStats, mix: Dict[str, float], deadline: float, seed: int):
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        kind = rng.choices(names, weights)[0]
+        if kind == "reco":
+            gid = rng.choice(grid_ids)
+            await timed(stats, "GET /api/reco", clients["main"], "GET", "/api/reco", params={"grid_id": gid})
+        elif kind == "pan":
+            await asyncio.gather(*[
+                timed(stats, "GET /api/grids", clients["main"], "GET", "/api/grids", params={"area": args.area})
+                for _ in range(args.burst)
+            ])
+        elif kind == "predict":
+            await timed(stats, "POST /predict", clients["predict"], "POST", "/predict", json=rng.choice(payloads))
+        if args.think_ms:
+            await asyncio.sleep(rng.uniform(0, 2 * args.think_ms) / 1000.0)
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("reco", "pan", "predict"):
+            raise ValueError(f"Unknown traffic type in --mix: {name}")
+        mix[name] = float(weight or 1)
+    return {k: v for k, v in mix.items() if v > 0}
+
+
+def predict_payloads(n: int = 500, seed: int = 0) -> List[Dict]:
+    """/predict request bodies built from the features of random grid cells."""
+    from data.grid_loader import get_grid_loader
+
+    features = get_grid_loader().get_all_features()
+    rows = features.sample(n=n, replace=True, random_state=seed)
+    payloads = rows.to_dict(orient="records")
+    for p in payloads:
+        p["park_within"] = int(p["park_within"])
+    return payloads
+
+
+# =========================
+# Run
+# =========================
+async def run(args) -> Dict:
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.concurrency * args.burst)
+
+    async with open_clients(args, mix, limits) as clients:
+        grid_ids = []
+        if "main" in clients:
+            response = await clients["main"].get("/api/grids", params={"area": args.area})
+            response.raise_for_status()
+            grid_ids = [g["grid_id"] for g in response.json()]
+            if not grid_ids:
+                raise RuntimeError("/api/grids returned no grid cells")
+        payloads = predict_payloads() if "predict" in mix else []
+
+        stats = LoadStats()
+        start = time.perf_counter()
+        deadline = start + args.warmup + args.duration
+
+        async def start_recording():
+            await asyncio.sleep(args.warmup)
+            stats.recording = True
+            return time.perf_counter()
+
+        recorder = asyncio.create_task(start_recording())
+        await asyncio.gather(*[
+            worker(args, clients, grid_ids, payloads, stats, mix, deadline, seed=args.seed + i)
+            for i in range(args.concurrency)
+        ])
+        measured_from = await recorder
+        elapsed = time.perf_counter() - measured_from
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "mode": "http" if args.url else "in-process",
+            "url": args.url,
+            "predict_url": args.predict_url,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "mix": mix,
+            "burst": args.burst,
+            "think_ms": args.think_ms,
+        },
+        **stats.summary(elapsed),
+    }
+
+
+@asynccontextmanager
+async def open_clients(args, mix: Dict[str, float], limits):
+    """{"main": client, "predict": client} for the in-process apps or the given URLs."""
+    need_main = bool({"reco", "pan"} & set(mix))
+    need_predict = "predict" in mix
+
+    async with AsyncExitStack() as stack:
+        clients = {}
+        if args.url:
+            if need_main:
+                clients["main"] = await stack.enter_async_context(
+                    httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout))
+            if need_predict:
+                clients["predict"] = await stack.enter_async_context(
+                    httpx.AsyncClient(base_url=args.predict_url or args.url, limits=limits, timeout=args.timeout))
+            yield clients
+            return
+
+        # In-process: run the startup handlers through the lifespan, then talk ASGI directly
+        apps = {}
+        if need_main:
+            from main import app as main_app
+            apps["main"] = main_app
+        if need_predict:
+            # app/api.py is shadowed by the app/api/ package, predict_main loads it by path
+            from predict_main import app as predict_app
+            apps["predict"] = predict_app
+
+        for name, app in apps.items():
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            clients[name] = await stack.enter_async_context(
+                # Unhandled app errors become 500 responses, as behind a real server
+                httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+                                  base_url="http://loadtest",
+                                  limits=limits, timeout=args.timeout))
+        yield clients
+
+
+def print_summary(result: Dict):
+    print(f"\n{'endpoint':<18} {'req':>7} {'rps':>8} {'err%':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}  (ms)")
+    rows = list(result["endpoints"].items()) + [("overall", result["overall"])]
+    for name, s in rows:
+        lat = s.get("latency_ms", {})
+        print(f"{name:<18} {s['requests']:>7} {s['rps']:>8.1f} {s['error_rate'] * 100:>6.2f} "
+              + " ".join(f"{lat.get(k, float('nan')):>8.2f}" for k in ("p50", "p90", "p99", "max")))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Async load test for the dimming API")
+    ap.add_argument("--url", default=None, help="Base URL of a running main.py server (default: in-process)")
+    ap.add_argument("--predict_url", default=None, help="Base URL of a running api.py server (default: --url)")
+    ap.add_argument("--concurrency", type=int, default=8, help="Concurrent virtual users")
+    ap.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    ap.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before measuring")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help="Traffic weights, e.g. reco=6,pan=1,predict=3")
+    ap.add_argument("--burst", type=int, default=4, help="Concurrent /api/grids requests per map pan")
+    ap.add_argument("--think_ms", type=float, default=0.0, help="Mean pause between iterations per user")
+    ap.add_argument("--area", default="seongsu")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", default=None, help="Write the JSON result here (default: stdout only)")
+    args = ap.parse_args()
+
+    if httpx is None:
+        print("httpx is required: pip install httpx", file=sys.stderr)
+        return 2
+
+    result = asyncio.run(run(args))
+    print_summary(result)
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"\nSaved: {out}")
+    else:
+        print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
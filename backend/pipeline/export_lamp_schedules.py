@@ -0,0 +1,421 @@
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from geo_utils import LAT_CANDIDATES, LON_CANDIDATES, PROCESSED, cell_keys, find_col, in_seoul
+from make_streetlight_inventory import DEFAULT_LAMPS_OUT, LAMP_ID_CANDIDATES
+from shard_io import iter_all_blocks, list_shards, peak_rss_mb
+from simulate_savings import DEFAULT_INPUT, NIGHT_START_HOUR, N_SLOTS, SLOT_RECO_PREFIX
+
+# =========================
+# 설정
+# =========================
+DEFAULT_LAMPS = DEFAULT_LAMPS_OUT    # 가로등별 lamp_id, grid_id (make_streetlight_inventory.py). 위경도만 있는 원본도 가능
+DEFAULT_OUT = PROCESSED / "lamp_schedules.bin"
+DEFAULT_STATE = PROCESSED / "lamp_schedules_state.npy"      # 직전 export의 (lamp_key, schedule_hash, lamp_id)
+
+LAMP_BLOCK_ROWS = 100_000
+DIM_START_HOUR = 23   # 시간대별 추천이 없을 때 디밍 시작 시각(keep_hours 동안 유지)
+DEFAULT_KEEP_HOURS = 3
+FULL_LEVEL = 100
+
+LAMP_ID_BYTES = 24
+STATE_BUCKETS = 64    # 상태 키 상위 6bit 구간별 임시 파일. 정렬 시 메모리 = 구간 1개(가로등 수 / 64 x 40 byte)
+TOMBSTONE_GRID_ID = -1   # 직전 export 이후 사라진 가로등 레코드(levels는 100%)
+
+# 고정 길이 레코드(49 byte): lamp_id(utf-8, 0 padding) + grid_id + 슬롯별 밝기(%)
+# grid_id == TOMBSTONE_GRID_ID 이면 삭제된 가로등
+RECORD_DTYPE = np.dtype([
+    ("lamp_id", f"S{LAMP_ID_BYTES}"),
+    ("grid_id", "<i8"),
+    ("levels", "u1", (N_SLOTS,)),
+])
+STATE_DTYPE = np.dtype([("key", "<u8"), ("hash", "<u8"), ("lamp_id", f"S{LAMP_ID_BYTES}")])
+SLOT_HOURS = (NIGHT_START_HOUR + np.arange(N_SLOTS)) % 24
+LEVEL_COLS = [f"level_{h:02d}" for h in SLOT_HOURS]
+
+
+class GridSchedules:
+    """
+    격자별 야간 슬롯 밝기(기존 조도 대비 %, uint8) 표. grid_id 정렬 배열 + searchsorted로 조회.
+    - recommended_lx_hHH 컬럼이 있으면 그 슬롯은 해당 추천값
+    - 없는 슬롯은 DIM_START_HOUR부터 keep_hours 동안 recommended_lx, 나머지는 100%
+    """
+
+    def __init__(self, reco: pd.DataFrame, dim_start: int = DIM_START_HOUR, keep_hours: Optional[float] = None):
+        reco = reco.drop_duplicates("grid_id", keep="last")
+        existing = reco["existing_lx"].to_numpy(dtype=np.float64)
+        base = reco["recommended_lx"].to_numpy(dtype=np.float64)
+
+        if keep_hours is not None:
+            keep = np.full(len(reco), float(keep_hours))
+        elif "keep_hours" in reco.columns:
+            keep = reco["keep_hours"].fillna(DEFAULT_KEEP_HOURS).to_numpy(dtype=np.float64)
+        else:
+            keep = np.full(len(reco), float(DEFAULT_KEEP_HOURS))
+
+        # 슬롯이 디밍 시작 후 몇 시간째인지(자정 넘김 포함)
+        since_start = (SLOT_HOURS - dim_start) % 24
+        in_window = since_start[None, :] < keep[:, None]
+        lx = np.where(in_window, base[:, None], existing[:, None])
+        for s, hour in enumerate(SLOT_HOURS):
+            col = f"{SLOT_RECO_PREFIX}{hour:02d}"
+            if col in reco.columns:
+                hourly = reco[col].to_numpy(dtype=np.float64)
+                lx[:, s] = np.where(np.isnan(hourly), lx[:, s], hourly)
+
+        # 밝히기 금지: 0~100%
+        levels = np.rint(np.clip(lx / existing[:, None], 0.0, 1.0) * FULL_LEVEL)
+        levels = np.where(np.isnan(levels), FULL_LEVEL, levels).astype(np.uint8)
+
+        grid_ids = reco["grid_id"].to_numpy(dtype=np.int64)
+        order = np.argsort(grid_ids, kind="stable")
+        self.grid_ids = grid_ids[order]
+        self.levels = levels[order]
+        self.hourly_cols = [c for c in reco.columns if str(c).startswith(SLOT_RECO_PREFIX)]
+
+    def __len__(self):
+        return len(self.grid_ids)
+
+    def lookup(self, grid_ids: np.ndarray):
+        """격자 id 배열 -> (슬롯별 밝기 (n, N_SLOTS), 추천 있음 여부). 추천 없는 격자는 100% 유지."""
+        grid_ids = np.asarray(grid_ids, dtype=np.int64)
+        pos = np.searchsorted(self.grid_ids, grid_ids)
+        pos_ok = np.minimum(pos, max(len(self.grid_ids) - 1, 0))
+        found = (pos < len(self.grid_ids)) & (self.grid_ids[pos_ok] == grid_ids) if len(self.grid_ids) else np.zeros(len(grid_ids), bool)
+        levels = np.full((len(grid_ids), N_SLOTS), FULL_LEVEL, dtype=np.uint8)
+        levels[found] = self.levels[pos_ok[found]]
+        return levels, found
+
+
+def lamp_keys(lamp_ids: pd.Series) -> np.ndarray:
+    """lamp_id -> uint64 해시(벡터화). 상태 파일은 이 키로 정렬해 둔다."""
+    return pd.util.hash_pandas_object(lamp_ids.astype(str), index=False).to_numpy(dtype=np.uint64)
+
+
+def schedule_hashes(grid_ids: np.ndarray, levels: np.ndarray) -> np.ndarray:
+    """(grid_id, 슬롯 밝기) 행 해시. 격자가 바뀌어도 변경으로 본다."""
+    cols = {"grid_id": grid_ids}
+    cols.update({c: levels[:, j] for j, c in enumerate(LEVEL_COLS)})
+    return pd.util.hash_pandas_object(pd.DataFrame(cols), index=False).to_numpy(dtype=np.uint64)
+
+
+class ScheduleState:
+    """
+    직전 export 상태: lamp_key 정렬된 (key, hash, lamp_id) 배열(가로등당 40 byte)
+    + 실행 순번(.json). 파일은 memmap으로 열어서 block마다 searchsorted로만 조회한다.
+    새 상태는 키 구간(상위 bit)별 임시 파일에 흘려 쓰고, finish에서 구간 순서대로
+    하나씩 정렬해 길이를 아는 .npy memmap에 채운다(전체 키를 메모리에 모으지 않음).
+    새 상태는 commit 전까지 임시 파일이라, 출력 파일을 다 쓰기 전에 실패하면 상태가 그대로다.
+    """
+
+    def __init__(self, path: Optional[Path]):
+        self.prev = None
+        self.sequence = 0
+        if path is not None and Path(path).exists():
+            self.prev = np.load(path, mmap_mode="r")
+            if self.prev.dtype != STATE_DTYPE:
+                print(f"[WARN] 이전 형식의 상태 파일이라 무시하고 전체를 새로 기록: {path}")
+                self.prev = None
+        meta_path = self._meta_path(path) if path is not None else None
+        if meta_path is not None and meta_path.exists():
+            with open(meta_path, encoding="utf-8") as f:
+                self.sequence = int(json.load(f).get("sequence", 0))
+        self._tmp = None
+        tmp_dir = None
+        if path is not None:
+            tmp_dir = Path(path).parent
+            tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._dir = tempfile.mkdtemp(prefix="lamp_state_", dir=tmp_dir)
+        self._files = [None] * STATE_BUCKETS
+        self._shift = np.uint64(64 - int(np.log2(STATE_BUCKETS)))
+
+    @staticmethod
+    def _meta_path(path: Path) -> Path:
+        return Path(path).with_suffix(".json")
+
+    def _bucket_path(self, b: int) -> str:
+        return os.path.join(self._dir, f"{b:03d}.bin")
+
+    def _append(self, keys: np.ndarray, hashes: np.ndarray, lamp_ids: np.ndarray):
+        rec = np.empty(len(keys), dtype=STATE_DTYPE)
+        rec["key"], rec["hash"], rec["lamp_id"] = keys, hashes, lamp_ids
+        bucket = (keys >> self._shift).astype(np.int64)
+        order = np.argsort(bucket, kind="stable")
+        rec, counts = rec[order], np.bincount(bucket, minlength=STATE_BUCKETS)
+        start = 0
+        for b in np.flatnonzero(counts):
+            if self._files[b] is None:
+                self._files[b] = open(self._bucket_path(b), "wb")
+            self._files[b].write(rec[start:start + counts[b]].tobytes())
+            start += counts[b]
+
+    def changed(self, keys: np.ndarray, hashes: np.ndarray, lamp_ids: np.ndarray) -> np.ndarray:
+        """새 가로등이거나 스케줄 해시가 바뀐 행 True. 조회한 키는 새 상태로 기록."""
+        self._append(keys, hashes, lamp_ids)
+        if self.prev is None or not len(self.prev):
+            return np.ones(len(keys), dtype=bool)
+        prev_keys = self.prev["key"]
+        pos = np.searchsorted(prev_keys, keys)
+        pos_ok = np.minimum(pos, len(prev_keys) - 1)
+        same = (prev_keys[pos_ok] == keys) & (self.prev["hash"][pos_ok] == hashes)
+        return ~same
+
+    def finish(self, path: Path, on_removed: Optional[Callable[[np.ndarray], None]] = None) -> dict:
+        """
+        새 상태를 임시 파일로 저장하고 삭제/중복 개수 반환(commit 전까지 상태는 안 바뀜).
+        on_removed: 직전 상태에만 있는(삭제된) 가로등의 lamp_id 배열을 키 구간마다 받는 콜백.
+        """
+        for f in self._files:
+            if f is not None:
+                f.close()
+        sizes = [os.path.getsize(self._bucket_path(b)) // STATE_DTYPE.itemsize if f is not None else 0
+                 for b, f in enumerate(self._files)]
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp.npy")
+        state = np.lib.format.open_memmap(tmp, mode="w+", dtype=STATE_DTYPE, shape=(sum(sizes),))
+        prev_keys = self.prev["key"] if self.prev is not None else np.empty(0, dtype=np.uint64)
+        prev_bounds = np.r_[np.searchsorted(prev_keys, np.arange(STATE_BUCKETS, dtype=np.uint64) << self._shift),
+                            len(prev_keys)]
+
+        dup = removed = 0
+        start = 0
+        for b, n in enumerate(sizes):
+            part = np.fromfile(self._bucket_path(b), dtype=STATE_DTYPE) if n else np.empty(0, dtype=STATE_DTYPE)
+            part.sort(order="key", kind="stable")
+            state[start:start + n] = part
+            start += n
+            dup += int((part["key"][1:] == part["key"][:-1]).sum())
+            # 같은 키 구간의 이전 상태만 비교
+            lo, hi = prev_bounds[b], prev_bounds[b + 1]
+            gone = ~np.isin(prev_keys[lo:hi], part["key"])
+            if gone.any():
+                removed += int(gone.sum())
+                if on_removed is not None:
+                    on_removed(np.asarray(self.prev["lamp_id"][lo:hi][gone]))
+        state.flush()
+        del state
+        shutil.rmtree(self._dir, ignore_errors=True)
+        self._tmp = (tmp, path)
+        return {"lamps": sum(sizes), "removed": removed, "duplicate_ids": dup}
+
+    def commit(self, sequence: int):
+        """finish로 만든 새 상태와 실행 순번을 반영(출력 파일을 다 쓴 뒤 호출)."""
+        tmp, path = self._tmp
+        self.prev = None   # memmap 닫고 교체(Windows)
+        os.replace(tmp, path)
+        meta_tmp = self._meta_path(path).with_name(self._meta_path(path).name + ".tmp")
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump({"sequence": sequence}, f)
+        os.replace(meta_tmp, self._meta_path(path))
+        self.sequence = sequence
+        self._tmp = None
+
+
+def lamp_columns(df: pd.DataFrame, path: Path):
+    """(id 컬럼 | None, 위도 | None, 경도 | None). grid_id가 없으면 위경도로 격자를 직접 배정."""
+    id_col = find_col(df, LAMP_ID_CANDIDATES, "가로등 id", required=False)
+    if "grid_id" in df.columns:
+        return id_col, None, None
+    lat_col = find_col(df, LAT_CANDIDATES, "위도", required=False)
+    lon_col = find_col(df, LON_CANDIDATES, "경도", required=False)
+    if lat_col is None or lon_col is None:
+        raise ValueError(f"가로등 파일에 grid_id도 위경도도 없어: {path}")
+    return id_col, lat_col, lon_col
+
+
+def iter_schedule_records(
+    lamps_path: Path,
+    schedules: GridSchedules,
+    state: ScheduleState,
+    only_changed: bool = True,
+    block_rows: int = LAMP_BLOCK_ROWS,
+    stats: Optional[dict] = None,
+) -> Iterator[np.ndarray]:
+    """
+    가로등 파일을 block 단위로 읽어 RECORD_DTYPE 배열(block당 1개)을 yield.
+    grid_id가 없으면 위경도 -> 250m 격자 키로 배정(make_streetlight_inventory.py 없이도 동작).
+    메모리는 block 크기 + 격자 표 + 직전 상태 memmap 조회로 일정.
+    """
+    stats = stats if stats is not None else {}
+    cols = None
+    row_no = 0
+    for df in iter_all_blocks(lamps_path, block_rows=block_rows):
+        if cols is None:
+            cols = lamp_columns(df, lamps_path)
+        id_col, lat_col, lon_col = cols
+
+        if lat_col is not None:
+            # grid_id가 없는 원본 포인트: make_streetlight_inventory.py와 같은 좌표 필터/격자 키
+            lat = pd.to_numeric(df[lat_col], errors="coerce").to_numpy(dtype=float)
+            lon = pd.to_numeric(df[lon_col], errors="coerce").to_numpy(dtype=float)
+            ok = in_seoul(lat, lon)
+            df = df[ok].assign(grid_id=cell_keys(lat[ok], lon[ok]))
+        if id_col is None:
+            # 관리번호가 없으면 make_streetlight_inventory.py와 같은 행 번호 id
+            df = df.assign(lamp_id=[f"SL{i:07d}" for i in range(row_no, row_no + len(df))])
+            row_no += len(df)
+        df = df.dropna(subset=[id_col or "lamp_id", "grid_id"])
+
+        lamp_ids = df[id_col or "lamp_id"].astype(str).str.strip()
+        encoded = lamp_ids.str.encode("utf-8")
+        too_long = int((encoded.str.len() > LAMP_ID_BYTES).sum())
+        if too_long:
+            raise ValueError(f"lamp_id가 {LAMP_ID_BYTES} byte를 넘는 행이 {too_long}개 있어")
+        encoded = encoded.to_numpy()
+        grid_ids = df["grid_id"].to_numpy(dtype=np.int64)
+        levels, found = schedules.lookup(grid_ids)
+
+        changed = state.changed(lamp_keys(lamp_ids), schedule_hashes(grid_ids, levels), encoded)
+        keep = changed if only_changed else np.ones(len(df), dtype=bool)
+
+        stats["lamps"] = stats.get("lamps", 0) + len(df)
+        stats["changed"] = stats.get("changed", 0) + int(changed.sum())
+        stats["no_reco"] = stats.get("no_reco", 0) + int((~found).sum())
+        if not keep.any():
+            continue
+
+        rec = np.zeros(int(keep.sum()), dtype=RECORD_DTYPE)
+        rec["lamp_id"] = encoded[keep]
+        rec["grid_id"] = grid_ids[keep]
+        rec["levels"] = levels[keep]
+        yield rec
+
+
+def tombstone_records(lamp_ids: np.ndarray) -> np.ndarray:
+    """삭제된 가로등 lamp_id(bytes) -> grid_id가 TOMBSTONE_GRID_ID인 레코드(100% 밝기)."""
+    rec = np.zeros(len(lamp_ids), dtype=RECORD_DTYPE)
+    rec["lamp_id"] = lamp_ids
+    rec["grid_id"] = TOMBSTONE_GRID_ID
+    rec["levels"] = FULL_LEVEL
+    return rec
+
+
+def run_output_path(out_path: Path, sequence: int) -> Path:
+    """실행 순번이 붙은 출력 경로(lamp_schedules.bin -> lamp_schedules.000012.bin)."""
+    return out_path.with_name(f"{out_path.stem}.{sequence:06d}{out_path.suffix}")
+
+
+def to_frame(rec: np.ndarray) -> pd.DataFrame:
+    """레코드 배열 -> CSV용 DataFrame(lamp_id, grid_id, level_HH...)."""
+    df = pd.DataFrame({"lamp_id": np.char.decode(rec["lamp_id"], "utf-8"), "grid_id": rec["grid_id"]})
+    levels = pd.DataFrame(rec["levels"], columns=LEVEL_COLS)
+    return pd.concat([df, levels], axis=1)
+
+
+def read_schedule_bin(path: Path) -> np.ndarray:
+    """export한 .bin 파일을 RECORD_DTYPE memmap으로(컨트롤러 쪽 검증/디버그용)."""
+    if Path(path).stat().st_size == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="격자 추천 -> 가로등별 야간 디밍 스케줄 export(변경분만, 스트리밍)")
+    ap.add_argument("--reco", default=str(DEFAULT_INPUT), help="격자별 추천 결과(grid_id, existing_lx, recommended_lx[, keep_hours, recommended_lx_hHH])")
+    ap.add_argument("--lamps", default=str(DEFAULT_LAMPS), help="가로등 CSV/Parquet 또는 shard 디렉토리(lamp_id, grid_id 또는 위도, 경도)")
+    ap.add_argument("--out", default=str(DEFAULT_OUT), help=".bin이면 고정 길이 binary, .csv면 chunk CSV. 실행 순번이 붙어 저장됨(name.000001.bin)")
+    ap.add_argument("--state", default=str(DEFAULT_STATE), help="직전 export 상태 파일(.npy)")
+    ap.add_argument("--full", action="store_true", help="변경 여부와 상관없이 전체 가로등 export")
+    ap.add_argument("--dim_start", type=int, default=DIM_START_HOUR, help="디밍 시작 시각(시)")
+    ap.add_argument("--keep_hours", type=float, default=None, help="디밍 유지시간(없으면 추천 파일 keep_hours, 그것도 없으면 3)")
+    ap.add_argument("--block_rows", type=int, default=LAMP_BLOCK_ROWS)
+    args = ap.parse_args()
+
+    reco_path, lamps_path = Path(args.reco), Path(args.lamps)
+    if not reco_path.exists():
+        raise FileNotFoundError(f"추천 결과 파일이 없어: {reco_path} (predict.py 먼저 실행해줘)")
+    list_shards(lamps_path)   # 없으면 FileNotFoundError
+
+    t0 = time.perf_counter()
+    reco = pd.concat(iter_all_blocks(reco_path), ignore_index=True)
+    miss = [c for c in ["grid_id", "existing_lx", "recommended_lx"] if c not in reco.columns]
+    if miss:
+        raise ValueError(f"필요 컬럼이 없어: {miss}")
+    schedules = GridSchedules(reco, dim_start=args.dim_start, keep_hours=args.keep_hours)
+    del reco
+
+    state = ScheduleState(Path(args.state))
+    sequence = state.sequence + 1
+    out_path = run_output_path(Path(args.out), sequence)   # 실행마다 새 파일(소비 전 delta를 덮어쓰지 않음)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    binary = out_path.suffix != ".csv"
+    stats = {}
+    counts = {"written": 0, "tombstones": 0}
+
+    # =========================
+    # 스트리밍 export (임시 파일 -> 끝나면 rename, 그 다음 상태 반영)
+    # =========================
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    def write(rec: np.ndarray):
+        if binary:
+            with open(tmp_path, "ab") as f:
+                f.write(rec.tobytes())
+        else:
+            first = not tmp_path.exists()
+            to_frame(rec).to_csv(tmp_path, mode="w" if first else "a", header=first,
+                                 index=False, encoding="utf-8-sig" if first else "utf-8")
+        counts["written"] += len(rec)
+
+    def write_tombstones(lamp_ids: np.ndarray):
+        write(tombstone_records(lamp_ids))
+        counts["tombstones"] += len(lamp_ids)
+
+    for rec in iter_schedule_records(lamps_path, schedules, state, only_changed=not args.full,
+                                     block_rows=args.block_rows, stats=stats):
+        write(rec)
+    state_info = state.finish(Path(args.state), on_removed=write_tombstones)
+    if not tmp_path.exists():
+        if binary:
+            open(tmp_path, "wb").close()
+        else:
+            pd.DataFrame(columns=["lamp_id", "grid_id"] + LEVEL_COLS).to_csv(tmp_path, index=False, encoding="utf-8-sig")
+    os.replace(tmp_path, out_path)
+    written = counts["written"]
+    elapsed = time.perf_counter() - t0
+
+    meta = {
+        "format": "fixed-width binary" if binary else "csv",
+        "record_dtype": str(RECORD_DTYPE.descr) if binary else None,
+        "record_bytes": RECORD_DTYPE.itemsize if binary else None,
+        "slots": [f"{h:02d}:00" for h in SLOT_HOURS],
+        "level_unit": "percent of existing output (100 = no dimming)",
+        "sequence": sequence,
+        "records": written,
+        "tombstones": counts["tombstones"],
+        "tombstone_grid_id": TOMBSTONE_GRID_ID,
+        "only_changed": not args.full,
+        "lamps": stats.get("lamps", 0),
+        "removed_since_previous": state_info["removed"],
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(out_path.with_suffix(out_path.suffix + ".json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    state.commit(sequence)
+
+    print(f"격자 스케줄 {len(schedules):,}개 (시간대별 컬럼 {len(schedules.hourly_cols)}개), "
+          f"가로등 {stats.get('lamps', 0):,}개")
+    print(f"변경 {stats.get('changed', 0):,}개 + 삭제 {counts['tombstones']:,}개 -> 기록 {written:,}개"
+          f"{' (--full)' if args.full else ''}")
+    if stats.get("no_reco"):
+        print(f"[WARN] 추천 없는 격자의 가로등 {stats['no_reco']:,}개는 100% 유지로 기록")
+    if state_info["duplicate_ids"]:
+        print(f"[WARN] 중복 lamp_id {state_info['duplicate_ids']:,}개")
+    print(f"계산 시간: {elapsed:.3f}s, peak RSS: {peak_rss_mb():.1f} MB")
+    print("saved:", out_path, f"({out_path.stat().st_size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
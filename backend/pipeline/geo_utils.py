@@ -0,0 +1,238 @@
+from pathlib import Path
+from typing import List, Optional, Tuple
+import json
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+# =========================
+# 설정
+# =========================
+ROOT = Path(__file__).resolve().parents[2]
+PROCESSED = ROOT / "data" / "processed"
+NTL_GRID_CSV = PROCESSED / "seoul_ntl_2025_grid_points_250m.csv"   # 서울 250m 격자 중심점(grid_id, lat, lon)
+
+# 서울 규모(수십 km)에서는 위경도 -> 평면(m) 등장방형 근사로 충분(오차 0.1% 미만)
+M_PER_DEG_LAT = 110_540.0
+M_PER_DEG_LON_EQ = 111_320.0
+
+LAT_CANDIDATES = ["위도", "lat", "latitude", "WGS84위도", "y"]
+LON_CANDIDATES = ["경도", "lon", "lng", "longitude", "WGS84경도", "x"]
+
+PAIR_EDGE_CHUNK = 4_000_000   # (점, 폴리곤 변) 쌍을 한 번에 계산하는 최대 개수
+
+# NTL 250m 격자 id = col * 10^7 + row (EPSG:3857 평면의 250m 칸 번호, backend core/grid_topology.py와 같은 규칙)
+CELL_M = 250.0
+ROW_BASE = 10 ** 7
+EARTH_RADIUS_M = 6378137.0
+
+
+def to_local_xy(lat, lon, lat0: float, lon0: float) -> np.ndarray:
+    """위경도 배열 -> (n, 2) 평면 좌표(m). 기준점(lat0, lon0)이 원점."""
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    x = (lon - lon0) * M_PER_DEG_LON_EQ * np.cos(np.radians(lat0))
+    y = (lat - lat0) * M_PER_DEG_LAT
+    return np.column_stack([x, y])
+
+
+def cell_keys(lat, lon) -> np.ndarray:
+    """위경도 배열 -> 점이 속한 250m 격자 id(int64). 조회 테이블 없이 산술로 계산."""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    x = np.radians(np.asarray(lon, dtype=float)) * EARTH_RADIUS_M
+    y = np.log(np.tan(np.pi / 4 + lat / 2)) * EARTH_RADIUS_M
+    row = np.floor(y / CELL_M).astype(np.int64)
+    col = np.floor(x / CELL_M).astype(np.int64)
+    return col * ROW_BASE + row
+
+
+def read_csv_any(path: Path, **kwargs) -> pd.DataFrame:
+    """공공데이터 CSV는 utf-8/cp949가 섞여 있어서 둘 다 시도."""
+    try:
+        return pd.read_csv(path, encoding="utf-8-sig", **kwargs)
+    except UnicodeDecodeError:
+        return pd.read_csv(path, encoding="cp949", **kwargs)
+
+
+def find_col(df: pd.DataFrame, candidates: List[str], what: str, required: bool = True) -> Optional[str]:
+    """후보 이름 중 df에 있는 첫 컬럼(대소문자/공백 무시)."""
+    norm = {str(c).strip().lower(): c for c in df.columns}
+    for cand in candidates:
+        if cand.lower() in norm:
+            return norm[cand.lower()]
+    if required:
+        raise ValueError(f"{what} 컬럼을 못 찾았어. 후보={candidates}, 실제={list(df.columns)}")
+    return None
+
+
+def in_seoul(lat, lon) -> np.ndarray:
+    """좌표가 있고 서울 범위(여유 포함) 안인 점 True."""
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    return (lat >= 37.0) & (lat <= 38.0) & (lon >= 126.5) & (lon <= 127.5)
+
+
+def load_points(
+    path: Path,
+    lat_col: Optional[str] = None,
+    lon_col: Optional[str] = None,
+) -> Tuple[pd.DataFrame, str, str]:
+    """
+    위경도 포인트 CSV 로드. 좌표가 비었거나 서울 범위를 크게 벗어난 행은 버린다.
+    반환: (df, lat_col, lon_col)
+    """
+    df = read_csv_any(path)
+    lat_col = lat_col or find_col(df, LAT_CANDIDATES, "위도")
+    lon_col = lon_col or find_col(df, LON_CANDIDATES, "경도")
+
+    df[lat_col] = pd.to_numeric(df[lat_col], errors="coerce")
+    df[lon_col] = pd.to_numeric(df[lon_col], errors="coerce")
+    ok = in_seoul(df[lat_col].to_numpy(), df[lon_col].to_numpy())
+    dropped = int((~ok).sum())
+    if dropped:
+        print(f"[WARN] 좌표 없음/범위 밖 {dropped}행 제외: {path.name}")
+    return df[ok].reset_index(drop=True), lat_col, lon_col
+
+
+def load_grid_points(path: Path = NTL_GRID_CSV) -> pd.DataFrame:
+    """250m 격자 중심점(grid_id, lat, lon)."""
+    df = pd.read_csv(path, usecols=["grid_id", "lat", "lon"])
+    return df.drop_duplicates("grid_id").reset_index(drop=True)
+
+
+# =========================
+# 폴리곤
+# =========================
+class Polygons:
+    """
+    평면 좌표(m)로 바꾼 GeoJSON 폴리곤들.
+    모든 ring(외곽+구멍)의 변을 한 배열에 모으고 폴리곤별 offset(edge_start)으로 구분.
+    """
+
+    def __init__(self, props, edges, edge_start, centers, radii):
+        self.props = props            # feature별 properties
+        self.edges = edges            # (m, 4) x1, y1, x2, y2
+        self.edge_start = edge_start  # (K+1,)
+        self.centers = centers        # (K, 2) bbox 중심
+        self.radii = radii            # (K,) bbox 외접원 반경(후보 검색용)
+
+    def __len__(self):
+        return len(self.props)
+
+
+def _rings(geometry):
+    if geometry is None:
+        return []
+    if geometry["type"] == "Polygon":
+        return geometry["coordinates"]
+    if geometry["type"] == "MultiPolygon":
+        return [ring for poly in geometry["coordinates"] for ring in poly]
+    return []
+
+
+def load_polygons(path: Path, lat0: float, lon0: float) -> Polygons:
+    """GeoJSON(WGS84) Polygon/MultiPolygon -> Polygons. 도형이 없는 feature는 건너뜀."""
+    with open(path, "r", encoding="utf-8") as f:
+        gj = json.load(f)
+
+    props, edge_blocks, starts, centers, radii = [], [], [0], [], []
+    for feat in gj.get("features", []):
+        rings = [np.asarray(r, dtype=float)[:, :2] for r in _rings(feat.get("geometry")) if len(r) >= 3]
+        if not rings:
+            continue
+        if np.abs(rings[0]).max() > 1000:
+            raise ValueError("GeoJSON 좌표가 위경도가 아니야(투영좌표로 보임). WGS84(EPSG:4326)로 변환해서 넣어줘.")
+
+        blocks = []
+        for ring in rings:
+            xy = to_local_xy(ring[:, 1], ring[:, 0], lat0, lon0)
+            if not np.allclose(xy[0], xy[-1]):
+                xy = np.vstack([xy, xy[:1]])
+            blocks.append(np.hstack([xy[:-1], xy[1:]]))
+        e = np.vstack(blocks)
+
+        pts = np.vstack([e[:, :2], e[:, 2:]])
+        lo, hi = pts.min(axis=0), pts.max(axis=0)
+
+        props.append(feat.get("properties") or {})
+        edge_blocks.append(e)
+        starts.append(starts[-1] + len(e))
+        centers.append((lo + hi) / 2.0)
+        radii.append(float(np.hypot(*(hi - lo)) / 2.0))
+
+    if not props:
+        raise ValueError(f"폴리곤이 없어: {path}")
+    return Polygons(props, np.vstack(edge_blocks), np.asarray(starts), np.asarray(centers), np.asarray(radii))
+
+
+def candidate_pairs(points_xy: np.ndarray, centers: np.ndarray, radii: np.ndarray, search_m: float = 0.0):
+    """
+    도형 bbox 외접원 + search_m 안에 있는 (점, 도형) 후보 쌍.
+    점 KD-tree를 한 번 만들고 도형마다 반경 검색(점별 파이썬 루프 없음).
+    """
+    cand = cKDTree(points_xy).query_ball_point(centers, r=radii + search_m)
+    lengths = np.fromiter((len(c) for c in cand), dtype=np.int64, count=len(cand))
+    point_idx = np.concatenate([np.asarray(c, dtype=np.int64) for c in cand]) if lengths.sum() else np.empty(0, np.int64)
+    poly_idx = np.repeat(np.arange(len(centers)), lengths)
+    return point_idx, poly_idx
+
+
+def pair_polygon_distances(
+    points_xy: np.ndarray,
+    polys: Polygons,
+    point_idx: np.ndarray,
+    poly_idx: np.ndarray,
+    chunk: int = PAIR_EDGE_CHUNK,
+) -> np.ndarray:
+    """
+    (점, 폴리곤) 쌍별 정확한 거리(m). 폴리곤 안이면 0.
+    쌍 x 변을 펼쳐서 벡터 계산 후 reduceat으로 쌍별 최소/교차 횟수를 모은다.
+    """
+    n_edges = polys.edge_start[poly_idx + 1] - polys.edge_start[poly_idx]
+    out = np.empty(len(point_idx))
+
+    # 쌍 x 변 개수가 chunk를 넘지 않게 쌍을 나눠서
+    cum = np.cumsum(n_edges)
+    start = 0
+    while start < len(point_idx):
+        base = cum[start - 1] if start else 0
+        stop = max(int(np.searchsorted(cum, base + chunk, side="right")), start + 1)
+        ci, pi, ne = point_idx[start:stop], poly_idx[start:stop], n_edges[start:stop]
+        offsets = np.r_[0, np.cumsum(ne)[:-1]]
+        pair = np.repeat(np.arange(len(ci)), ne)
+        edge = np.repeat(polys.edge_start[pi], ne) + (np.arange(ne.sum()) - np.repeat(offsets, ne))
+
+        px, py = points_xy[ci[pair], 0], points_xy[ci[pair], 1]
+        x1, y1, x2, y2 = polys.edges[edge].T
+
+        # 점-선분 거리
+        dx, dy = x2 - x1, y2 - y1
+        len2 = dx * dx + dy * dy
+        t = np.clip(((px - x1) * dx + (py - y1) * dy) / np.where(len2 > 0, len2, 1.0), 0.0, 1.0)
+        d = np.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+        # even-odd 광선 교차(구멍 ring도 같이 세면 구멍 안은 밖으로 판정됨)
+        straddle = (y1 > py) != (y2 > py)
+        x_cross = x1 + (py - y1) * dx / np.where(dy != 0, dy, 1.0)
+        crossings = straddle & (px < x_cross)
+
+        dist = np.minimum.reduceat(d, offsets)
+        inside = (np.add.reduceat(crossings.astype(np.int32), offsets) % 2) == 1
+        out[start:stop] = np.where(inside, 0.0, dist)
+        start = stop
+    return out
+
+
+def nearest_of_pairs(n: int, point_idx: np.ndarray, poly_idx: np.ndarray, pair_dist: np.ndarray):
+    """
+    쌍별 거리 -> 점별 최소 거리와 그 도형 index. 후보가 없던 점은 (inf, -1).
+    거리가 같으면 도형 index가 작은 쪽.
+    """
+    dist = np.full(n, np.inf)
+    nearest = np.full(n, -1, dtype=np.int64)
+    if len(pair_dist):
+        order = np.lexsort((poly_idx, pair_dist, point_idx))   # 점별로 거리 오름차순
+        first = np.r_[True, point_idx[order][1:] != point_idx[order][:-1]]
+        best = order[first]
+        dist[point_idx[best]] = pair_dist[best]
+        nearest[point_idx[best]] = poly_idx[best]
+    return dist, nearest
@@ -0,0 +1,114 @@
+from pathlib import Path
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from geo_utils import PROCESSED, NTL_GRID_CSV, find_col, load_grid_points, load_points, to_local_xy
+
+# =========================
+# 설정
+# =========================
+# 서울시 안심이 CCTV 연계 현황(위도, 경도, CCTV 수량) - docs/data_sources.txt
+DEFAULT_CCTV_CSV = PROCESSED / "seoul_safe_cctv.csv"
+DEFAULT_OUT = PROCESSED / "cctv_density_250m.csv"
+
+DEFAULT_RADII = [100, 250, 500]   # m
+FEATURE_RADIUS = 250              # cctv_density(0~1)를 만들 반경
+CLIP_Q = 0.99                     # 정규화 상한 분위수(극단값 1개 때문에 나머지가 0 근처로 눌리지 않게)
+
+COUNT_CANDIDATES = ["CCTV 수량", "CCTV수량", "카메라대수", "cctv_count", "count"]
+
+
+def count_within(tree: cKDTree, cells_xy: np.ndarray, radius: float) -> np.ndarray:
+    """모든 격자 중심에 대해 반경 내 포인트 수 (KD-tree 한 번 호출, 격자별 파이썬 루프 없음)."""
+    return np.asarray(tree.query_ball_point(cells_xy, r=radius, return_length=True), dtype=np.int64)
+
+
+def normalize(values: np.ndarray, clip_q: float = CLIP_Q) -> np.ndarray:
+    """0~1 정규화: clip_q 분위수를 1로 보고 그 이상은 1."""
+    hi = float(np.quantile(values, clip_q)) if len(values) else 0.0
+    if hi <= 0:
+        hi = float(values.max()) if len(values) and values.max() > 0 else 1.0
+    return np.clip(values / hi, 0.0, 1.0)
+
+
+def compute_cctv_density(
+    cells: pd.DataFrame,
+    cctv_lat: np.ndarray,
+    cctv_lon: np.ndarray,
+    cctv_weight: np.ndarray = None,
+    radii=DEFAULT_RADII,
+    feature_radius: float = FEATURE_RADIUS,
+    clip_q: float = CLIP_Q,
+) -> pd.DataFrame:
+    """
+    cells(grid_id, lat, lon) 각각에 대해 반경별 CCTV 대수/밀도와 정규화 feature를 계산.
+    cctv_weight: 지점당 카메라 수(없으면 1). 지점을 수량만큼 반복해서 개수 = 카메라 수 합.
+    """
+    lat0 = float(cells["lat"].mean())
+    lon0 = float(cells["lon"].mean())
+    cells_xy = to_local_xy(cells["lat"], cells["lon"], lat0, lon0)
+    pts_xy = to_local_xy(cctv_lat, cctv_lon, lat0, lon0)
+    if cctv_weight is not None:
+        pts_xy = np.repeat(pts_xy, np.maximum(cctv_weight.astype(int), 0), axis=0)
+
+    tree = cKDTree(pts_xy)
+
+    out = cells[["grid_id", "lat", "lon"]].copy()
+    radii = sorted(set(list(radii) + [feature_radius]))
+    for r in radii:
+        cnt = count_within(tree, cells_xy, r)
+        out[f"cctv_count_r{r}"] = cnt
+        out[f"cctv_per_km2_r{r}"] = cnt / (np.pi * (r / 1000.0) ** 2)
+
+    out["cctv_density"] = normalize(out[f"cctv_count_r{feature_radius}"].to_numpy(dtype=float), clip_q)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="250m 격자별 CCTV 반경 개수/밀도(cctv_density) 계산")
+    ap.add_argument("--cctv", default=str(DEFAULT_CCTV_CSV), help="CCTV 위치 CSV(위도/경도[/CCTV 수량])")
+    ap.add_argument("--grid", default=str(NTL_GRID_CSV), help="격자 중심점 CSV(grid_id, lat, lon)")
+    ap.add_argument("--out", default=str(DEFAULT_OUT))
+    ap.add_argument("--radii", default=",".join(map(str, DEFAULT_RADII)), help="반경(m), 콤마 구분")
+    ap.add_argument("--feature_radius", type=int, default=FEATURE_RADIUS, help="cctv_density에 쓰는 반경(m)")
+    ap.add_argument("--clip_q", type=float, default=CLIP_Q, help="정규화 상한 분위수")
+    ap.add_argument("--lat_col", default=None)
+    ap.add_argument("--lon_col", default=None)
+    ap.add_argument("--count_col", default=None, help="지점당 카메라 수 컬럼(없으면 자동 탐색, 못 찾으면 1대)")
+    args = ap.parse_args()
+
+    cctv, lat_col, lon_col = load_points(Path(args.cctv), args.lat_col, args.lon_col)
+    count_col = args.count_col or find_col(cctv, COUNT_CANDIDATES, "CCTV 수량", required=False)
+    weight = None
+    if count_col:
+        weight = pd.to_numeric(cctv[count_col], errors="coerce").fillna(1).to_numpy()
+    cells = load_grid_points(Path(args.grid))
+
+    radii = [int(r) for r in args.radii.split(",") if r.strip()]
+    t0 = time.perf_counter()
+    out = compute_cctv_density(
+        cells,
+        cctv[lat_col].to_numpy(),
+        cctv[lon_col].to_numpy(),
+        cctv_weight=weight,
+        radii=radii,
+        feature_radius=args.feature_radius,
+        clip_q=args.clip_q,
+    )
+    elapsed = time.perf_counter() - t0
+
+    total = int(weight.sum()) if weight is not None else len(cctv)
+    print(f"CCTV 지점 {len(cctv):,}개(카메라 {total:,}대) x 격자 {len(cells):,}개, 반경 {sorted(set(radii + [args.feature_radius]))}m")
+    print(f"계산 시간: {elapsed:.3f}s")
+    print(out[[c for c in out.columns if c.startswith("cctv_count")] + ["cctv_density"]].describe().T)
+
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    out.to_csv(args.out, index=False, encoding="utf-8-sig")
+    print("saved:", args.out, "rows:", len(out))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,147 +1,387 @@
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import os
+import shutil
 import numpy as np
 import pandas as pd
 
 # =========================
 # 설정
 # =========================
-SRC_PATH = (
-    "C:/Users/jyj20/Desktop/KW/2_winter/seoul-dimming-recommender/"
-    "data/processed/grid_features_final_seoungsu.csv"
-)
-OUT_PATH = (
-    "C:/Users/jyj20/Desktop/KW/2_winter/seoul-dimming-recommender/"
-    "data/processed/dummy_features_9cols.csv"
-)
+ROOT = Path(__file__).resolve().parents[2]   # seoul-dimming-recommender/
+PROCESSED = ROOT / "data" / "processed"
+
+SRC_PATH = PROCESSED / "grid_features_final_seoungsu.csv"
+OUT_CSV = PROCESSED / "dummy_features_9cols.csv"
+OUT_SHARD_DIR = PROCESSED / "dummy_features_9cols"
 
 SEED = 42
 N = 50000
 
-rng = np.random.default_rng(SEED)
+SHARD_ROWS = 1_000_000     # shard(파일) 1개당 행 수
+CHUNK_ROWS = 250_000       # shard 안에서 한 번에 만드는 행 수(메모리 상한). chunk마다 RNG 스트림이 달라 seed의 일부
+CALIB_ROWS = 200_000       # 앵커 분포(rank/분위수) 추정용 보정 샘플 수
+ANCHOR_POINTS = 2001       # 앵커 CDF 분위점 개수
+
+COLUMNS = [
+    "grid_id",
+    "night_traffic",
+    "cctv_density",
+    "traffic_01_02",
+    "traffic_02_03",
+    "traffic_03_04",
+    "park_within",
+    "commercial_density",
+    "residential_density",
+    "existing_lx",
+]
+
 
 def clamp(x, lo, hi):
     return np.minimum(np.maximum(x, lo), hi)
 
-def rank01(x: np.ndarray):
-    s = pd.Series(x)
-    r = s.rank(method="average").to_numpy()
-    return (r - 1) / (len(r) - 1 + 1e-9)
+
+def chunk_rng(seed: int, shard: int, chunk: int) -> np.random.Generator:
+    """
+    (shard, shard 안 chunk 번호)마다 독립적인 RNG 스트림. worker 수와 상관없이 같은 결과가 나온다.
+    같은 데이터를 다시 만들려면 --seed와 함께 --shard_rows/--chunk_rows도 같아야 한다.
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(1, shard, chunk)))
+
+
+def calib_rng(seed: int) -> np.random.Generator:
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(0,)))
+
 
 # =========================
 # 0) 실데이터 로드(앵커)
 # =========================
-src = pd.read_csv(SRC_PATH)
+def load_source(src_path: Path) -> dict:
+    src = pd.read_csv(src_path, encoding="utf-8-sig")
+
+    traffic_sum = src[["traffic_01_02", "traffic_02_03", "traffic_03_04"]].sum(axis=1).astype(float)
+    traffic_sum_anchor = traffic_sum.to_numpy()
 
-src["traffic_sum"] = src[["traffic_01_02", "traffic_02_03", "traffic_03_04"]].sum(axis=1).astype(float)
-traffic_sum_anchor = src["traffic_sum"].to_numpy()
+    return {
+        "traffic_sum": traffic_sum_anchor,
+        "traffic_noise": float(np.std(traffic_sum_anchor) * 0.03),
+        "cctv": clamp(src["cctv_density"].astype(float).to_numpy(), 0, 1),
+        "park": src["park_in_grid"].fillna(0).astype(int).to_numpy(),
+    }
+
+
+def rank01(x: np.ndarray, anchor_q: np.ndarray) -> np.ndarray:
+    """
+    앵커 분포(보정 샘플의 분위점)로 0~1 rank 근사.
+    전체 rank를 구하지 않으므로 메모리가 N에 비례하지 않는다.
+    """
+    probs = np.linspace(0.0, 1.0, len(anchor_q))
+    return np.interp(x, anchor_q, probs)
 
-cctv_anchor = clamp(src["cctv_density"].astype(float).to_numpy(), 0, 1)
-park_anchor = src["park_in_grid"].fillna(0).astype(int).to_numpy()
 
 # =========================
-# 1) 부트스트랩 샘플링
+# 1) 부트스트랩 샘플링 + 2) 상권/주거 밀집도
 # =========================
-idx = rng.integers(0, len(src), size=N)
+def sample_base(rng: np.random.Generator, n: int, source: dict) -> dict:
+    idx = rng.integers(0, len(source["traffic_sum"]), size=n)
 
-traffic_sum = traffic_sum_anchor[idx]
-cctv_density = cctv_anchor[idx]
-park_within = park_anchor[idx]
+    traffic_sum = source["traffic_sum"][idx]
+    cctv_density = source["cctv"][idx]
+    park_within = source["park"][idx]
 
-traffic_sum = np.maximum(0, traffic_sum + rng.normal(0, np.std(traffic_sum_anchor) * 0.03, size=N))
-cctv_density = clamp(cctv_density + rng.normal(0, 0.03, size=N), 0, 1)
+    traffic_sum = np.maximum(0, traffic_sum + rng.normal(0, source["traffic_noise"], size=n))
+    cctv_density = clamp(cctv_density + rng.normal(0, 0.03, size=n), 0, 1)
 
-w = rng.dirichlet([2.2, 2.0, 1.8], size=N)
-traffic_01_02 = traffic_sum * w[:, 0]
-traffic_02_03 = traffic_sum * w[:, 1]
-traffic_03_04 = traffic_sum * w[:, 2]
+    w = rng.dirichlet([2.2, 2.0, 1.8], size=n)
 
-night_traffic = rank01(traffic_sum)
+    return {
+        "traffic_sum": traffic_sum,
+        "cctv_density": cctv_density,
+        "park_within": park_within,
+        "w": w,
+        "noise_com": rng.normal(0, 0.08, size=n),
+        "noise_res": rng.normal(0, 0.10, size=n),
+    }
 
-# =========================
-# 2) 상권/주거 밀집도 생성
-# =========================
-commercial_density = clamp(
-    0.75 * night_traffic + 0.20 * cctv_density + rng.normal(0, 0.08, size=N),
-    0, 1
-)
 
-residential_density = clamp(
-    0.70 * (1 - commercial_density) + 0.30 * park_within + rng.normal(0, 0.10, size=N),
-    0, 1
-)
+def derive_features(base: dict, night_traffic: np.ndarray) -> dict:
+    commercial_density = clamp(
+        0.75 * night_traffic + 0.20 * base["cctv_density"] + base["noise_com"],
+        0, 1
+    )
 
-# =========================
-# 3) existing_lx 생성(30/40/30)
-# =========================
-commercial_index = (
-    0.6 * commercial_density
-    - 0.4 * residential_density
-    + 0.2 * night_traffic
-)
+    residential_density = clamp(
+        0.70 * (1 - commercial_density) + 0.30 * base["park_within"] + base["noise_res"],
+        0, 1
+    )
+
+    commercial_index = (
+        0.6 * commercial_density
+        - 0.4 * residential_density
+        + 0.2 * night_traffic
+    )
 
-q30 = np.quantile(commercial_index, 0.30)
-q70 = np.quantile(commercial_index, 0.70)
+    return {
+        "commercial_density": commercial_density,
+        "residential_density": residential_density,
+        "commercial_index": commercial_index,
+    }
+
+
+def build_anchors(source: dict, seed: int, calib_rows: int = CALIB_ROWS) -> dict:
+    """
+    보정 샘플 1회로 전역 통계를 미리 계산한다.
+    - traffic_sum의 분위점 -> night_traffic rank 근사
+    - commercial_index의 q30/q70 -> existing_lx(30/40/30) 경계
+    """
+    rng = calib_rng(seed)
+    base = sample_base(rng, calib_rows, source)
+
+    probs = np.linspace(0.0, 1.0, ANCHOR_POINTS)
+    traffic_q = np.quantile(base["traffic_sum"], probs)
+
+    night_traffic = rank01(base["traffic_sum"], traffic_q)
+    feats = derive_features(base, night_traffic)
+
+    return {
+        "traffic_q": traffic_q,
+        "q30": float(np.quantile(feats["commercial_index"], 0.30)),
+        "q70": float(np.quantile(feats["commercial_index"], 0.70)),
+    }
 
-existing_lx = np.where(
-    commercial_index >= q70, 25,
-    np.where(commercial_index <= q30, 10, 15)
-).astype(float)
 
 # =========================
-# 4) 저장용 df 생성
+# 3) chunk 생성
 # =========================
-grid_id = [f"{i:06d}" for i in range(1, N + 1)]
-
-df = pd.DataFrame({
-    "grid_id": grid_id,
-    "night_traffic": night_traffic,
-    "cctv_density": cctv_density,
-    "traffic_01_02": traffic_01_02,
-    "traffic_02_03": traffic_02_03,
-    "traffic_03_04": traffic_03_04,
-    "park_within": park_within,
-    "commercial_density": commercial_density,
-    "residential_density": residential_density,
-    "existing_lx": existing_lx.astype(int),
-})
-
-df.to_csv(OUT_PATH, index=False, encoding="utf-8-sig")
-
-print("saved:", OUT_PATH, "| rows:", len(df), "| cols:", df.shape[1])
-print("\n[existing_lx distribution]")
-print(df["existing_lx"].value_counts(normalize=True).sort_index().round(3))
+def make_chunk(rng: np.random.Generator, start: int, n: int, source: dict, anchors: dict) -> pd.DataFrame:
+    base = sample_base(rng, n, source)
+
+    night_traffic = rank01(base["traffic_sum"], anchors["traffic_q"])
+    feats = derive_features(base, night_traffic)
+
+    ci = feats["commercial_index"]
+    existing_lx = np.where(
+        ci >= anchors["q70"], 25,
+        np.where(ci <= anchors["q30"], 10, 15)
+    ).astype(int)
+
+    w = base["w"]
+    grid_id = np.char.zfill(np.arange(start + 1, start + n + 1).astype(str), 6)
+
+    return pd.DataFrame({
+        "grid_id": grid_id,
+        "night_traffic": night_traffic,
+        "cctv_density": base["cctv_density"],
+        "traffic_01_02": base["traffic_sum"] * w[:, 0],
+        "traffic_02_03": base["traffic_sum"] * w[:, 1],
+        "traffic_03_04": base["traffic_sum"] * w[:, 2],
+        "park_within": base["park_within"],
+        "commercial_density": feats["commercial_density"],
+        "residential_density": feats["residential_density"],
+        "existing_lx": existing_lx,
+    }, columns=COLUMNS)
+
+
+def chunk_checks(df: pd.DataFrame) -> dict:
+    """추천조도 분포 체크용 누적 통계(합/개수만 반환해서 shard끼리 더할 수 있게)."""
+    night_traffic = df["night_traffic"].to_numpy()
+    park_within = df["park_within"].to_numpy()
+    cctv_density = df["cctv_density"].to_numpy()
+    residential_density = df["residential_density"].to_numpy()
+    commercial_density = df["commercial_density"].to_numpy()
+    existing_lx = df["existing_lx"].to_numpy(dtype=float)
+
+    dim_raw = (
+        0.55*(1-night_traffic) +
+        0.45*park_within +
+        0.35*cctv_density +
+        0.80*residential_density
+    )
+
+    shield = (
+        0.70*night_traffic +
+        0.30*(1-park_within) +
+        0.25*(1-cctv_density) +
+        0.55*commercial_density
+    )
+
+    dim = clamp(dim_raw - shield, 0, 1)
+
+    # 절감 체감 강화(안전 범위 내에서)
+    max_drop = np.where(existing_lx==25, 0.5, np.where(existing_lx==15, 0.42, 0.35))
+    drop_ratio = max_drop * np.tanh(2.6 * dim)
+
+    recommended_raw = existing_lx * (1 - drop_ratio)
+    recommended_lx = clamp(recommended_raw, 2.0, existing_lx)
+
+    lx_values, lx_counts = np.unique(df["existing_lx"].to_numpy(), return_counts=True)
+
+    return {
+        "rows": len(df),
+        "maintain": int(np.isclose(recommended_lx, existing_lx).sum()),
+        "min2": int(np.isclose(recommended_lx, 2.0).sum()),
+        "ratio_sum": float((recommended_lx / existing_lx).sum()),
+        "lx_counts": dict(zip(lx_values.tolist(), lx_counts.tolist())),
+    }
+
+
+def merge_checks(a: dict, b: dict) -> dict:
+    lx_counts = dict(a["lx_counts"])
+    for k, v in b["lx_counts"].items():
+        lx_counts[k] = lx_counts.get(k, 0) + v
+    return {
+        "rows": a["rows"] + b["rows"],
+        "maintain": a["maintain"] + b["maintain"],
+        "min2": a["min2"] + b["min2"],
+        "ratio_sum": a["ratio_sum"] + b["ratio_sum"],
+        "lx_counts": lx_counts,
+    }
+
+
+EMPTY_CHECKS = {"rows": 0, "maintain": 0, "min2": 0, "ratio_sum": 0.0, "lx_counts": {}}
+
 
 # =========================
-# 5) 추천조도 분포 체크(튜닝 적용 버전)
+# 4) shard 저장
 # =========================
-dim_raw = (
-    0.55*(1-night_traffic) +
-    0.45*park_within +
-    0.35*cctv_density +
-    0.80*residential_density
-)
-
-shield = (
-    0.70*night_traffic +
-    0.30*(1-park_within) +
-    0.25*(1-cctv_density) +
-    0.55*commercial_density
-)
-
-dim = clamp(dim_raw - shield, 0, 1)
-
-# 절감 체감 강화(안전 범위 내에서)
-max_drop = np.where(existing_lx==25, 0.5, np.where(existing_lx==15, 0.42, 0.35))
-drop_ratio = max_drop * np.tanh(2.6 * dim)
-
-recommended_raw = existing_lx * (1 - drop_ratio)
-recommended_lx = clamp(recommended_raw, 2.0, existing_lx)
-
-maintain_rate = float(np.mean(np.isclose(recommended_lx, existing_lx)))
-min2_rate = float(np.mean(np.isclose(recommended_lx, 2.0)))
-avg_ratio = float(np.mean(recommended_lx / existing_lx))
-
-print("\n[recommended_lx checks]")
-print("maintain_rate (recommended==existing):", round(maintain_rate*100, 2), "%")
-print("min2_rate (recommended==2):", round(min2_rate*100, 2), "%")
-print("avg dimming ratio (recommended/existing):", round(avg_ratio, 4))
-print("avg saving rate:", round((1-avg_ratio)*100, 2), "%")
+def write_shard(task: dict) -> dict:
+    """shard 1개를 chunk 단위로 만들어 바로 파일에 쓴다(프로세스 풀 작업 단위)."""
+    shard = task["shard"]
+    start, stop = task["start"], task["stop"]
+    path = Path(task["path"])
+
+    checks = EMPTY_CHECKS
+    writer = None
+    try:
+        for chunk, cstart in enumerate(range(start, stop, task["chunk_rows"])):
+            n = min(task["chunk_rows"], stop - cstart)
+            rng = chunk_rng(task["seed"], shard, chunk)
+            df = make_chunk(rng, cstart, n, task["source"], task["anchors"])
+            checks = merge_checks(checks, chunk_checks(df))
+
+            if task["format"] == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+                writer.write_table(table)
+            else:
+                df.to_csv(path, mode="w" if cstart == start else "a",
+                          header=(cstart == start), index=False, encoding="utf-8")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return checks
+
+
+def concat_csv_parts(parts: list, out_path: Path):
+    """csv part들을 한 파일로 이어붙인다(헤더는 첫 part만)."""
+    with open(out_path, "wb") as out:
+        out.write("\ufeff".encode("utf-8"))  # utf-8-sig
+        for i, part in enumerate(parts):
+            with open(part, "rb") as f:
+                if i > 0:
+                    f.readline()
+                shutil.copyfileobj(f, out, length=16 * 1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--src", type=str, default=str(SRC_PATH))
+    parser.add_argument("--rows", type=int, default=N)
+    parser.add_argument("--seed", type=int, default=SEED,
+                        help="같은 seed + 같은 --shard_rows/--chunk_rows면 같은 데이터")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="csv: 단일 파일(dummy_features_9cols.csv), parquet: shard 디렉토리")
+    parser.add_argument("--out", type=str, default=None,
+                        help="csv면 파일 경로, parquet면 shard 디렉토리 경로")
+    parser.add_argument("--shard_rows", type=int, default=SHARD_ROWS)
+    parser.add_argument("--chunk_rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    for name in ["rows", "shard_rows", "chunk_rows"]:
+        if getattr(args, name) <= 0:
+            parser.error(f"--{name}는 1 이상이어야 해: {getattr(args, name)}")
+
+    src_path = Path(args.src)
+    if not src_path.exists():
+        raise FileNotFoundError(f"앵커용 실데이터가 없어: {src_path}")
+
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("parquet 저장엔 pyarrow가 필요해. `pip install pyarrow` 설치해줘.")
+
+    source = load_source(src_path)
+    anchors = build_anchors(source, args.seed)
+
+    if args.format == "parquet":
+        out_dir = Path(args.out) if args.out else OUT_SHARD_DIR
+        out_path = out_dir
+        part_dir = out_dir
+        ext = "parquet"
+    else:
+        out_path = Path(args.out) if args.out else OUT_CSV
+        part_dir = out_path.parent / f".{out_path.stem}_parts"
+        ext = "csv"
+    part_dir.mkdir(parents=True, exist_ok=True)
+    for old in part_dir.glob(f"part-*.{ext}"):
+        old.unlink()
+
+    tasks = []
+    for shard, start in enumerate(range(0, args.rows, args.shard_rows)):
+        tasks.append({
+            "shard": shard,
+            "start": start,
+            "stop": min(start + args.shard_rows, args.rows),
+            "path": str(part_dir / f"part-{shard:05d}.{ext}"),
+            "seed": args.seed,
+            "chunk_rows": args.chunk_rows,
+            "format": args.format,
+            "source": source,
+            "anchors": anchors,
+        })
+
+    workers = max(1, min(args.workers, len(tasks)))
+    checks = EMPTY_CHECKS
+    if workers == 1:
+        for t in tasks:
+            checks = merge_checks(checks, write_shard(t))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            for c in ex.map(write_shard, tasks):
+                checks = merge_checks(checks, c)
+
+    if args.format == "csv":
+        concat_csv_parts([t["path"] for t in tasks], out_path)
+        shutil.rmtree(part_dir)
+
+    rows = checks["rows"]
+    print("saved:", out_path, "| rows:", rows, "| cols:", len(COLUMNS),
+          "| shards:", len(tasks), "| workers:", workers)
+    print("\n[existing_lx distribution]")
+    dist = pd.Series(checks["lx_counts"], name="proportion").sort_index() / rows
+    dist.index.name = "existing_lx"
+    print(dist.round(3))
+
+    # =========================
+    # 5) 추천조도 분포 체크(튜닝 적용 버전)
+    # =========================
+    maintain_rate = checks["maintain"] / rows
+    min2_rate = checks["min2"] / rows
+    avg_ratio = checks["ratio_sum"] / rows
+
+    print("\n[recommended_lx checks]")
+    print("maintain_rate (recommended==existing):", round(maintain_rate*100, 2), "%")
+    print("min2_rate (recommended==2):", round(min2_rate*100, 2), "%")
+    print("avg dimming ratio (recommended/existing):", round(avg_ratio, 4))
+    print("avg saving rate:", round((1-avg_ratio)*100, 2), "%")
+
+
+if __name__ == "__main__":
+    main()
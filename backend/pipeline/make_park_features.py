@@ -0,0 +1,163 @@
+from pathlib import Path
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from geo_utils import (
+    PROCESSED, NTL_GRID_CSV, Polygons, candidate_pairs, find_col, load_grid_points, load_points,
+    load_polygons, nearest_of_pairs, pair_polygon_distances, to_local_xy,
+)
+
+# =========================
+# 설정
+# =========================
+DEFAULT_PARKS = PROCESSED / "seoul_parks.geojson"   # 공원 폴리곤(GeoJSON, WGS84) 또는 포인트 CSV
+DEFAULT_OUT = PROCESSED / "park_features_250m.csv"
+
+DEFAULT_THRESHOLDS = [50, 100, 250]   # m, park_within_{t}m 플래그
+SEARCH_M = 500                        # 정확 거리 계산 후보 반경(임계값 최대치보다 작으면 그 값으로)
+
+NAME_CANDIDATES = ["공원명", "name", "park_name", "PARK_NM"]
+AREA_CANDIDATES = ["공원면적", "면적", "area", "area_m2"]
+
+
+# =========================
+# 입력
+# =========================
+class Parks:
+    """
+    평면 좌표(m)로 바꾼 공원 도형.
+    폴리곤: geo_utils.Polygons(모든 ring의 변 + 공원별 offset).
+    포인트: 중심점 + 반경(면적이 있으면 같은 면적의 원, 없으면 0).
+    """
+
+    def __init__(self, names, centers, radii, polys: Polygons = None):
+        self.names = list(names)
+        self.centers = centers   # (K, 2)
+        self.radii = radii       # (K,) 중심에서 도형 끝까지 최대 거리(후보 검색용)
+        self.polys = polys
+
+    @property
+    def is_polygon(self) -> bool:
+        return self.polys is not None
+
+    def __len__(self):
+        return len(self.names)
+
+
+def load_park_polygons(path: Path, lat0: float, lon0: float) -> Parks:
+    polys = load_polygons(path, lat0, lon0)
+    names = []
+    for i, props in enumerate(polys.props):
+        name = next((props[c] for c in NAME_CANDIDATES if c in props), None)
+        names.append(name if name is not None else f"park_{i}")
+    return Parks(names, polys.centers, polys.radii, polys)
+
+
+def load_park_points(path: Path, lat0: float, lon0: float) -> Parks:
+    df, lat_col, lon_col = load_points(path)
+    name_col = find_col(df, NAME_CANDIDATES, "공원명", required=False)
+    area_col = find_col(df, AREA_CANDIDATES, "면적", required=False)
+
+    centers = to_local_xy(df[lat_col], df[lon_col], lat0, lon0)
+    radii = np.zeros(len(df))
+    if area_col:
+        area = pd.to_numeric(df[area_col], errors="coerce").fillna(0).clip(lower=0).to_numpy()
+        radii = np.sqrt(area / np.pi)   # 면적이 같은 원으로 근사
+    names = df[name_col].astype(str).tolist() if name_col else [f"park_{i}" for i in range(len(df))]
+    return Parks(names, centers, radii)
+
+
+# =========================
+# 거리 계산
+# =========================
+def compute_park_features(
+    cells: pd.DataFrame,
+    parks: Parks,
+    cells_xy: np.ndarray,
+    thresholds=DEFAULT_THRESHOLDS,
+    search_m: float = SEARCH_M,
+) -> pd.DataFrame:
+    """
+    격자별 가장 가까운 공원까지 거리(m)와 임계값별 park_within 플래그를 한 번에 계산.
+    1) 공원 bbox 외접원 + search_m 안의 격자만 후보(격자 KD-tree 1회 호출)
+    2) 후보 쌍만 정확한 거리
+    3) 후보가 없는 격자는 공원 꼭짓점/중심 KD-tree 최근접 거리(실제보다 약간 클 수 있는 상한)
+    거리는 search_m 이내에서 정확하고, 그보다 먼 값은 근사. 플래그(임계값 <= search_m)는 항상 정확.
+    """
+    search_m = max(search_m, max(thresholds))
+
+    # 1) bbox 사전 필터
+    cell_idx, park_idx = candidate_pairs(cells_xy, parks.centers, parks.radii, search_m)
+
+    # 2) 정확한 거리
+    if parks.is_polygon:
+        pair_dist = pair_polygon_distances(cells_xy, parks.polys, cell_idx, park_idx)
+    else:
+        pair_dist = np.maximum(np.hypot(*(cells_xy[cell_idx] - parks.centers[park_idx]).T) - parks.radii[park_idx], 0.0)
+    dist, nearest = nearest_of_pairs(len(cells), cell_idx, park_idx, pair_dist)
+
+    # 3) 후보가 없던 격자: 최근접 꼭짓점(포인트면 중심) 거리
+    far = np.flatnonzero(~np.isfinite(dist))
+    if len(far):
+        if parks.is_polygon:
+            vert = parks.polys.edges[:, :2]
+            owner = np.searchsorted(parks.polys.edge_start, np.arange(len(vert)), side="right") - 1
+        else:
+            vert, owner = parks.centers, np.arange(len(parks))
+        d, j = cKDTree(vert).query(cells_xy[far])
+        if not parks.is_polygon:
+            d = np.maximum(d - parks.radii[owner[j]], 0.0)
+        dist[far] = d
+        nearest[far] = owner[j]
+
+    out = cells[["grid_id", "lat", "lon"]].copy()
+    out["park_dist_m"] = np.round(dist, 1)
+    out["nearest_park"] = [parks.names[k] for k in nearest]
+    for t in sorted(thresholds):
+        out[f"park_within_{t}m"] = (dist <= t).astype(int)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="250m 격자별 공원 근접 feature(최근접 거리, 임계값별 park_within)")
+    ap.add_argument("--parks", default=str(DEFAULT_PARKS), help="공원 폴리곤 GeoJSON 또는 공원 포인트 CSV(위도/경도[/면적])")
+    ap.add_argument("--grid", default=str(NTL_GRID_CSV), help="격자 중심점 CSV(grid_id, lat, lon)")
+    ap.add_argument("--out", default=str(DEFAULT_OUT))
+    ap.add_argument("--thresholds", default=",".join(map(str, DEFAULT_THRESHOLDS)),
+                    help="park_within 임계값(m), 콤마 구분. 여러 개를 한 번에 계산")
+    ap.add_argument("--search_m", type=float, default=SEARCH_M, help="정확 거리 계산 후보 반경(m)")
+    args = ap.parse_args()
+
+    cells = load_grid_points(Path(args.grid))
+    lat0, lon0 = float(cells["lat"].mean()), float(cells["lon"].mean())
+    cells_xy = to_local_xy(cells["lat"], cells["lon"], lat0, lon0)
+
+    parks_path = Path(args.parks)
+    if parks_path.suffix.lower() in (".geojson", ".json"):
+        parks = load_park_polygons(parks_path, lat0, lon0)
+        kind = f"폴리곤 {len(parks):,}개(변 {len(parks.polys.edges):,}개)"
+    else:
+        parks = load_park_points(parks_path, lat0, lon0)
+        kind = f"포인트 {len(parks):,}개"
+
+    thresholds = [int(t) for t in args.thresholds.split(",") if t.strip()]
+    t0 = time.perf_counter()
+    out = compute_park_features(cells, parks, cells_xy, thresholds=thresholds, search_m=args.search_m)
+    elapsed = time.perf_counter() - t0
+
+    print(f"공원 {kind} x 격자 {len(cells):,}개, 임계값 {sorted(thresholds)}m")
+    print(f"계산 시간: {elapsed:.3f}s")
+    for t in sorted(thresholds):
+        print(f"  park_within_{t}m: {out[f'park_within_{t}m'].mean() * 100:.1f}% 격자")
+    print(out["park_dist_m"].describe())
+
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    out.to_csv(args.out, index=False, encoding="utf-8-sig")
+    print("saved:", args.out, "rows:", len(out))
+
+
+if __name__ == "__main__":
+    main()
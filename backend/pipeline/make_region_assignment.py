@@ -0,0 +1,124 @@
+from pathlib import Path
+import argparse
+import re
+import time
+import numpy as np
+import pandas as pd
+
+from geo_utils import (
+    PROCESSED, NTL_GRID_CSV, candidate_pairs, load_grid_points, load_polygons,
+    nearest_of_pairs, pair_polygon_distances, read_csv_any, to_local_xy,
+)
+
+# =========================
+# 설정
+# =========================
+# 법정동 경계 폴리곤(GeoJSON, WGS84). 로컬 파일만 사용(다운로드 안 함)
+DEFAULT_BOUNDARY = PROCESSED / "seoul_bjdong_boundary.geojson"
+DEFAULT_CODES = PROCESSED / "seoul_eupmyeondong_codes.csv"   # 시군구명, 읍면동명, 법정동코드
+DEFAULT_OUT = PROCESSED / "grid_regions_250m.csv"
+
+# 격자 중심이 어느 폴리곤에도 안 들어가면(경계 틈, 한강 위 등) 이 거리 안의 가장 가까운 동으로
+SNAP_M = 125   # 격자 반 칸
+
+CODE_CANDIDATES = ["법정동코드", "EMD_CD", "BJDONG_CD", "bjdong_cd", "LEGAL_CD", "adm_cd", "code"]
+
+
+def normalize_bjdong_code(value) -> str:
+    """법정동코드 10자리로. 8자리(EMD_CD: 시군구5+읍면동3)는 리 코드 00을 붙인다. 못 읽으면 ""."""
+    digits = re.sub(r"\D", "", str(value).split(".")[0])
+    if len(digits) == 8:
+        digits += "00"
+    return digits if len(digits) == 10 else ""
+
+
+def load_codes(path: Path) -> pd.DataFrame:
+    """법정동코드 -> 시군구/동 이름 표(index = 10자리 코드)."""
+    codes = read_csv_any(path, dtype=str)
+    codes["bjdong_cd"] = codes["법정동코드"].map(normalize_bjdong_code)
+    codes["sigungu_cd"] = codes["bjdong_cd"].str[:5]
+    codes = codes.rename(columns={"시군구명": "sigungu_nm", "읍면동명": "dong_nm"})
+    return codes[codes["bjdong_cd"] != ""].drop_duplicates("bjdong_cd").set_index("bjdong_cd")
+
+
+def assign_regions(
+    cells: pd.DataFrame,
+    boundary: Path,
+    codes: pd.DataFrame,
+    snap_m: float = SNAP_M,
+) -> pd.DataFrame:
+    """
+    격자 중심점 -> 법정동(및 시군구) 배정.
+    1) 동 폴리곤 bbox 외접원(+snap_m) 안의 격자만 후보(격자 KD-tree 1회 호출)
+    2) 후보 쌍만 정확한 점-폴리곤 판정(안이면 거리 0, 구멍/멀티폴리곤 처리)
+    3) 격자별 가장 가까운 동, snap_m보다 멀면 미배정("")
+    """
+    lat0, lon0 = float(cells["lat"].mean()), float(cells["lon"].mean())
+    cells_xy = to_local_xy(cells["lat"], cells["lon"], lat0, lon0)
+    polys = load_polygons(boundary, lat0, lon0)
+
+    poly_codes = []
+    for props in polys.props:
+        key = next((c for c in CODE_CANDIDATES if c in props), None)
+        poly_codes.append(normalize_bjdong_code(props[key]) if key else "")
+    poly_codes = np.asarray(poly_codes, dtype=object)
+    missing = int((poly_codes == "").sum())
+    if missing == len(poly_codes):
+        raise ValueError(f"경계 파일에서 법정동코드 속성을 못 찾았어. 후보={CODE_CANDIDATES}, 실제={list(polys.props[0])}")
+    if missing:
+        print(f"[WARN] 법정동코드 없는 폴리곤 {missing}개 제외")
+
+    cell_idx, poly_idx = candidate_pairs(cells_xy, polys.centers, polys.radii, snap_m)
+    keep = poly_codes[poly_idx] != ""
+    cell_idx, poly_idx = cell_idx[keep], poly_idx[keep]
+    pair_dist = pair_polygon_distances(cells_xy, polys, cell_idx, poly_idx)
+    dist, nearest = nearest_of_pairs(len(cells), cell_idx, poly_idx, pair_dist)
+
+    assigned = np.isfinite(dist) & (dist <= snap_m)
+    bjdong = np.where(assigned, poly_codes[np.maximum(nearest, 0)], "")
+
+    out = cells[["grid_id", "lat", "lon"]].copy()
+    out["bjdong_cd"] = bjdong
+    out["sigungu_cd"] = [c[:5] for c in bjdong]
+    out["sigungu_nm"] = out["bjdong_cd"].map(codes["sigungu_nm"]).fillna("")
+    out["dong_nm"] = out["bjdong_cd"].map(codes["dong_nm"]).fillna("")
+    out["region_dist_m"] = np.where(assigned, np.round(dist, 1), np.nan)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="250m 격자 -> 시군구/법정동 배정(경계 폴리곤 공간 인덱스)")
+    ap.add_argument("--boundary", default=str(DEFAULT_BOUNDARY), help="법정동 경계 GeoJSON(WGS84)")
+    ap.add_argument("--codes", default=str(DEFAULT_CODES), help="법정동코드 CSV(시군구명, 읍면동명, 법정동코드)")
+    ap.add_argument("--grid", default=str(NTL_GRID_CSV), help="격자 중심점 CSV(grid_id, lat, lon)")
+    ap.add_argument("--out", default=str(DEFAULT_OUT))
+    ap.add_argument("--snap_m", type=float, default=SNAP_M, help="폴리곤 밖 격자를 가까운 동에 붙이는 최대 거리(m)")
+    args = ap.parse_args()
+
+    boundary = Path(args.boundary)
+    if not boundary.exists():
+        raise FileNotFoundError(f"경계 파일이 없어: {boundary} (법정동 경계 GeoJSON을 data/processed에 넣어줘)")
+    codes = load_codes(Path(args.codes))
+    cells = load_grid_points(Path(args.grid))
+
+    t0 = time.perf_counter()
+    out = assign_regions(cells, boundary, codes, snap_m=args.snap_m)
+    elapsed = time.perf_counter() - t0
+
+    assigned = out["bjdong_cd"] != ""
+    unknown = assigned & (out["dong_nm"] == "")
+    print(f"격자 {len(cells):,}개 -> 시군구 {out.loc[assigned, 'sigungu_cd'].nunique()}개, "
+          f"법정동 {out.loc[assigned, 'bjdong_cd'].nunique()}개")
+    print(f"계산 시간: {elapsed:.3f}s")
+    print(f"  폴리곤 안: {(out['region_dist_m'] == 0).sum():,}, 경계 보정(<= {args.snap_m:g}m): "
+          f"{(out['region_dist_m'] > 0).sum():,}, 미배정: {(~assigned).sum():,}")
+    if unknown.any():
+        print(f"[WARN] 코드표에 없는 법정동코드 {out.loc[unknown, 'bjdong_cd'].nunique()}개(이름 빈칸)")
+
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    out.to_csv(args.out, index=False, encoding="utf-8-sig")
+    print("saved:", args.out, "rows:", len(out))
+
+
+if __name__ == "__main__":
+    main()
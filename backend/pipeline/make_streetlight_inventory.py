@@ -0,0 +1,197 @@
+from pathlib import Path
+from typing import Dict, Optional
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from geo_utils import PROCESSED, NTL_GRID_CSV, cell_keys, find_col, load_grid_points, load_points
+
+# =========================
+# 설정
+# =========================
+# 서울특별시_가로등 위치 정보(위도, 경도 + 있으면 관리번호/소비전력/조도). 로컬 파일만 사용
+DEFAULT_INPUT = PROCESSED / "seoul_streetlights.csv"
+DEFAULT_GRID_OUT = PROCESSED / "streetlight_grid_250m.csv"
+DEFAULT_LAMPS_OUT = PROCESSED / "streetlight_lamps_250m.csv"   # export_lamp_schedules.py 입력(lamp_id, grid_id)
+
+DEFAULT_LAMP_WATT = 100   # 소비전력 컬럼이 없거나 빈 가로등(report_savings.py 기본 가정과 동일)
+
+LAMP_ID_CANDIDATES = ["lamp_id", "관리번호", "가로등번호", "가로등관리번호", "id"]
+WATT_CANDIDATES = ["lamp_watt", "소비전력", "소비전력(W)", "전력", "전력(W)", "용량", "용량(W)", "watt", "W"]
+LUX_CANDIDATES = ["lamp_lx", "조도", "조도(lx)", "lux", "lx", "existing_lx"]
+
+# 조도 컬럼이 없을 때 등 용량(W) -> 설계 조도(lx) 가정. 기존 조도 등급(10/15/25 lx)에 맞춘 구간표
+# (상한 W, lx) 순서대로, 마지막은 나머지 전부
+WATT_LX_TABLE = [(100.0, 10.0), (200.0, 15.0), (np.inf, 25.0)]
+
+
+def parse_number(s: pd.Series) -> pd.Series:
+    """'150W', '1,000' 같은 문자열에서 숫자만 -> float(못 읽으면 NaN)."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype(float)
+    num = s.astype(str).str.replace(",", "", regex=False).str.extract(r"(\d+(?:\.\d+)?)")[0]
+    return pd.to_numeric(num, errors="coerce")
+
+
+def parse_lx_table(spec: Optional[str]):
+    """'100:10,200:15,inf:25' -> [(100.0, 10.0), ...]. None이면 기본표."""
+    if not spec:
+        return WATT_LX_TABLE
+    table = []
+    for part in spec.split(","):
+        w, lx = part.split(":")
+        table.append((float(w), float(lx)))
+    return sorted(table)
+
+
+def watt_to_lx(watt: np.ndarray, table=WATT_LX_TABLE) -> np.ndarray:
+    """등 용량(W) -> 설계 조도(lx), 구간표 searchsorted."""
+    bounds = np.array([w for w, _ in table], dtype=float)
+    values = np.array([lx for _, lx in table], dtype=np.float32)
+    pos = np.minimum(np.searchsorted(bounds, watt, side="left"), len(values) - 1)
+    return values[pos]
+
+
+def load_lamps(path: Path, default_watt: float = DEFAULT_LAMP_WATT, lx_table=WATT_LX_TABLE) -> pd.DataFrame:
+    """가로등 포인트 -> lamp_id, lat, lon, lamp_watt(float32), lamp_lx(float32), watt_known."""
+    df, lat_col, lon_col = load_points(path)
+    id_col = find_col(df, LAMP_ID_CANDIDATES, "가로등 id", required=False)
+    watt_col = find_col(df, WATT_CANDIDATES, "소비전력", required=False)
+    lux_col = find_col(df, LUX_CANDIDATES, "조도", required=False)
+
+    # 관리번호가 없으면 행 순서로(원본 파일 순서가 바뀌면 export 변경분 판단도 바뀜)
+    lamp_id = df[id_col].astype(str).str.strip() if id_col else pd.Series(
+        [f"SL{i:07d}" for i in range(len(df))], index=df.index)
+
+    watt = parse_number(df[watt_col]).to_numpy(dtype=np.float32) if watt_col else np.full(len(df), np.nan, np.float32)
+    watt_known = np.isfinite(watt) & (watt > 0)
+    watt = np.where(watt_known, watt, np.float32(default_watt)).astype(np.float32)
+
+    lx = parse_number(df[lux_col]).to_numpy(dtype=np.float32) if lux_col else np.full(len(df), np.nan, np.float32)
+    lx = np.where(np.isfinite(lx) & (lx > 0), lx, watt_to_lx(watt, lx_table)).astype(np.float32)
+
+    print(f"가로등 {len(df):,}개 (id={id_col or '행 번호'}, 소비전력={watt_col or '없음'}, 조도={lux_col or 'W->lx 가정표'})")
+    return pd.DataFrame({
+        "lamp_id": lamp_id.to_numpy(),
+        "lat": df[lat_col].to_numpy(dtype=float),
+        "lon": df[lon_col].to_numpy(dtype=float),
+        "lamp_watt": watt,
+        "lamp_lx": lx,
+        "watt_known": watt_known,
+    })
+
+
+def aggregate_by_cell(keys: np.ndarray, watt: np.ndarray, lx: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    가로등별 격자 키 -> 격자별 typed 배열(정렬된 grid_id 순).
+    정렬 1회 + 구간 경계(reduceat)로 개수/합계를 한 번에 구한다(groupby 없음).
+    existing_lx는 격자 안 가로등 조도의 소비전력 가중 평균.
+    """
+    order = np.argsort(keys, kind="stable")
+    k = keys[order]
+    if not len(k):
+        return {"grid_id": np.empty(0, np.int64), "lamp_count": np.empty(0, np.int32),
+                "watt_sum": np.empty(0, np.float32), "existing_lx": np.empty(0, np.float32)}
+    starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+
+    w = watt[order].astype(np.float64)
+    watt_sum = np.add.reduceat(w, starts)
+    lx_w = np.add.reduceat(lx[order].astype(np.float64) * w, starts)
+    return {
+        "grid_id": k[starts],
+        "lamp_count": np.diff(np.r_[starts, len(k)]).astype(np.int32),
+        "watt_sum": watt_sum.astype(np.float32),
+        "existing_lx": (lx_w / np.maximum(watt_sum, 1e-9)).astype(np.float32),
+    }
+
+
+def build_inventory(lamps: pd.DataFrame, grid_ids: Optional[np.ndarray] = None):
+    """
+    가로등 -> 250m 격자 배정(정수 키) + 격자별 집계.
+    grid_ids(격자 중심점 파일)를 주면 정렬 merge(searchsorted)로 그 격자에 없는 가로등은 뺀다.
+    반환: (가로등 표 + grid_id, 격자별 typed 배열 dict)
+    """
+    keys = cell_keys(lamps["lat"].to_numpy(), lamps["lon"].to_numpy())
+    lamps = lamps.assign(grid_id=keys)
+
+    if grid_ids is not None:
+        known = np.sort(np.asarray(grid_ids, dtype=np.int64))
+        pos = np.minimum(np.searchsorted(known, keys), len(known) - 1)
+        inside = known[pos] == keys
+        if (~inside).any():
+            print(f"[WARN] 격자 파일에 없는 칸의 가로등 {(~inside).sum():,}개 제외")
+        lamps = lamps[inside]
+
+    cells = aggregate_by_cell(lamps["grid_id"].to_numpy(), lamps["lamp_watt"].to_numpy(), lamps["lamp_lx"].to_numpy())
+    return lamps.reset_index(drop=True), cells
+
+
+def load_inventory(path: Path = DEFAULT_GRID_OUT) -> pd.DataFrame:
+    """격자별 재고(grid_id, lamp_count, watt_sum, lamp_watt, existing_lx), grid_id 정렬."""
+    inv = pd.read_csv(path, encoding="utf-8-sig", dtype={
+        "grid_id": np.int64, "lamp_count": np.int32, "watt_sum": np.float32,
+        "lamp_watt": np.float32, "existing_lx": np.float32,
+    })
+    return inv.sort_values("grid_id", kind="stable").reset_index(drop=True)
+
+
+def join_inventory(df: pd.DataFrame, inv: pd.DataFrame) -> pd.DataFrame:
+    """
+    block에 lamp_count / lamp_watt / watt_sum 붙이기(정렬 merge, 재고에 없는 격자는 NaN).
+    simulate_savings.py는 lamp_watt x lamp_count, report_savings.py는 watt_sum을 쓴다.
+    """
+    keys = inv["grid_id"].to_numpy()
+    ids = pd.to_numeric(df["grid_id"], errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+    pos = np.minimum(np.searchsorted(keys, ids), max(len(keys) - 1, 0))
+    found = (keys[pos] == ids) if len(keys) else np.zeros(len(ids), dtype=bool)
+    df = df.copy()
+    for col in ["lamp_count", "lamp_watt", "watt_sum"]:
+        df[col] = np.where(found, inv[col].to_numpy(dtype=np.float64)[pos], np.nan)
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser(description="가로등 위치/용량 -> 250m 격자별 설치 대수, 소비전력, 기존 조도")
+    ap.add_argument("--input", default=str(DEFAULT_INPUT), help="가로등 포인트 CSV(위도, 경도[, 관리번호, 소비전력, 조도])")
+    ap.add_argument("--grid", default=str(NTL_GRID_CSV), help="격자 중심점 CSV(grid_id, lat, lon). none이면 필터 안 함")
+    ap.add_argument("--out", default=str(DEFAULT_GRID_OUT), help="격자별 집계 CSV")
+    ap.add_argument("--lamps_out", default=str(DEFAULT_LAMPS_OUT), help="가로등별 grid_id CSV(export_lamp_schedules.py 입력)")
+    ap.add_argument("--default_watt", type=float, default=DEFAULT_LAMP_WATT, help="소비전력 없는 가로등 용량(W)")
+    ap.add_argument("--lx_table", default=None, help="조도 없을 때 W->lx 구간표, 예: 100:10,200:15,inf:25")
+    args = ap.parse_args()
+
+    input_path = Path(args.input)
+    if not input_path.exists():
+        raise FileNotFoundError(f"가로등 파일이 없어: {input_path} (서울특별시_가로등 위치 정보 CSV를 data/processed에 넣어줘)")
+
+    t0 = time.perf_counter()
+    lamps = load_lamps(input_path, args.default_watt, parse_lx_table(args.lx_table))
+    t_load = time.perf_counter() - t0
+
+    grid_ids = None if args.grid == "none" else load_grid_points(Path(args.grid))["grid_id"].to_numpy()
+    t1 = time.perf_counter()
+    lamps, cells = build_inventory(lamps, grid_ids)
+    t_join = time.perf_counter() - t1
+
+    grid = pd.DataFrame(cells)
+    grid["lamp_watt"] = (grid["watt_sum"] / grid["lamp_count"]).astype(np.float32)
+    grid = grid[["grid_id", "lamp_count", "watt_sum", "lamp_watt", "existing_lx"]]
+
+    print(f"격자 {len(grid):,}개에 가로등 {len(lamps):,}개 배정 "
+          f"(소비전력 없음 -> {args.default_watt:g}W: {(~lamps['watt_known']).sum():,}개)")
+    print(f"로드 {t_load:.3f}s, 격자 배정/집계 {t_join:.3f}s")
+    if len(grid):
+        print(f"격자당 가로등: 평균 {grid['lamp_count'].mean():.1f}, 최대 {grid['lamp_count'].max()}")
+        print(f"설치 용량 합계: {grid['watt_sum'].sum() / 1000:,.1f} kW")
+        print("existing_lx 분포(격자):")
+        print(grid["existing_lx"].astype(float).describe(percentiles=[0.05, 0.5, 0.95]).round(2).to_string())
+
+    for path, df in [(Path(args.out), grid), (Path(args.lamps_out), lamps.drop(columns="watt_known"))]:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+        print("saved:", path, "rows:", len(df))
+
+
+if __name__ == "__main__":
+    main()
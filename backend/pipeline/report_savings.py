@@ -3,6 +3,10 @@ import argparse
 import numpy as np
 import pandas as pd
 
+from make_streetlight_inventory import DEFAULT_GRID_OUT, join_inventory, load_inventory
+from shard_io import BLOCK_ROWS, iter_all_blocks
+from stream_stats import GroupStats, TDigest, TopK
+
 # =========================
 # 설정
 # =========================
@@ -13,17 +17,113 @@ DEFAULT_TRAIN_READY = PROCESSED / "dummy_train_ready.csv"
 # 발표용 기본 가정(필요하면 실행 옵션으로 바꿀 수 있음)
 DEFAULT_LAMP_WATT = 100
 DEFAULT_HOURS = 3
+TOP_K = 10
 
+ROW_COLS = ["grid_id", "existing_lx", "recommended_lx", "saving_ratio", "saving_percent", "kwh_saved"]
 
-def q(x: pd.Series, p: float) -> float:
-    return float(x.quantile(p))
+
+def add_saving_cols(df: pd.DataFrame, watt: float, hours: float) -> pd.DataFrame:
+    existing = df["existing_lx"].astype(float)
+    reco = df["recommended_lx"].astype(float)
+
+    # =========================
+    # 절감률/절감량 계산
+    # =========================
+    ratio = (reco / existing).clip(lower=0, upper=1)
+    df["saving_ratio"] = 1 - ratio
+    df["saving_percent"] = df["saving_ratio"] * 100.0
+
+    # kWh 절감(가정 기반): (W/1000)*HOURS * saving_ratio
+    # 가로등 재고(watt_sum: 격자 설치 용량 합)가 붙어 있으면 그 격자는 실제 용량, 없으면 --watt
+    if "watt_sum" in df.columns:
+        watt = df["watt_sum"].fillna(watt)
+    df["kwh_saved"] = (watt / 1000.0) * hours * df["saving_ratio"]
+    return df
+
+
+class SavingsReport:
+    """
+    chunk 단위 1-pass 리포트 누적기.
+    합계/개수, 분위수(t-digest), Top/Bottom-k, 그룹별 요약을 한 번의 스캔으로 채운다.
+    merge()로 shard/프로세스별 결과를 합칠 수 있다.
+    """
+
+    def __init__(self, group_by: list, top_k: int = TOP_K):
+        self.rows = 0
+        self.maintain = 0
+        self.min2 = 0
+        self.saving_sum = 0.0
+        self.kwh_sum = 0.0
+        self.digest = TDigest()
+        self.top = TopK(top_k, by="saving_ratio", largest=True)
+        self.bottom = TopK(top_k, by="saving_ratio", largest=False)
+        self.groups = [
+            GroupStats(keys, value_col="saving_percent", sum_cols=["saving_percent", "kwh_saved"])
+            for keys in group_by
+        ]
+
+    def update(self, df: pd.DataFrame):
+        existing = df["existing_lx"].to_numpy(dtype=float)
+        reco = df["recommended_lx"].to_numpy(dtype=float)
+
+        self.rows += len(df)
+        self.maintain += int(np.isclose(reco, existing).sum())
+        self.min2 += int(np.isclose(reco, 2.0).sum())
+        self.saving_sum += float(df["saving_ratio"].sum())
+        self.kwh_sum += float(df["kwh_saved"].sum())
+        self.digest.update(df["saving_ratio"].to_numpy())
+
+        rows = df[ROW_COLS]
+        self.top.update(rows)
+        self.bottom.update(rows)
+        for g in self.groups:
+            g.update(df)
+        return self
+
+    def merge(self, other: "SavingsReport"):
+        self.rows += other.rows
+        self.maintain += other.maintain
+        self.min2 += other.min2
+        self.saving_sum += other.saving_sum
+        self.kwh_sum += other.kwh_sum
+        self.digest.merge(other.digest)
+        self.top.merge(other.top)
+        self.bottom.merge(other.bottom)
+        for g, og in zip(self.groups, other.groups):
+            g.merge(og)
+        return self
+
+    def group_table(self, g: GroupStats) -> pd.DataFrame:
+        rows = []
+        for key, n in g.counts.items():
+            d = g.digests[key]
+            s = g.sums[key]
+            row = dict(zip(g.keys, key))
+            row.update({
+                "count": n,
+                "share_%": n / self.rows * 100.0,
+                "saving_mean_%": s[0] / n,
+                "saving_median_%": d.quantile(0.50),
+                "saving_p05_%": d.quantile(0.05),
+                "saving_p95_%": d.quantile(0.95),
+                "kwh_mean": s[1] / n,
+                "kwh_sum": s[1],
+            })
+            rows.append(row)
+        return pd.DataFrame(rows).sort_values(g.keys).set_index(g.keys)
 
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--input", type=str, default=str(DEFAULT_TRAIN_READY))
+    parser.add_argument("--input", type=str, default=str(DEFAULT_TRAIN_READY),
+                        help="CSV/Parquet 파일 또는 shard 디렉토리")
     parser.add_argument("--watt", type=float, default=DEFAULT_LAMP_WATT)
     parser.add_argument("--hours", type=float, default=DEFAULT_HOURS)
+    parser.add_argument("--group_by", nargs="+", default=["existing_lx"],
+                        help="그룹 요약 키. 콤마로 묶으면 복합 키 (예: existing_lx district,existing_lx)")
+    parser.add_argument("--inventory", type=str, nargs="?", const=str(DEFAULT_GRID_OUT), default=None,
+                        help="격자별 가로등 재고 CSV(make_streetlight_inventory.py). 있으면 격자별 설치 용량으로 계산")
+    parser.add_argument("--block_rows", type=int, default=BLOCK_ROWS)
     parser.add_argument("--save_csv", action="store_true", help="리포트 결과 CSV 저장")
     args = parser.parse_args()
 
@@ -34,104 +134,79 @@ def main():
             f"먼저 train_models.py 실행해서 dummy_train_ready.csv 생성해줘."
         )
 
-    df = pd.read_csv(input_path)
-
+    group_by = [[k.strip() for k in spec.split(",") if k.strip()] for spec in args.group_by]
     need = ["grid_id", "existing_lx", "recommended_lx"]
-    miss = [c for c in need if c not in df.columns]
-    if miss:
-        raise ValueError(f"필요 컬럼이 없어: {miss}")
+    extra = [k for keys in group_by for k in keys if k not in need]
+    use_cols = need + list(dict.fromkeys(extra))
 
-    existing = df["existing_lx"].astype(float)
-    reco = df["recommended_lx"].astype(float)
+    inventory = load_inventory(Path(args.inventory)) if args.inventory else None
+    inv_grids = 0
 
-    # =========================
-    # 절감률/절감량 계산
-    # =========================
-    ratio = (reco / existing).clip(lower=0, upper=1)
-    saving_ratio = 1 - ratio
+    report = SavingsReport(group_by)
+    out_path = PROCESSED / "savings_report_rows.csv"
+    first = True
 
-    df["saving_ratio"] = saving_ratio
-    df["saving_percent"] = saving_ratio * 100.0
+    for df in iter_all_blocks(input_path, block_rows=args.block_rows):
+        miss = [c for c in use_cols if c not in df.columns]
+        if miss:
+            raise ValueError(f"필요 컬럼이 없어: {miss}")
 
-    # kWh 절감(가정 기반): (W/1000)*HOURS * saving_ratio
-    df["kwh_saved"] = (args.watt / 1000.0) * args.hours * df["saving_ratio"]
+        df = df[use_cols].copy()
+        if inventory is not None:
+            df = join_inventory(df, inventory)
+            inv_grids += int(df["watt_sum"].notna().sum())
+        df = add_saving_cols(df, args.watt, args.hours)
+        report.update(df)
 
-    # =========================
-    # 핵심 체크 지표
-    # =========================
-    maintain_rate = float(np.mean(np.isclose(reco.to_numpy(), existing.to_numpy())))
-    min2_rate = float(np.mean(np.isclose(reco.to_numpy(), 2.0)))
-    avg_save = float(df["saving_ratio"].mean())
-    median_save = float(df["saving_ratio"].median())
-    p05_save = q(df["saving_ratio"], 0.05)
-    p95_save = q(df["saving_ratio"], 0.95)
-    total_kwh = float(df["kwh_saved"].sum())
+        # =========================
+        # (옵션) CSV 저장(chunk append)
+        # =========================
+        if args.save_csv:
+            df[ROW_COLS].to_csv(out_path, mode="w" if first else "a", header=first,
+                                index=False, encoding="utf-8-sig" if first else "utf-8")
+        first = False
+
+    if report.rows == 0:
+        raise ValueError(f"입력에 행이 없어: {input_path}")
+
+    n = report.rows
 
     # =========================
     # 전체 요약 출력
     # =========================
     print("\n=== Saving Summary (assumption-based) ===")
     print(f"input: {input_path}")
-    print(f"rows: {len(df)}")
+    print(f"rows: {n}")
     print(f"assumption: {args.watt:.0f}W, {args.hours:.0f}h")
-    print(f"maintain_rate (recommended==existing): {maintain_rate*100:.2f} %")
-    print(f"min2_rate (recommended==2): {min2_rate*100:.2f} %")
-    print(f"avg saving rate: {avg_save*100:.2f} %")
-    print(f"median saving rate: {median_save*100:.2f} %")
-    print(f"p05/p95 saving rate: {p05_save*100:.2f} % / {p95_save*100:.2f} %")
-    print(f"total kWh saved: {total_kwh:.3f} kWh (over all rows)")
+    if inventory is not None:
+        print(f"inventory: {args.inventory} (installed watt for {inv_grids}/{n} rows, {args.watt:.0f}W for the rest)")
+    print(f"maintain_rate (recommended==existing): {report.maintain / n * 100:.2f} %")
+    print(f"min2_rate (recommended==2): {report.min2 / n * 100:.2f} %")
+    print(f"avg saving rate: {report.saving_sum / n * 100:.2f} %")
+    print(f"median saving rate: {report.digest.quantile(0.50) * 100:.2f} % (approx)")
+    print(f"p05/p95 saving rate: {report.digest.quantile(0.05) * 100:.2f} % / "
+          f"{report.digest.quantile(0.95) * 100:.2f} % (approx)")
+    print(f"total kWh saved: {report.kwh_sum:.3f} kWh (over all rows)")
 
     # =========================
-    # existing_lx 구간별 요약
+    # 그룹별 요약(existing_lx, district 등)
     # =========================
-    def pct_share(s: pd.Series) -> float:
-        return float(len(s) / len(df) * 100.0)
-
-    rows = []
-    for lx, g in df.groupby("existing_lx"):
-        rows.append({
-            "existing_lx": lx,
-            "count": len(g),
-            "share_%": pct_share(g["grid_id"]),
-            "saving_mean_%": float(g["saving_percent"].mean()),
-            "saving_median_%": float(g["saving_percent"].median()),
-            "saving_p05_%": q(g["saving_percent"], 0.05),
-            "saving_p95_%": q(g["saving_percent"], 0.95),
-            "kwh_mean": float(g["kwh_saved"].mean()),
-            "kwh_sum": float(g["kwh_saved"].sum()),
-        })
-
-    by_df = pd.DataFrame(rows).sort_values("existing_lx").set_index("existing_lx")
-
-    print("\n=== By existing_lx ===")
-    print(by_df.round(4).to_string())
+    for g in report.groups:
+        print(f"\n=== By {', '.join(g.keys)} ===")
+        print(report.group_table(g).round(4).to_string())
 
     # =========================
     # Top/Bottom 절감 격자
     # =========================
-    top = df.sort_values("saving_ratio", ascending=False).head(10)[
-        ["grid_id", "existing_lx", "recommended_lx", "saving_percent", "kwh_saved"]
-    ]
-    bottom = df.sort_values("saving_ratio", ascending=True).head(10)[
-        ["grid_id", "existing_lx", "recommended_lx", "saving_percent", "kwh_saved"]
-    ]
+    show = ["grid_id", "existing_lx", "recommended_lx", "saving_percent", "kwh_saved"]
 
-    print("\n=== Top10 savings ===")
-    print(top.round(4).to_string(index=False))
+    print(f"\n=== Top{TOP_K} savings ===")
+    print(report.top.result()[show].round(4).to_string(index=False))
 
-    print("\n=== Bottom10 savings (almost 유지) ===")
-    print(bottom.round(6).to_string(index=False))
+    print(f"\n=== Bottom{TOP_K} savings (almost 유지) ===")
+    print(report.bottom.result()[show].round(6).to_string(index=False))
 
-    # =========================
-    # (옵션) CSV 저장
-    # =========================
     if args.save_csv:
-        out_path = PROCESSED / "savings_report_rows.csv"
-        df_out = df[[
-            "grid_id", "existing_lx", "recommended_lx",
-            "saving_ratio", "saving_percent", "kwh_saved"
-        ]].copy()
-        df_out.to_csv(out_path, index=False, encoding="utf-8-sig")
         print("\nsaved:", out_path)
 
 
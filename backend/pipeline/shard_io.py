@@ -0,0 +1,79 @@
+from pathlib import Path
+from typing import Iterator, List, Optional
+import pandas as pd
+
+# =========================
+# 설정
+# =========================
+SHARD_EXTS = (".parquet", ".csv")
+BLOCK_ROWS = 250_000   # 한 번에 메모리에 올리는 행 수
+
+
+def list_shards(path: Path) -> List[Path]:
+    """파일이면 [파일], 디렉토리면 그 안의 shard(part-*.parquet / part-*.csv)들을 이름순으로."""
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    if path.is_dir():
+        shards = sorted(p for p in path.iterdir() if p.suffix in SHARD_EXTS and not p.name.startswith("."))
+        if not shards:
+            raise FileNotFoundError(f"shard 파일이 없어: {path}")
+        return shards
+    raise FileNotFoundError(f"입력 경로가 없어: {path}")
+
+
+def iter_blocks(
+    path: Path,
+    columns: Optional[List[str]] = None,
+    block_rows: int = BLOCK_ROWS,
+    sep: str = ",",
+) -> Iterator[pd.DataFrame]:
+    """shard 1개를 block_rows 단위 DataFrame으로 순차 읽기(전체를 올리지 않음)."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=block_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        reader = pd.read_csv(path, sep=sep, usecols=columns, chunksize=block_rows, encoding="utf-8-sig")
+        for df in reader:
+            df.columns = df.columns.astype(str).str.strip()
+            yield df
+
+
+def iter_all_blocks(
+    path: Path,
+    columns: Optional[List[str]] = None,
+    block_rows: int = BLOCK_ROWS,
+    sep: str = ",",
+) -> Iterator[pd.DataFrame]:
+    """파일/디렉토리 구분 없이 모든 shard의 block을 순서대로."""
+    for shard in list_shards(path):
+        yield from iter_blocks(shard, columns=columns, block_rows=block_rows, sep=sep)
+
+
+def peak_rss_mb() -> float:
+    """현재 프로세스의 peak RSS(MB). resource가 없는 OS(Windows)면 nan."""
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    import sys
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 byte, Linux는 KB 단위
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def rss_mb() -> float:
+    """현재 프로세스의 RSS(MB). /proc이 없는 OS면 nan(메모리 증가량 비교용)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return float("nan")
+    import os
+
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
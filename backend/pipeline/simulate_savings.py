@@ -0,0 +1,368 @@
+from pathlib import Path
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from make_streetlight_inventory import DEFAULT_GRID_OUT, join_inventory, load_inventory
+from shard_io import BLOCK_ROWS, iter_all_blocks, peak_rss_mb
+
+# =========================
+# 설정
+# =========================
+ROOT = Path(__file__).resolve().parents[2]
+PROCESSED = ROOT / "data" / "processed"
+DEFAULT_INPUT = ROOT / "backend" / "models" / "recommend_model" / "recommend_output.csv"
+DEFAULT_OUT = PROCESSED / "savings_simulation_grids.csv"
+DEFAULT_DAILY_OUT = PROCESSED / "savings_simulation_daily.csv"
+
+# report_savings.py와 같은 기본 가정(등 1개, 100W)
+DEFAULT_LAMP_WATT = 100
+DEFAULT_YEAR = 2025
+
+# 서울시청 기준(위도/경도), KST = UTC+9
+SEOUL_LAT = 37.5665
+SEOUL_LON = 126.9780
+TZ_HOURS = 9
+SUN_ZENITH_DEG = 90.833   # 일출/일몰: 태양 중심이 지평선 아래 0.833도(대기 굴절 + 태양 반지름)
+
+# 1시간 단위 야간 슬롯: 16:00 ~ 다음날 09:00 (서울 일몰 17:1x~19:5x, 일출 05:1x~07:4x를 모두 포함)
+NIGHT_START_HOUR = 16
+N_SLOTS = 17
+
+# 디밍 창: 일몰 후 AFTER_SUNSET_H 시간 ~ 일출 전 BEFORE_SUNRISE_H 시간 (저녁/새벽 통행 시간대는 정상 조도)
+AFTER_SUNSET_H = 3.0
+BEFORE_SUNRISE_H = 1.0
+
+# chunk(일 x 격자 x 슬롯) float32 배열 메모리 상한. 임시 배열 3개 기준으로 chunk 크기를 정한다
+MAX_CHUNK_MB = 64
+TEMP_ARRAYS = 3
+
+SLOT_RECO_PREFIX = "recommended_lx_h"   # 슬롯별 추천 조도 컬럼(예: recommended_lx_h23), 없으면 recommended_lx
+
+
+def sun_times(dates: pd.DatetimeIndex, lat: float = SEOUL_LAT, lon: float = SEOUL_LON,
+              tz_hours: float = TZ_HOURS):
+    """
+    날짜별 일출/일몰 시각(현지 시각, 자정 기준 시간 단위 float).
+    NOAA General Solar Position 근사식(균시차 + 적위), 오차 1~2분 수준.
+    """
+    days_in_year = np.where(dates.is_leap_year, 366, 365)
+    g = 2 * np.pi / days_in_year * (dates.dayofyear.to_numpy() - 1)
+
+    eqtime = 229.18 * (0.000075 + 0.001868 * np.cos(g) - 0.032077 * np.sin(g)
+                       - 0.014615 * np.cos(2 * g) - 0.040849 * np.sin(2 * g))
+    decl = (0.006918 - 0.399912 * np.cos(g) + 0.070257 * np.sin(g)
+            - 0.006758 * np.cos(2 * g) + 0.000907 * np.sin(2 * g)
+            - 0.002697 * np.cos(3 * g) + 0.00148 * np.sin(3 * g))
+
+    phi = np.radians(lat)
+    cos_ha = np.cos(np.radians(SUN_ZENITH_DEG)) / (np.cos(phi) * np.cos(decl)) - np.tan(phi) * np.tan(decl)
+    ha = np.degrees(np.arccos(np.clip(cos_ha, -1.0, 1.0)))
+
+    # UTC 분 단위 -> 현지 시각(시간)
+    sunrise = (720 - 4 * (lon + ha) - eqtime) / 60.0 + tz_hours
+    sunset = (720 - 4 * (lon - ha) - eqtime) / 60.0 + tz_hours
+    return sunrise, sunset
+
+
+def slot_overlap(start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """일별 구간 [start, end)(자정 기준 시간)이 각 1시간 슬롯을 덮는 비율 -> (일, 슬롯) float32."""
+    s0 = NIGHT_START_HOUR + np.arange(N_SLOTS, dtype=float)
+    lo = np.maximum(start[:, None], s0[None, :])
+    hi = np.minimum(end[:, None], s0[None, :] + 1.0)
+    return np.clip(hi - lo, 0.0, 1.0).astype(np.float32)
+
+
+class NightSlots:
+    """
+    1년치 (일 x 슬롯) 점등/디밍 비율 표.
+    - lit: 일몰 ~ 다음날 일출 (가로등 점등 시간)
+    - dim: 일몰+after_sunset ~ 다음날 일출-before_sunrise (추천 조도로 낮추는 시간)
+    """
+
+    def __init__(self, year: int = DEFAULT_YEAR, lat: float = SEOUL_LAT, lon: float = SEOUL_LON,
+                 after_sunset: float = AFTER_SUNSET_H, before_sunrise: float = BEFORE_SUNRISE_H):
+        self.dates = pd.date_range(f"{year}-01-01", f"{year}-12-31", freq="D")
+        _, self.sunset = sun_times(self.dates, lat, lon)
+        # 밤은 다음날 일출에 끝난다(12/31 밤은 다음 해 1/1 일출)
+        self.sunrise_next, _ = sun_times(self.dates + pd.Timedelta(days=1), lat, lon)
+        self.sunrise_next = self.sunrise_next + 24.0
+
+        self.lit = slot_overlap(self.sunset, self.sunrise_next)
+        dim_start = self.sunset + after_sunset
+        dim_end = np.maximum(self.sunrise_next - before_sunrise, dim_start)
+        self.dim = slot_overlap(dim_start, dim_end)
+        # 슬롯 끝까지 누적 디밍 시간(격자별 유지시간 상한 계산용)
+        self.dim_cum = np.cumsum(self.dim, axis=1, dtype=np.float32)
+
+        self.slot_hours = (NIGHT_START_HOUR + np.arange(N_SLOTS)) % 24
+
+    @property
+    def days(self) -> int:
+        return len(self.dates)
+
+
+def read_grid_block(df: pd.DataFrame, watt: float, keep_hours):
+    """
+    block -> (grid_id, 기존/추천 조도, 슬롯별 절감률(격자 x 슬롯), 격자별 kW, 디밍 유지시간 상한).
+    - 슬롯별 추천 조도 recommended_lx_hHH가 있으면 그 슬롯에 사용, 없으면 recommended_lx
+    - lamp_watt / lamp_count 컬럼이 있으면 격자별 전력, 없으면 --watt x 1개
+    - keep_hours: "auto"면 입력에 keep_hours 컬럼이 있을 때 그 값, 없으면 디밍 창 전체.
+      None/"full"이면 디밍 창 전체, "column"이면 입력 keep_hours 컬럼(필수), 숫자면 고정 상한
+    """
+    existing = df["existing_lx"].to_numpy(dtype=np.float32)
+    base_reco = df["recommended_lx"].to_numpy(dtype=np.float32)
+
+    reco = np.empty((len(df), N_SLOTS), dtype=np.float32)
+    for s, hour in enumerate((NIGHT_START_HOUR + np.arange(N_SLOTS)) % 24):
+        col = f"{SLOT_RECO_PREFIX}{hour:02d}"
+        reco[:, s] = df[col].to_numpy(dtype=np.float32) if col in df.columns else base_reco
+    reco = np.where(np.isnan(reco), base_reco[:, None], reco)
+
+    # 절감률 = 1 - 추천/기존 (밝히기 금지라 0~1)
+    ratio = 1.0 - np.clip(reco / existing[:, None], 0.0, 1.0)
+
+    lamp_watt = df["lamp_watt"].to_numpy(dtype=np.float32) if "lamp_watt" in df.columns else np.full(len(df), np.nan, np.float32)
+    lamp_count = df["lamp_count"].to_numpy(dtype=np.float32) if "lamp_count" in df.columns else np.ones(len(df), np.float32)
+    kw = np.where(np.isnan(lamp_watt), watt, lamp_watt) * np.nan_to_num(lamp_count, nan=1.0) / 1000.0
+
+    if keep_hours == "auto":
+        keep_hours = "column" if "keep_hours" in df.columns else None
+    if keep_hours in (None, "full"):
+        cap = None
+    elif keep_hours == "column":
+        if "keep_hours" not in df.columns:
+            raise ValueError("--keep_hours column인데 입력에 keep_hours 컬럼이 없어")
+        cap = df["keep_hours"].to_numpy(dtype=np.float32)
+    else:
+        cap = np.full(len(df), float(keep_hours), dtype=np.float32)
+
+    return df["grid_id"].to_numpy(), existing, base_reco, ratio.astype(np.float32), kw.astype(np.float32), cap
+
+
+class SavingsSimulation:
+    """
+    (일 x 격자 x 슬롯) 절감 kWh를 chunk 단위 float32 배열 연산으로 1년치 누적.
+    chunk 크기는 max_mb 안에서 정하므로 격자 수/기간과 무관하게 메모리가 일정하다.
+    격자별 합계는 block마다 바로 돌려주고(CSV append), 일/슬롯별 합계만 들고 있는다.
+    """
+
+    def __init__(self, nights: NightSlots, max_mb: float = MAX_CHUNK_MB):
+        self.nights = nights
+        self.budget = max(int(max_mb * 1024 * 1024 / (4 * TEMP_ARRAYS)), N_SLOTS)   # chunk 원소 수 상한
+        self.grids = 0
+        self.daily_kwh_saved = np.zeros(nights.days)
+        self.daily_kwh_base = np.zeros(nights.days)
+        self.slot_kwh_saved = np.zeros(N_SLOTS)
+        self.lit_hours = float(nights.lit.sum(dtype=np.float64))
+
+    def _saved(self, ratio_kw: np.ndarray, cap, d0: int, d1: int) -> np.ndarray:
+        """chunk (d1-d0, 격자, 슬롯) 절감 kWh."""
+        if cap is None:
+            return self.nights.dim[d0:d1, None, :] * ratio_kw[None, :, :]
+        # 격자별 유지시간 상한: 슬롯 끝 누적 디밍 시간을 cap에서 자르고 슬롯 단위로 되돌린다
+        end = self.nights.dim_cum[d0:d1, None, :]
+        start = end - self.nights.dim[d0:d1, None, :]
+        c = cap[None, :, None]
+        eff = np.minimum(end, c)
+        eff -= np.minimum(start, c)
+        eff *= ratio_kw[None, :, :]
+        return eff
+
+    def run_block(self, ratio: np.ndarray, kw: np.ndarray, cap) -> dict:
+        n = len(kw)
+        ratio_kw = ratio * kw[:, None]
+        grid_saved = np.zeros(n)
+
+        grid_step = max(1, min(n, self.budget // N_SLOTS))
+        day_step = max(1, min(self.nights.days, self.budget // (grid_step * N_SLOTS)))
+        for g0 in range(0, n, grid_step):
+            g1 = min(g0 + grid_step, n)
+            rk = ratio_kw[g0:g1]
+            c = None if cap is None else cap[g0:g1]
+            for d0 in range(0, self.nights.days, day_step):
+                d1 = min(d0 + day_step, self.nights.days)
+                saved = self._saved(rk, c, d0, d1)
+                grid_saved[g0:g1] += saved.sum(axis=(0, 2), dtype=np.float64)
+                self.daily_kwh_saved[d0:d1] += saved.sum(axis=(1, 2), dtype=np.float64)
+                self.slot_kwh_saved += saved.sum(axis=(0, 1), dtype=np.float64)
+
+        # 기준(디밍 없음) 소비는 격자와 무관한 점등 시간 x kW
+        self.daily_kwh_base += self.nights.lit.sum(axis=1, dtype=np.float64) * float(kw.sum(dtype=np.float64))
+        self.grids += n
+
+        night_dim = self.nights.dim.sum(axis=1, dtype=np.float64)
+        dim_hours = (np.full(n, night_dim.sum()) if cap is None
+                     else np.minimum(night_dim[None, :], cap[:, None].astype(np.float64)).sum(axis=1))
+        return {
+            "kwh_base": kw.astype(np.float64) * self.lit_hours,
+            "kwh_saved": grid_saved,
+            "dim_hours": dim_hours,
+        }
+
+    def monthly(self) -> pd.DataFrame:
+        month = self.nights.dates.month
+        nights = self.nights
+        df = pd.DataFrame({
+            "month": month,
+            "night_h": nights.sunrise_next - nights.sunset,
+            "dim_h": nights.dim.sum(axis=1),
+            "kwh_base": self.daily_kwh_base,
+            "kwh_saved": self.daily_kwh_saved,
+        })
+        out = df.groupby("month").agg(
+            night_h_mean=("night_h", "mean"), dim_h_mean=("dim_h", "mean"),
+            kwh_base=("kwh_base", "sum"), kwh_saved=("kwh_saved", "sum"),
+        )
+        out["saving_%"] = out["kwh_saved"] / out["kwh_base"].where(out["kwh_base"] > 0) * 100.0
+        return out
+
+    def daily(self) -> pd.DataFrame:
+        nights = self.nights
+        return pd.DataFrame({
+            "date": nights.dates.strftime("%Y-%m-%d"),
+            "sunset": np.round(nights.sunset, 4),
+            "sunrise_next": np.round(nights.sunrise_next - 24.0, 4),
+            "lit_hours": np.round(nights.lit.sum(axis=1), 4),
+            "dim_hours": np.round(nights.dim.sum(axis=1), 4),
+            "kwh_base": np.round(self.daily_kwh_base, 3),
+            "kwh_saved": np.round(self.daily_kwh_saved, 3),
+        })
+
+
+def fmt_hour(h: float) -> str:
+    h = h % 24
+    return f"{int(h):02d}:{int(round((h - int(h)) * 60)) % 60:02d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="일몰/일출 기반 1년치 격자 x 야간 슬롯 절감량 시뮬레이션")
+    parser.add_argument("--input", type=str, default=str(DEFAULT_INPUT),
+                        help="추천 결과 CSV/Parquet 또는 shard 디렉토리(grid_id, existing_lx, recommended_lx)")
+    parser.add_argument("--year", type=int, default=DEFAULT_YEAR)
+    parser.add_argument("--lat", type=float, default=SEOUL_LAT)
+    parser.add_argument("--lon", type=float, default=SEOUL_LON)
+    parser.add_argument("--watt", type=float, default=DEFAULT_LAMP_WATT, help="lamp_watt 컬럼이 없을 때 등 1개 전력(W)")
+    parser.add_argument("--after_sunset", type=float, default=AFTER_SUNSET_H, help="일몰 후 디밍 시작까지(시간)")
+    parser.add_argument("--before_sunrise", type=float, default=BEFORE_SUNRISE_H, help="디밍 종료 ~ 일출(시간)")
+    parser.add_argument("--keep_hours", type=str, default="auto",
+                        help="밤마다 디밍 유지시간 상한. auto(기본)면 입력 keep_hours 컬럼(없으면 디밍 창 전체), "
+                             "full이면 디밍 창 전체, column이면 입력 keep_hours 컬럼(필수), 숫자면 고정")
+    parser.add_argument("--inventory", type=str, nargs="?", const=str(DEFAULT_GRID_OUT), default=None,
+                        help="격자별 가로등 재고 CSV(make_streetlight_inventory.py). lamp_watt/lamp_count를 붙여서 계산")
+    parser.add_argument("--max_mb", type=float, default=MAX_CHUNK_MB, help="chunk 배열 메모리 상한(MB)")
+    parser.add_argument("--block_rows", type=int, default=BLOCK_ROWS)
+    parser.add_argument("--out", type=str, default=str(DEFAULT_OUT), help="격자별 연간 결과 CSV")
+    parser.add_argument("--daily_out", type=str, nargs="?", const=str(DEFAULT_DAILY_OUT), default=None,
+                        help="(옵션) 일별 합계 CSV 저장(경로 생략 시 savings_simulation_daily.csv)")
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    if not input_path.exists():
+        raise FileNotFoundError(
+            f"추천 결과 파일이 없어: {input_path}\n"
+            f"먼저 predict.py 실행해서 recommend_output.csv 생성해줘."
+        )
+    keep_hours = args.keep_hours
+    if keep_hours not in ("auto", "full", "column"):
+        keep_hours = float(keep_hours)
+
+    t0 = time.perf_counter()
+    nights = NightSlots(args.year, args.lat, args.lon, args.after_sunset, args.before_sunrise)
+    sim = SavingsSimulation(nights, max_mb=args.max_mb)
+
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    inventory = load_inventory(Path(args.inventory)) if args.inventory else None
+    flat_kwh = 0.0
+    first = True
+    has_keep_col = False
+
+    for df in iter_all_blocks(input_path, block_rows=args.block_rows):
+        miss = [c for c in ["grid_id", "existing_lx", "recommended_lx"] if c not in df.columns]
+        if miss:
+            raise ValueError(f"필요 컬럼이 없어: {miss}")
+        if inventory is not None:
+            df = join_inventory(df, inventory)
+
+        has_keep_col = has_keep_col or "keep_hours" in df.columns
+        grid_id, existing, reco, ratio, kw, cap = read_grid_block(df, args.watt, keep_hours)
+        res = sim.run_block(ratio, kw, cap)
+
+        # 비교용: report_savings.py의 고정 가정(--watt, 3시간, 365일)
+        flat_ratio = 1.0 - np.clip(reco / existing, 0.0, 1.0)
+        flat_kwh += float((args.watt / 1000.0 * 3 * nights.days * flat_ratio).sum())
+
+        rows = pd.DataFrame({
+            "grid_id": grid_id,
+            "existing_lx": existing,
+            "recommended_lx": reco,
+            "kw": kw,
+            "dim_hours": np.round(res["dim_hours"], 2),
+            "kwh_base": np.round(res["kwh_base"], 3),
+            "kwh_saved": np.round(res["kwh_saved"], 3),
+        })
+        rows["saving_percent"] = (rows["kwh_saved"] / rows["kwh_base"].where(rows["kwh_base"] > 0) * 100.0).round(3)
+        rows.to_csv(out_path, mode="w" if first else "a", header=first,
+                    index=False, encoding="utf-8-sig" if first else "utf-8")
+        first = False
+
+    if sim.grids == 0:
+        raise ValueError(f"입력에 행이 없어: {input_path}")
+    elapsed = time.perf_counter() - t0
+
+    # =========================
+    # 전체 요약 출력
+    # =========================
+    base = sim.daily_kwh_base.sum()
+    saved = sim.daily_kwh_saved.sum()
+    night_h = nights.sunrise_next - nights.sunset
+    dim_h = nights.dim.sum(axis=1)
+    longest, shortest = int(night_h.argmax()), int(night_h.argmin())
+
+    print("\n=== Year Simulation (sunset/sunrise based) ===")
+    print(f"input: {input_path}")
+    print(f"grids: {sim.grids:,}, days: {nights.days}, slots: {N_SLOTS} "
+          f"({NIGHT_START_HOUR:02d}:00~{(NIGHT_START_HOUR + N_SLOTS) % 24:02d}:00)")
+    print(f"location: {args.lat:.4f}, {args.lon:.4f} (UTC+{TZ_HOURS})")
+    print(f"longest night: {nights.dates[longest]:%m-%d} {fmt_hour(nights.sunset[longest])}~"
+          f"{fmt_hour(nights.sunrise_next[longest])} ({night_h[longest]:.2f}h)")
+    print(f"shortest night: {nights.dates[shortest]:%m-%d} {fmt_hour(nights.sunset[shortest])}~"
+          f"{fmt_hour(nights.sunrise_next[shortest])} ({night_h[shortest]:.2f}h)")
+    cap_desc = args.keep_hours
+    if keep_hours == "auto":
+        cap_desc = "auto (input keep_hours column)" if has_keep_col else "auto (none, no keep_hours column)"
+    print(f"dimming window: sunset+{args.after_sunset:g}h ~ sunrise-{args.before_sunrise:g}h, "
+          f"{dim_h.min():.2f}~{dim_h.max():.2f}h/night, keep_hours cap: {cap_desc}")
+    print(f"lit hours/year: {sim.lit_hours:.1f} h")
+    print(f"baseline kWh/year: {base:,.1f}")
+    print(f"saved kWh/year: {saved:,.1f} ({saved / base * 100 if base else 0.0:.2f} %)")
+    print(f"flat assumption ({args.watt:.0f}W x 3h x {nights.days}d): {flat_kwh:,.1f} kWh")
+    print(f"elapsed: {elapsed:.3f}s, peak RSS: {peak_rss_mb():.1f} MB")
+
+    # =========================
+    # 월별 / 슬롯별 요약
+    # =========================
+    print("\n=== By month ===")
+    print(sim.monthly().round(3).to_string())
+
+    print("\n=== By slot (kWh saved/year) ===")
+    slots = pd.DataFrame({
+        "slot": [f"{h:02d}:00" for h in nights.slot_hours],
+        "lit_h": nights.lit.sum(axis=0),
+        "dim_h": nights.dim.sum(axis=0),
+        "kwh_saved": sim.slot_kwh_saved,
+    })
+    slots["share_%"] = slots["kwh_saved"] / saved * 100.0 if saved else 0.0
+    print(slots.round(3).to_string(index=False))
+
+    print("\nsaved:", out_path)
+    if args.daily_out:
+        Path(args.daily_out).parent.mkdir(parents=True, exist_ok=True)
+        sim.daily().to_csv(args.daily_out, index=False, encoding="utf-8-sig")
+        print("saved:", args.daily_out)
+
+
+if __name__ == "__main__":
+    main()
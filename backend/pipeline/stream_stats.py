@@ -0,0 +1,140 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# =========================
+# 병합 가능한(mergeable) 스트리밍 누적기
+# - chunk마다 update, shard/프로세스끼리는 merge
+# - 메모리는 입력 행 수와 무관(centroid 수 / k / 그룹 수에만 비례)
+# =========================
+DEFAULT_COMPRESSION = 200
+
+
+class TDigest:
+    """
+    t-digest 스타일 분위수 근사.
+    scale function k(q) = δ/(2π)·asin(2q-1)로 꼬리 쪽 centroid를 촘촘하게 유지한다.
+    압축은 정렬 + bincount로 벡터화(파이썬 루프 없음).
+    """
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.count = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._absorb(values, np.ones_like(values))
+        return self
+
+    def merge(self, other: "TDigest"):
+        if other.count == 0:
+            return self
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._absorb(other.means, other.weights)
+        return self
+
+    def _absorb(self, means: np.ndarray, weights: np.ndarray):
+        m = np.concatenate([self.means, means])
+        w = np.concatenate([self.weights, weights])
+        order = np.argsort(m, kind="mergesort")
+        m, w = m[order], w[order]
+
+        total = w.sum()
+        q_mid = (np.cumsum(w) - w / 2.0) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1)
+        cluster = np.floor(k - k[0]).astype(np.int64)
+
+        cw = np.bincount(cluster, weights=w)
+        cm = np.bincount(cluster, weights=m * w)
+        keep = cw > 0
+        self.weights = cw[keep]
+        self.means = cm[keep] / self.weights
+        self.count = float(total)
+
+    def quantile(self, p: float) -> float:
+        if self.count == 0:
+            return float("nan")
+        if p <= 0:
+            return self.min
+        if p >= 1:
+            return self.max
+        target = p * self.count
+        mids = np.cumsum(self.weights) - self.weights / 2.0
+        xs = np.concatenate([[0.0], mids, [self.count]])
+        ys = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(target, xs, ys))
+
+
+class TopK:
+    """값이 큰(또는 작은) k개 행만 유지하는 bounded heap. chunk마다 argpartition으로 후보만 추림."""
+
+    def __init__(self, k: int, by: str, largest: bool = True):
+        self.k = k
+        self.by = by
+        self.largest = largest
+        self.rows: Optional[pd.DataFrame] = None
+
+    def _select(self, df: pd.DataFrame) -> pd.DataFrame:
+        if len(df) > self.k:
+            v = df[self.by].to_numpy()
+            v = -v if self.largest else v
+            idx = np.argpartition(v, self.k - 1)[:self.k]
+            df = df.iloc[idx]
+        return df
+
+    def update(self, df: pd.DataFrame):
+        cand = self._select(df)
+        if self.rows is not None:
+            cand = self._select(pd.concat([self.rows, cand], ignore_index=True))
+        self.rows = cand.reset_index(drop=True)
+        return self
+
+    def merge(self, other: "TopK"):
+        if other.rows is not None:
+            self.update(other.rows)
+        return self
+
+    def result(self) -> pd.DataFrame:
+        if self.rows is None:
+            return pd.DataFrame()
+        return self.rows.sort_values(self.by, ascending=not self.largest, kind="mergesort")
+
+
+class GroupStats:
+    """그룹 키별 count/sum + 분위수 digest. 그룹 수만큼만 메모리를 쓴다."""
+
+    def __init__(self, keys: List[str], value_col: str, sum_cols: List[str],
+                 compression: int = DEFAULT_COMPRESSION):
+        self.keys = keys
+        self.value_col = value_col
+        self.sum_cols = sum_cols
+        self.compression = compression
+        self.counts: Dict[Tuple, int] = {}
+        self.sums: Dict[Tuple, np.ndarray] = {}
+        self.digests: Dict[Tuple, TDigest] = {}
+
+    def update(self, df: pd.DataFrame):
+        for key, g in df.groupby(self.keys, sort=False, dropna=False):
+            key = key if isinstance(key, tuple) else (key,)
+            self.counts[key] = self.counts.get(key, 0) + len(g)
+            s = g[self.sum_cols].to_numpy(dtype=np.float64).sum(axis=0)
+            self.sums[key] = self.sums[key] + s if key in self.sums else s
+            self.digests.setdefault(key, TDigest(self.compression)).update(g[self.value_col].to_numpy())
+        return self
+
+    def merge(self, other: "GroupStats"):
+        for key, n in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + n
+            self.sums[key] = self.sums[key] + other.sums[key] if key in self.sums else other.sums[key].copy()
+            self.digests.setdefault(key, TDigest(self.compression)).merge(other.digests[key])
+        return self
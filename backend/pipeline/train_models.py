@@ -1,4 +1,9 @@
 from pathlib import Path
+from typing import Dict, Optional
+import argparse
+import json
+import multiprocessing
+import time
 import numpy as np
 import pandas as pd
 import joblib
@@ -11,6 +16,13 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import ElasticNet
 from sklearn.neural_network import MLPRegressor
 
+from shard_io import BLOCK_ROWS, iter_blocks, list_shards, peak_rss_mb, rss_mb
+
+try:
+    import lightgbm as lgb
+except ImportError:  # in-memory 모드는 LightGBM 없이도 ElasticNet/MLP 학습 가능
+    lgb = None
+
 
 # =========================
 # 설정
@@ -21,9 +33,39 @@ MODELS_DIR = ROOT / "backend" / "models"
 MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
 DATA_PATH = PROCESSED / "dummy_features_9cols.csv"
+SHARD_DIR = PROCESSED / "dummy_features_9cols"      # make_dummy_features.py --format parquet
 OUT_TRAIN_READY = PROCESSED / "dummy_train_ready.csv"
+BIN_DIR = PROCESSED / "lgbm_bin"                     # out-of-core 모드 binned dataset 캐시
+FEATURE_STATS_PATH = MODELS_DIR / "feature_stats.json"  # 예측 시 NaN 대체용 학습 통계
 SEED = 42
 
+FEATURE_COLS = [
+    "night_traffic",
+    "cctv_density",
+    "park_within",
+    "commercial_density",
+    "residential_density",
+    "existing_lx",
+]
+
+# LGBMRegressor(in-memory) 설정과 동일하게 맞춘 booster 파라미터
+LGBM_PARAMS = {
+    "objective": "regression",
+    "learning_rate": 0.05,
+    "num_leaves": 63,
+    "feature_fraction": 0.8,
+    "seed": SEED,
+    "verbose": -1,
+}
+LGBM_ROUNDS = 600
+BIN_PARAM_KEYS = ["max_bin", "min_data_in_bin", "bin_construct_sample_cnt"]   # binned dataset 구간을 바꾸는 파라미터
+
+# 평가 모드(--evaluate): 서빙 엔진 선택용 정확도/지연/메모리 비교
+EVAL_OUT = MODELS_DIR / "model_eval.json"
+EVAL_BATCH_SIZES = [1, 32, 1_000, 100_000]
+EVAL_MIN_SECONDS = 0.5   # 배치 크기별로 최소 이만큼은 반복 측정
+EVAL_MAX_REPEAT = 200
+
 
 def clamp(x, lo, hi):
     return np.minimum(np.maximum(x, lo), hi)
@@ -70,7 +112,18 @@ def metrics(y_true, y_pred, name="model"):
     return {"model": name, "MAE": mae, "RMSE": rmse, "R2": r2}
 
 
-def main():
+def split_dataset(X, y, existing):
+    """train/val/test = 70/15/15 (SEED 고정이라 평가 모드에서도 같은 test split)."""
+    X_train, X_tmp, y_train, y_tmp, ex_train, ex_tmp = train_test_split(
+        X, y, existing, test_size=0.30, random_state=SEED
+    )
+    X_val, X_test, y_val, y_test, ex_val, ex_test = train_test_split(
+        X_tmp, y_tmp, ex_tmp, test_size=0.50, random_state=SEED
+    )
+    return X_train, X_val, X_test, y_train, y_val, y_test, ex_train, ex_val, ex_test
+
+
+def train_in_memory():
     if not DATA_PATH.exists():
         raise FileNotFoundError(
             f"dummy 데이터가 없어: {DATA_PATH}\n"
@@ -85,26 +138,12 @@ def main():
     df["delta_percent"] = delta
 
     # 2) feature / target
-    feature_cols = [
-        "night_traffic",
-        "cctv_density",
-        "park_within",
-        "commercial_density",
-        "residential_density",
-        "existing_lx",
-    ]
-
-    X = df[feature_cols].copy()
+    X = df[FEATURE_COLS].copy()
     y = df["recommended_lx"].astype(float).to_numpy()
     existing = df["existing_lx"].astype(float).to_numpy()
 
     # 3) split
-    X_train, X_tmp, y_train, y_tmp, ex_train, ex_tmp = train_test_split(
-        X, y, existing, test_size=0.30, random_state=SEED
-    )
-    X_val, X_test, y_val, y_test, ex_val, ex_test = train_test_split(
-        X_tmp, y_tmp, ex_tmp, test_size=0.50, random_state=SEED
-    )
+    X_train, X_val, X_test, y_train, y_val, y_test, ex_train, ex_val, ex_test = split_dataset(X, y, existing)
 
     results = []
 
@@ -179,6 +218,449 @@ def main():
     joblib.dump(mlp, MODELS_DIR / "mlp_reco.pkl")
     print("saved model:", MODELS_DIR / "mlp_reco.pkl")
 
+    # 7) 학습 통계 저장(predict.py 스트리밍 모드의 NaN 대체용 median)
+    save_feature_stats(X_train)
+
+
+def save_feature_stats(X_train: pd.DataFrame, path: Path = FEATURE_STATS_PATH):
+    stats = {
+        "rows": int(len(X_train)),
+        "median": {c: float(v) for c, v in X_train.median(numeric_only=True).items()},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False, indent=2)
+    print("saved feature stats:", path)
+
+
+# =========================
+# out-of-core 모드
+# =========================
+class ShardSequence(lgb.Sequence if lgb is not None else object):
+    """
+    shard 1개를 block 단위로만 메모리에 올리는 LightGBM Sequence.
+    LightGBM은 샘플링(단조 증가 index) -> 순차 batch push 순서로 읽기 때문에
+    현재 block 하나만 캐시해 두고 앞으로만 읽으면 된다(뒤로 가면 처음부터 다시 읽음).
+    """
+
+    def __init__(self, path: Path, length: int, block_rows: int = BLOCK_ROWS):
+        self.path = path
+        self.length = length
+        self.block_rows = block_rows
+        self.batch_size = block_rows
+        self._blocks = None
+        self._block = None
+        self._block_start = 0
+
+    def __len__(self):
+        return self.length
+
+    def _rewind(self):
+        self._blocks = iter_blocks(self.path, columns=FEATURE_COLS, block_rows=self.block_rows)
+        self._block = None
+        self._block_start = 0
+
+    def _seek(self, row: int):
+        if self._blocks is None or row < self._block_start:
+            self._rewind()
+        while self._block is None or row >= self._block_start + len(self._block):
+            if self._block is not None:
+                self._block_start += len(self._block)
+            df = next(self._blocks)
+            self._block = df[FEATURE_COLS].to_numpy(dtype=np.float64)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            self._seek(int(idx))
+            return self._block[int(idx) - self._block_start]
+        if isinstance(idx, slice):
+            start, stop, _ = idx.indices(self.length)
+            parts = []
+            row = start
+            while row < stop:
+                self._seek(row)
+                lo = row - self._block_start
+                hi = min(stop - self._block_start, len(self._block))
+                parts.append(self._block[lo:hi])
+                row = self._block_start + hi
+            return parts[0] if len(parts) == 1 else np.concatenate(parts)
+        raise TypeError(f"Sequence index must be integer or slice, got {type(idx).__name__}")
+
+
+def scan_labels(shards, block_rows: int):
+    """1 pass: shard별 행 수와 룰 기반 라벨(float32)만 모은다."""
+    lengths, labels = [], []
+    for shard in shards:
+        n = 0
+        for df in iter_blocks(shard, columns=FEATURE_COLS, block_rows=block_rows):
+            y, _ = compute_rule_recommended(df)
+            labels.append(y.astype(np.float32))
+            n += len(df)
+        lengths.append(n)
+    y = np.concatenate(labels) if labels else np.empty(0, dtype=np.float32)
+    return lengths, y
+
+
+def build_valid_set(shards, lengths, y, train_set, block_rows: int):
+    """검증 shard -> train_set과 같은 bin 경계의 Dataset(block 단위로 읽음)."""
+    return lgb.Dataset(
+        [ShardSequence(p, n, block_rows) for p, n in zip(shards, lengths)],
+        label=y, reference=train_set,
+    ).construct()
+
+
+def streaming_metrics(booster, shards, block_rows: int, name: str):
+    """검증 shard를 block 단위로 예측하면서 MAE/RMSE/R2를 누적 계산."""
+    n = 0
+    abs_sum = sq_sum = y_sum = y_sq_sum = 0.0
+    for shard in shards:
+        for df in iter_blocks(shard, columns=FEATURE_COLS, block_rows=block_rows):
+            y, _ = compute_rule_recommended(df)
+            pred = booster.predict(df[FEATURE_COLS].to_numpy(dtype=np.float64))
+            pred = np.minimum(pred, df["existing_lx"].to_numpy(dtype=float))
+            err = pred - y
+            n += len(y)
+            abs_sum += float(np.abs(err).sum())
+            sq_sum += float((err ** 2).sum())
+            y_sum += float(y.sum())
+            y_sq_sum += float((y ** 2).sum())
+    if n == 0:
+        return None
+    ss_tot = y_sq_sum - y_sum ** 2 / n
+    return {
+        "model": name,
+        "rows": n,
+        "MAE": abs_sum / n,
+        "RMSE": (sq_sum / n) ** 0.5,
+        "R2": 1 - sq_sum / ss_tot if ss_tot > 0 else float("nan"),
+    }
+
+
+def stage_row(stage: str, rows: int, sec: float):
+    per_m = sec / (rows / 1e6) if rows else float("nan")
+    return {"stage": stage, "rows": rows, "sec": sec, "sec_per_1M_rows": per_m, "peak_rss_mb": peak_rss_mb()}
+
+
+def bin_fingerprint(train_shards, valid_shards, params: dict) -> dict:
+    """
+    binned dataset(train.bin/valid.bin)을 만든 입력/설정. 저장된 값과 다르면 --reuse_bin이어도 다시 만든다.
+    shard는 경로 + 크기 + 수정 시각으로 비교(내용 해시는 안 함).
+    """
+    def files(paths):
+        return [[str(Path(p).resolve()), Path(p).stat().st_size, Path(p).stat().st_mtime_ns] for p in paths]
+    return {
+        "train_shards": files(train_shards),
+        "valid_shards": files(valid_shards),
+        "features": list(FEATURE_COLS),
+        "bin_params": {k: params.get(k) for k in BIN_PARAM_KEYS},
+    }
+
+
+def read_fingerprint(path: Path) -> Optional[dict]:
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def train_out_of_core(data_path: Path, bin_dir: Path, reuse_bin: bool, rounds: int,
+                      block_rows: int, valid_shards: int):
+    if lgb is None:
+        raise RuntimeError("out-of-core 모드는 LightGBM이 필요해. `pip install lightgbm` 설치해줘.")
+
+    shards = list_shards(data_path)
+    n_valid = valid_shards if len(shards) > valid_shards else 0
+    train_shards = shards[:len(shards) - n_valid]
+    valid_shards_ = shards[len(shards) - n_valid:]
+
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    train_bin = bin_dir / "train.bin"
+    valid_bin = bin_dir / "valid.bin"
+    fingerprint_path = bin_dir / "train.bin.json"
+
+    report = []
+    params = dict(LGBM_PARAMS)
+    fingerprint = bin_fingerprint(train_shards, valid_shards_, params)
+
+    if reuse_bin and train_bin.exists() and read_fingerprint(fingerprint_path) != fingerprint:
+        print(f"binned dataset이 현재 shard/설정과 달라서 다시 만든다: {bin_dir}")
+        reuse_bin = False
+
+    # 1) binned dataset: 있으면 재사용, 없으면 shard에서 점진적으로 구성 후 저장
+    if reuse_bin and train_bin.exists():
+        t0 = time.perf_counter()
+        train_set = lgb.Dataset(str(train_bin), params=params).construct()
+        valid_set = lgb.Dataset(str(valid_bin), reference=train_set).construct() if valid_bin.exists() else None
+        n_train = train_set.num_data()
+        report.append(stage_row("load_bin", n_train, time.perf_counter() - t0))
+        print("reuse binned dataset:", bin_dir)
+
+        # valid.bin만 없으면 검증 없이 학습하지 말고 검증 shard로 다시 만든다(train bin 기준 구간)
+        if valid_set is None and valid_shards_:
+            t0 = time.perf_counter()
+            valid_len, y_valid = scan_labels(valid_shards_, block_rows)
+            valid_set = build_valid_set(valid_shards_, valid_len, y_valid, train_set, block_rows)
+            valid_set.save_binary(str(valid_bin))
+            report.append(stage_row("construct_valid", int(sum(valid_len)), time.perf_counter() - t0))
+            print("rebuilt missing valid.bin:", valid_bin)
+    else:
+        t0 = time.perf_counter()
+        train_len, y_train = scan_labels(train_shards, block_rows)
+        valid_len, y_valid = scan_labels(valid_shards_, block_rows)
+        n_train = int(sum(train_len))
+        report.append(stage_row("label_pass", n_train + int(sum(valid_len)), time.perf_counter() - t0))
+
+        t0 = time.perf_counter()
+        train_set = lgb.Dataset(
+            [ShardSequence(p, n, block_rows) for p, n in zip(train_shards, train_len)],
+            label=y_train, feature_name=FEATURE_COLS, params=params,
+        ).construct()
+        valid_set = build_valid_set(valid_shards_, valid_len, y_valid, train_set, block_rows) if valid_shards_ else None
+        report.append(stage_row("construct_dataset", n_train, time.perf_counter() - t0))
+
+        for f in (fingerprint_path, train_bin, valid_bin):
+            if f.exists():
+                f.unlink()
+        train_set.save_binary(str(train_bin))
+        if valid_set is not None:
+            valid_set.save_binary(str(valid_bin))
+        # .bin을 다 쓴 뒤에 기록(중간에 실패하면 fingerprint가 없어 다음에 다시 만듦)
+        with open(fingerprint_path, "w", encoding="utf-8") as f:
+            json.dump(fingerprint, f, ensure_ascii=False, indent=2)
+        print("saved binned dataset:", bin_dir)
+
+    # 2) 학습(binned dataset만 사용 -> raw feature는 메모리에 없음)
+    t0 = time.perf_counter()
+    valid_sets = [valid_set] if valid_set is not None else []
+    booster = lgb.train(
+        params, train_set, num_boost_round=rounds,
+        valid_sets=valid_sets, valid_names=["valid"] if valid_sets else None,
+        callbacks=[lgb.log_evaluation(100)] if valid_sets else None,
+    )
+    report.append(stage_row("train", n_train, time.perf_counter() - t0))
+
+    # 3) 검증 지표(스트리밍)
+    if valid_shards_:
+        t0 = time.perf_counter()
+        m = streaming_metrics(booster, valid_shards_, block_rows, "LightGBM(ooc)")
+        report.append(stage_row("valid_predict", m["rows"] if m else 0, time.perf_counter() - t0))
+        if m is not None:
+            print("\n=== Valid Metrics (held-out shards) ===")
+            print(pd.DataFrame([m]).round(4).to_string(index=False))
+
+    print("\n=== Out-of-core cost ===")
+    print(pd.DataFrame(report).round(3).to_string(index=False))
+
+    out_model = MODELS_DIR / "lgbm_reco_ooc.txt"
+    booster.save_model(str(out_model))
+    print("\nsaved model:", out_model)
+
+
+# =========================
+# 평가 모드(정확도 vs 지연)
+# =========================
+def _load_engines(models_dir: Path, loaded: Optional[Dict] = None):
+    """
+    평가할 엔진들: name -> (load 함수, 설명, 모델 파일). load 함수는 predict(X DataFrame) -> ndarray를 돌려준다.
+    저장된 pkl 3개 + LightGBM native booster(sklearn/pandas 래퍼 생략) + ooc booster(있으면)
+    + 3모델 평균 + 룰 기반 대체식(라벨을 만든 식이라 정확도는 기준값).
+    loaded(name -> predict)에 이미 로드된 멤버가 있으면 평균 엔진은 pkl을 다시 읽지 않고 그걸 쓴다.
+    """
+    engines = {}
+    loaded = loaded if loaded is not None else {}
+
+    def pkl(name):
+        def load():
+            model = joblib.load(models_dir / f"{name}_reco.pkl")
+            return model.predict
+        return load
+
+    if (models_dir / "lgbm_reco.pkl").exists():
+        engines["lgbm"] = (pkl("lgbm"), "LGBMRegressor.predict(DataFrame)", models_dir / "lgbm_reco.pkl")
+
+        def load_booster():
+            booster = joblib.load(models_dir / "lgbm_reco.pkl").booster_
+            return lambda X: booster.predict(np.ascontiguousarray(X.to_numpy(dtype=np.float64)))
+        engines["lgbm_booster"] = (load_booster, "LightGBM Booster.predict(float64 ndarray)",
+                                   models_dir / "lgbm_reco.pkl")
+
+    for name, desc in [("elastic", "ElasticNet pipeline"), ("mlp", "MLP pipeline")]:
+        if (models_dir / f"{name}_reco.pkl").exists():
+            engines[name] = (pkl(name), desc, models_dir / f"{name}_reco.pkl")
+
+    ooc_path = models_dir / "lgbm_reco_ooc.txt"
+    if ooc_path.exists() and lgb is not None:
+        def load_ooc():
+            booster = lgb.Booster(model_file=str(ooc_path))
+            return lambda X: booster.predict(X.to_numpy(dtype=np.float64))
+        engines["lgbm_ooc"] = (load_ooc, "out-of-core Booster (--ooc)", ooc_path)
+
+    members = [n for n in ["lgbm", "elastic", "mlp"] if n in engines]
+    if len(members) > 1:
+        def load_ensemble():
+            preds = [loaded[n] if n in loaded else engines[n][0]() for n in members]
+
+            def predict(X):
+                ex = X["existing_lx"].to_numpy(dtype=float)
+                return np.mean([np.maximum(np.minimum(p(X), ex), 2.0) for p in preds], axis=0)
+            return predict
+        engines["ensemble"] = (load_ensemble, f"mean of {'+'.join(members)} (순차 실행)", None)
+
+    engines["rule"] = (lambda: (lambda X: compute_rule_recommended(X)[0]), "룰 기반 대체식(라벨 생성식)", None)
+    return engines
+
+
+def _measure_load(models_dir: str, name: str):
+    """
+    새 프로세스에서 엔진 1개만 로드 -> (load 시간, RSS 증가량 MB).
+    같은 프로세스에서 재면 앞 엔진이 올린 모델/해제된 메모리가 섞여 증가량이 음수도 나온다.
+    sklearn/lightgbm import는 자식이 이 모듈을 import할 때 이미 끝나서 측정에 안 들어간다
+    (모델 파일 역직렬화 + 초기화 비용만).
+    """
+    load = _load_engines(Path(models_dir))[name][0]
+    rss0 = rss_mb()
+    t0 = time.perf_counter()
+    load()
+    return time.perf_counter() - t0, rss_mb() - rss0
+
+
+def _time_batches(predict, X_pool: pd.DataFrame, batch_sizes, min_seconds: float, max_repeat: int, seed: int):
+    """배치 크기별 반복 측정(최소 3회, min_seconds 이상 또는 max_repeat까지)."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for bs in batch_sizes:
+        X = X_pool.iloc[rng.integers(0, len(X_pool), size=bs)].reset_index(drop=True)
+        predict(X.iloc[:1])   # 첫 호출 지연(lazy init) 제외
+        times = []
+        started = time.perf_counter()
+        while len(times) < 3 or (time.perf_counter() - started < min_seconds and len(times) < max_repeat):
+            t0 = time.perf_counter()
+            predict(X)
+            times.append(time.perf_counter() - t0)
+        med = float(np.median(times))
+        rows.append({
+            "batch": bs,
+            "repeat": len(times),
+            "median_ms": med * 1000,
+            "p95_ms": float(np.percentile(times, 95)) * 1000,
+            "rows_per_s": bs / med if med > 0 else float("nan"),
+        })
+    return rows
+
+
+def evaluate_models(data_path: Path, models_dir: Path, out_path: Path, batch_sizes,
+                    min_seconds: float = EVAL_MIN_SECONDS, max_repeat: int = EVAL_MAX_REPEAT):
+    """
+    저장된 모델들을 test split에서 정확도(MAE/RMSE/R2)와 함께
+    load 시간/RSS 증가량(엔진별 새 프로세스, 라이브러리 import 제외), 배치 크기별 지연/처리량으로 비교해 표 + JSON으로 남긴다.
+    """
+    if not data_path.exists():
+        raise FileNotFoundError(f"평가 데이터가 없어: {data_path} (make_dummy_features.py로 생성해줘)")
+
+    df = pd.read_csv(data_path)
+    y, _ = compute_rule_recommended(df)
+    X = df[FEATURE_COLS].copy()
+    existing = df["existing_lx"].astype(float).to_numpy()
+    _, _, X_test, _, _, y_test, _, _, ex_test = split_dataset(X, y, existing)
+    X_test = X_test.reset_index(drop=True)
+    print(f"test split: {len(X_test):,} rows ({data_path.name}), batch sizes {batch_sizes}")
+
+    if not _load_engines(models_dir):
+        raise FileNotFoundError(f"평가할 모델이 없어: {models_dir}")
+
+    # load 비용은 엔진마다 새 프로세스(spawn)에서 측정, 정확도/지연은 이 프로세스에서 로드한 걸로
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    loaded = {}
+    engines = _load_engines(models_dir, loaded)
+    for name, (load, desc, file_path) in engines.items():
+        with ctx.Pool(1) as pool:
+            load_sec, rss_delta = pool.apply(_measure_load, (str(models_dir), name))
+        predict = loaded[name] = load()
+
+        pred = np.minimum(np.asarray(predict(X_test), dtype=float), ex_test)
+        acc = metrics(y_test, pred, name)
+        batches = _time_batches(predict, X_test, batch_sizes, min_seconds, max_repeat, SEED)
+
+        results.append({
+            "engine": name,
+            "desc": desc,
+            "MAE": acc["MAE"],
+            "RMSE": acc["RMSE"],
+            "R2": acc["R2"],
+            "load_sec": load_sec,
+            "rss_delta_mb": rss_delta,
+            "file_mb": file_path.stat().st_size / (1024 * 1024) if file_path else None,
+            "batches": batches,
+        })
+        print(f"  {name:<13} MAE={acc['MAE']:.4f}  load={load_sec:.3f}s  "
+              + "  ".join(f"b{b['batch']}={b['median_ms']:.3f}ms" for b in batches))
+
+    summary = pd.DataFrame([{k: v for k, v in r.items() if k not in ("batches", "desc")} for r in results])
+    latency = pd.DataFrame([{"engine": r["engine"], **b} for r in results for b in r["batches"]])
+    print("\n=== 정확도 / 로드 비용 (test split) ===")
+    print(summary.round(4).to_string(index=False))
+    print("\n=== 배치 크기별 지연 / 처리량 ===")
+    print(latency.pivot(index="engine", columns="batch", values="median_ms").round(3).to_string())
+    print()
+    print(latency.pivot(index="engine", columns="batch", values="rows_per_s").round(0).to_string())
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "data": str(data_path),
+        "test_rows": int(len(X_test)),
+        "batch_sizes": list(batch_sizes),
+        "peak_rss_mb": peak_rss_mb(),
+        "engines": results,
+    }
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print("\nsaved eval report:", out_path)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ooc", action="store_true",
+                        help="shard(Parquet/CSV)에서 LightGBM binned dataset을 점진적으로 만들어 학습")
+    parser.add_argument("--data", type=str, default=None,
+                        help="ooc 입력(파일 또는 shard 디렉토리, 기본: dummy_features_9cols/ 또는 .csv) / evaluate 입력 CSV")
+    parser.add_argument("--bin_dir", type=str, default=str(BIN_DIR))
+    parser.add_argument("--reuse_bin", action="store_true", help="저장된 binned dataset 재사용(shard/설정 fingerprint가 같을 때만)")
+    parser.add_argument("--rounds", type=int, default=LGBM_ROUNDS)
+    parser.add_argument("--block_rows", type=int, default=BLOCK_ROWS)
+    parser.add_argument("--valid_shards", type=int, default=1, help="검증용으로 뺄 마지막 shard 수")
+    parser.add_argument("--evaluate", action="store_true",
+                        help="학습 없이 저장된 모델들의 정확도/로드 시간/메모리/배치별 지연을 비교(표 + JSON)")
+    parser.add_argument("--eval_batches", type=str, default=",".join(map(str, EVAL_BATCH_SIZES)))
+    parser.add_argument("--eval_out", type=str, default=str(EVAL_OUT))
+    parser.add_argument("--eval_min_seconds", type=float, default=EVAL_MIN_SECONDS)
+    args = parser.parse_args()
+
+    if args.evaluate:
+        evaluate_models(
+            data_path=Path(args.data) if args.data else DATA_PATH,
+            models_dir=MODELS_DIR,
+            out_path=Path(args.eval_out),
+            batch_sizes=[int(b) for b in args.eval_batches.split(",") if b.strip()],
+            min_seconds=args.eval_min_seconds,
+        )
+        return
+
+    if not args.ooc:
+        train_in_memory()
+        return
+
+    data_path = Path(args.data) if args.data else (SHARD_DIR if SHARD_DIR.exists() else DATA_PATH)
+    train_out_of_core(
+        data_path=data_path,
+        bin_dir=Path(args.bin_dir),
+        reuse_bin=args.reuse_bin,
+        rounds=args.rounds,
+        block_rows=args.block_rows,
+        valid_shards=args.valid_shards,
+    )
+
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { FiltersBar } from '../../components/Filters/FiltersBar';
 import { MapView } from '../../components/Map/MapView';
 import { GridDetailPanel } from '../../components/Panel/GridDetailPanel';
@@ -44,6 +44,28 @@ export const MapPage: React.FC = () => {
         fetchGrids();
     }, [selectedGu, selectedDong]);
 
+    // Live recommendation updates: refresh the open detail panel if its grid changed
+    const selectedGridIdRef = useRef<string | null>(null);
+
+    useEffect(() => {
+        selectedGridIdRef.current = selectedGridId;
+    }, [selectedGridId]);
+
+    useEffect(() => {
+        return RecoService.subscribeUpdates((updated) => {
+            const gridId = selectedGridIdRef.current;
+            if (!gridId) return;
+            if (updated === null) {
+                RecoService.getRecommendationDetail(gridId).then((detail) => {
+                    if (selectedGridIdRef.current === gridId) setRecommendation(detail);
+                });
+                return;
+            }
+            const match = updated.find((r) => r.grid_id === gridId);
+            if (match) setRecommendation(match);
+        });
+    }, []);
+
     // Handle Grid Selection
     const handleGridClick = async (gridId: string) => {
         setSelectedGridId(gridId);
@@ -0,0 +1,90 @@
+import type { Recommendation, Reason } from '../types/domain';
+
+// Decoder for the compact recommendation artifact served by GET /api/reco/artifact
+// (backend/app/data/reco_artifact.py). Layout, little endian:
+//   "RECO" | uint32 version | uint32 headerLen | header JSON | 8-byte aligned column blob
+const MAGIC = 'RECO';
+const VERSION = 1;
+const NO_REASON = 255;
+const REASON_SLOTS = 3;
+
+interface ColumnSpec {
+    name: string;
+    dtype: 'float64' | 'float32' | 'uint8' | 'uint16';
+    offset: number;
+    length: number;
+}
+
+interface ArtifactHeader {
+    n: number;
+    labels: [string, string, string][]; // [key, label, direction]
+    columns: ColumnSpec[];
+    grid_id?: string[];                 // present when grid ids are not numeric
+}
+
+type Column = Float64Array | Float32Array | Uint8Array | Uint16Array;
+
+const TYPED: Record<ColumnSpec['dtype'], new (buf: ArrayBuffer, offset: number, length: number) => Column> = {
+    float64: Float64Array,
+    float32: Float32Array,
+    uint8: Uint8Array,
+    uint16: Uint16Array,
+};
+
+export interface RecoArtifact {
+    size: number;
+    get: (gridId: string) => Recommendation | null;
+}
+
+export const decodeRecoArtifact = (buf: ArrayBuffer): RecoArtifact => {
+    const view = new DataView(buf);
+    const magic = String.fromCharCode(...new Uint8Array(buf, 0, 4));
+    if (magic !== MAGIC) throw new Error('Not a reco artifact');
+    const version = view.getUint32(4, true);
+    if (version !== VERSION) throw new Error(`Unsupported artifact version: ${version}`);
+
+    const headerLen = view.getUint32(8, true);
+    const header: ArtifactHeader = JSON.parse(new TextDecoder().decode(new Uint8Array(buf, 12, headerLen)));
+    const blobStart = 12 + headerLen;
+
+    // Zero-copy typed array views over the buffer
+    const cols: Record<string, Column> = {};
+    header.columns.forEach((c) => {
+        cols[c.name] = new TYPED[c.dtype](buf, blobStart + c.offset, c.length);
+    });
+
+    const reasonDict: Reason[] = header.labels.map(([key, label, direction]) => ({
+        key,
+        label,
+        direction: direction as Reason['direction'],
+    }));
+
+    const ids: string[] = header.grid_id ?? Array.from(cols.grid_id, (v) => String(v));
+    const index = new Map<string, number>();
+    ids.forEach((id, i) => index.set(id, i));
+
+    const round3 = (v: number) => Math.round(v * 1000) / 1000;
+
+    // Recommendation objects are built lazily per lookup
+    const get = (gridId: string): Recommendation | null => {
+        const i = index.get(String(gridId));
+        if (i === undefined) return null;
+
+        const reasons: Reason[] = [];
+        for (let s = 0; s < REASON_SLOTS; s++) {
+            const code = cols.reasons[i * REASON_SLOTS + s];
+            if (code !== NO_REASON) reasons.push(reasonDict[code]);
+        }
+
+        return {
+            grid_id: ids[i],
+            existing_lx: round3(cols.existing_lx[i]),
+            recommended_lx: round3(cols.recommended_lx[i]),
+            delta_percent: round3(cols.delta_percent[i]),
+            dim_hours: cols.keep_hours[i] || 3,
+            reasons,
+        };
+    };
+
+    return { size: header.n, get };
+};
@@ -1,5 +1,6 @@
 import type { Area, GridSummary, Recommendation, GridCell, Reason } from '../types/domain';
 import Papa from 'papaparse';
+import { decodeRecoArtifact, type RecoArtifact } from './recoArtifact';
 
 // Types for Service Parameters
 export interface GridFilterParams {
@@ -73,6 +74,76 @@ const loadCsvData = async (): Promise<Map<string, CsvRow>> => {
     }
 };
 
+// Compact binary artifact from the backend (falls back to CSV when unavailable)
+let artifactCache: Promise<RecoArtifact | null> | null = null;
+
+const loadArtifact = (): Promise<RecoArtifact | null> => {
+    if (!artifactCache) {
+        artifactCache = (async () => {
+            try {
+                const response = await fetch('/api/reco/artifact');
+                if (!response.ok) {
+                    throw new Error(`Failed to load artifact: ${response.status} ${response.statusText}`);
+                }
+                const artifact = decodeRecoArtifact(await response.arrayBuffer());
+                console.log(`[RecoService] Loaded ${artifact.size} recommendations from artifact.`);
+                return artifact;
+            } catch (error) {
+                console.warn("[RecoService] Artifact unavailable, falling back to CSV:", error);
+                return null;
+            }
+        })();
+    }
+    return artifactCache;
+};
+
+// Live updates pushed by the backend (GET /api/grids/stream) after grid feature patches.
+// They override the artifact/CSV values for the patched grids.
+interface GridUpdate {
+    grid_id: string;
+    existing_lx: number;
+    recommended_lx: number;
+    delta_percent: number;
+    duration_hours: number;
+    reasons: Reason[];
+}
+
+// null = resynced, every recommendation may have changed
+type UpdateListener = (updated: Recommendation[] | null) => void;
+
+const liveUpdates = new Map<string, Recommendation>();
+const updateListeners = new Set<UpdateListener>();
+let updateSource: EventSource | null = null;
+
+const openUpdateStream = () => {
+    if (updateSource || typeof EventSource === 'undefined') return;
+    updateSource = new EventSource('/api/grids/stream');
+
+    updateSource.addEventListener('grid_update', (e) => {
+        const payload = JSON.parse(e.data) as { revision: number; grids: GridUpdate[] };
+        const updated = payload.grids.map((g): Recommendation => ({
+            grid_id: String(g.grid_id),
+            existing_lx: g.existing_lx,
+            recommended_lx: g.recommended_lx,
+            delta_percent: g.delta_percent,
+            dim_hours: g.duration_hours,
+            reasons: g.reasons,
+        }));
+        updated.forEach((r) => liveUpdates.set(r.grid_id, r));
+        console.log(`[RecoService] Live update (revision ${payload.revision}): ${updated.length} grid(s)`);
+        updateListeners.forEach((listener) => listener(updated));
+    });
+
+    updateSource.addEventListener('resync', () => {
+        // Missed updates: refetch the artifact (built from the patched backend table),
+        // then let listeners re-read whatever they show
+        console.warn("[RecoService] Update stream out of sync, reloading recommendations");
+        liveUpdates.clear();
+        artifactCache = null;
+        loadArtifact().then(() => updateListeners.forEach((listener) => listener(null)));
+    });
+};
+
 const parseReasons = (row: CsvRow): Reason[] => {
     // 1. Try 'reasons' column (JSON)
     if (row.reasons) {
@@ -154,8 +225,33 @@ const RecoService = {
         return [];
     },
 
+    // Subscribe to live recommendation changes; returns an unsubscribe function
+    subscribeUpdates: (listener: UpdateListener): (() => void) => {
+        openUpdateStream();
+        updateListeners.add(listener);
+        return () => {
+            updateListeners.delete(listener);
+            if (updateListeners.size === 0 && updateSource) {
+                updateSource.close();
+                updateSource = null;
+            }
+        };
+    },
+
     getRecommendationDetail: async (gridId: string): Promise<Recommendation | null> => {
         try {
+            const live = liveUpdates.get(String(gridId));
+            if (live) return live;
+
+            const artifact = await loadArtifact();
+            if (artifact) {
+                const reco = artifact.get(String(gridId));
+                if (!reco) {
+                    console.warn(`[RecoService] No recommendation found for grid ${gridId}`);
+                }
+                return reco;
+            }
+
             const dataMap = await loadCsvData();
             const row = dataMap.get(String(gridId));
 